@@ -0,0 +1,325 @@
+"""
+AI Game Pipeline - Prompt to Playable Game with the FREE AI Engines
+Runs analyze → template → enhance → code generation either blocking (one
+call at a time) or on asyncio, where code generation starts speculatively
+from the un-enhanced template while enhancement is still in flight
+"""
+
+import asyncio
+import time
+from typing import Dict, Any, Optional
+
+from free_ai_template_engine import FreeAITemplateEngine
+from free_ai_code_generator import FreeAICodeGenerator
+from async_llm_client import AsyncLLMClient
+from prompt_similarity import normalize_prompt
+from rate_limiter import BATCH, llm_priority
+from single_flight import SingleFlight, AsyncSingleFlight
+
+# Concurrent runs for the same normalized prompt share one generation
+pipeline_flights = SingleFlight()
+async_pipeline_flights = AsyncSingleFlight()
+
+def _result(template, game_code: str, code_generator: FreeAICodeGenerator, timings: Dict[str, float],
+            speculative_hit: Optional[bool] = None, code_template=None) -> Dict[str, Any]:
+    # The code generator swallows API errors and returns its local game instead
+    used_fallback = game_code == code_generator._fallback_complete_game(code_template or template)
+    result = {
+        'html': game_code,
+        'template': template,
+        'summary': code_generator.generate_game_preview(template),
+        'validation': code_generator.validate_generated_code(game_code),
+        'used_fallback': used_fallback,
+        'timings_ms': {stage: round(ms, 2) for stage, ms in timings.items()}
+    }
+    if speculative_hit is not None:
+        result['speculative_hit'] = speculative_hit
+    return result
+
+def run_pipeline(prompt: str, template_engine: Optional[FreeAITemplateEngine] = None,
+                 code_generator: Optional[FreeAICodeGenerator] = None, coalesce: bool = True) -> Dict[str, Any]:
+    """Blocking pipeline: every LLM call waits for the previous one"""
+    if coalesce:
+        result = pipeline_flights.do(normalize_prompt(prompt), _run_pipeline, prompt, template_engine, code_generator)
+        return dict(result)
+    return _run_pipeline(prompt, template_engine, code_generator)
+
+def _run_pipeline(prompt: str, template_engine: Optional[FreeAITemplateEngine],
+                  code_generator: Optional[FreeAICodeGenerator]) -> Dict[str, Any]:
+    template_engine = template_engine or FreeAITemplateEngine()
+    code_generator = code_generator or FreeAICodeGenerator()
+    timings = {}
+    started = time.perf_counter()
+
+    concept = template_engine.analyze_prompt(prompt)
+    timings['analyze'] = (time.perf_counter() - started) * 1000
+
+    mark = time.perf_counter()
+    template = template_engine.generate_template(concept)
+    timings['template'] = (time.perf_counter() - mark) * 1000
+
+    mark = time.perf_counter()
+    template = template_engine.enhance_template(template)
+    timings['enhance'] = (time.perf_counter() - mark) * 1000
+
+    mark = time.perf_counter()
+    game_code = code_generator.generate_complete_game(template)
+    timings['code'] = (time.perf_counter() - mark) * 1000
+    timings['total'] = (time.perf_counter() - started) * 1000
+
+    return _result(template, game_code, code_generator, timings)
+
+async def run_pipeline_async(prompt: str, client: AsyncLLMClient,
+                             template_engine: Optional[FreeAITemplateEngine] = None,
+                             code_generator: Optional[FreeAICodeGenerator] = None,
+                             strict: bool = False, coalesce: bool = True) -> Dict[str, Any]:
+    """
+    Async pipeline. Enhancement and code generation both only need the base
+    template, so they run concurrently; the game is built from the base
+    template and returned with the enhanced one. With strict=True the code is
+    regenerated whenever enhancement actually changed the template.
+    """
+    if coalesce:
+        result = await async_pipeline_flights.do(
+            (normalize_prompt(prompt), strict),
+            lambda: _run_pipeline_async(prompt, client, template_engine, code_generator, strict)
+        )
+        return dict(result)
+    return await _run_pipeline_async(prompt, client, template_engine, code_generator, strict)
+
+async def _run_pipeline_async(prompt: str, client: AsyncLLMClient, template_engine: Optional[FreeAITemplateEngine],
+                              code_generator: Optional[FreeAICodeGenerator], strict: bool) -> Dict[str, Any]:
+    template_engine = template_engine or FreeAITemplateEngine()
+    code_generator = code_generator or FreeAICodeGenerator()
+    timings = {}
+    started = time.perf_counter()
+
+    concept = await template_engine.analyze_prompt_async(prompt, client)
+    timings['analyze'] = (time.perf_counter() - started) * 1000
+
+    mark = time.perf_counter()
+    base_template = await template_engine.generate_template_async(concept, client)
+    timings['template'] = (time.perf_counter() - mark) * 1000
+
+    mark = time.perf_counter()
+    template, game_code = await asyncio.gather(
+        template_engine.enhance_template_async(base_template, client),
+        code_generator.generate_complete_game_async(base_template, client)
+    )
+    timings['enhance_and_code'] = (time.perf_counter() - mark) * 1000
+
+    speculative_hit = template == base_template
+    code_template = base_template
+    if strict and not speculative_hit:
+        mark = time.perf_counter()
+        game_code = await code_generator.generate_complete_game_async(template, client)
+        code_template = template
+        timings['code_regenerate'] = (time.perf_counter() - mark) * 1000
+    timings['total'] = (time.perf_counter() - started) * 1000
+
+    return _result(template, game_code, code_generator, timings, speculative_hit, code_template)
+
+async def run_pipelines_async(prompts, strict: bool = False, max_connections_per_host: Optional[int] = None,
+                              priority: int = BATCH):
+    """
+    Serve many prompts concurrently on one event loop and one connection pool.
+    Bulk runs queue behind interactive requests for the rate-limited quota.
+    """
+    template_engine = FreeAITemplateEngine()
+    code_generator = FreeAICodeGenerator()
+    kwargs = {'max_connections_per_host': max_connections_per_host} if max_connections_per_host else {}
+
+    async with AsyncLLMClient(**kwargs) as client:
+        # gather() copies the current context into each task, priority included
+        with llm_priority(priority):
+            return await asyncio.gather(*(
+                run_pipeline_async(prompt, client, template_engine, code_generator, strict)
+                for prompt in prompts
+            ))
+
+def benchmark_pipeline(users: int = 8, latency: float = 0.05) -> Dict[str, Any]:
+    """Blocking pipeline per user vs. all users on one event loop, against the local mock LLM"""
+    from mock_llm_server import MockLLMServer
+    from llm_backends import server_backend
+    from llm_cache import get_response_cache, set_response_cache
+
+    from prompt_similarity import BENCHMARK_CONCEPTS
+
+    prompts = [f"make a {concept} game" for concept in (BENCHMARK_CONCEPTS * users)[:users]]
+    results = {'users': users, 'latency_ms': latency * 1000}
+
+    # Measure the network path, not the response cache
+    response_cache = get_response_cache()
+    set_response_cache(None)
+
+    with MockLLMServer(latency=latency) as server:
+        def mock_engines():
+            # Fresh engines per run so the concept index doesn't carry over
+            template_engine = FreeAITemplateEngine()
+            code_generator = FreeAICodeGenerator()
+            template_engine.backend = code_generator.backend = server_backend(server)
+            return template_engine, code_generator
+
+        template_engine, code_generator = mock_engines()
+        start = time.perf_counter()
+        for prompt in prompts:
+            run_pipeline(prompt, template_engine, code_generator)
+        results['sync_seconds'] = time.perf_counter() - start
+        results['sync_calls'] = server.stats['requests']
+
+        template_engine, code_generator = mock_engines()
+
+        async def run_all():
+            async with AsyncLLMClient() as client:
+                return await asyncio.gather(*(
+                    run_pipeline_async(prompt, client, template_engine, code_generator)
+                    for prompt in prompts
+                ))
+
+        server.stats['requests'] = 0
+        start = time.perf_counter()
+        async_results = asyncio.run(run_all())
+        results['async_seconds'] = time.perf_counter() - start
+        results['async_calls'] = server.stats['requests']
+        results['per_user_ms'] = async_results[0]['timings_ms']['total']
+
+    set_response_cache(response_cache)
+
+    results['speedup'] = results['sync_seconds'] / results['async_seconds']
+    return results
+
+def benchmark_coalescing(users: int = 20, latency: float = 0.05) -> Dict[str, Any]:
+    """Many users submitting the same prompt at once, with and without single-flight"""
+    from concurrent.futures import ThreadPoolExecutor
+    from mock_llm_server import MockLLMServer
+    from llm_backends import server_backend
+    from llm_cache import get_response_cache, set_response_cache
+
+    prompts = [('make a space shooter game', 'Make a space shooter!', 'create space shooter')[i % 3]
+               for i in range(users)]
+    results = {'users': users}
+
+    response_cache = get_response_cache()
+    set_response_cache(None)
+
+    with MockLLMServer(latency=latency) as server:
+        for coalesce in (False, True):
+            template_engine = FreeAITemplateEngine()
+            code_generator = FreeAICodeGenerator()
+            template_engine.backend = code_generator.backend = server_backend(server)
+
+            server.stats['requests'] = 0
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=users) as pool:
+                list(pool.map(lambda prompt: run_pipeline(prompt, template_engine, code_generator, coalesce), prompts))
+            label = 'coalesced' if coalesce else 'independent'
+            results[label] = {'seconds': time.perf_counter() - start, 'llm_calls': server.stats['requests']}
+
+    set_response_cache(response_cache)
+    return results
+
+def _percentile(ordered, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def benchmark_throughput(pipelines: int = 64, concurrency: int = 16,
+                         latency: str = 'lognormal:0.1:0.6') -> Dict[str, Any]:
+    """
+    Whole-pipeline throughput and tail latency against the canned stub
+    backend, with blocking pipelines on a thread pool vs. one event loop
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from mock_llm_server import MockLLMServer
+    from llm_backends import server_backend
+    from llm_cache import get_response_cache, set_response_cache
+
+    prompts = [f"make game number {i}" for i in range(pipelines)]
+    results = {'pipelines': pipelines, 'concurrency': concurrency, 'latency': latency}
+
+    response_cache = get_response_cache()
+    set_response_cache(None)
+
+    def summarize(label: str, seconds: float, latencies, calls: int, fallbacks: int):
+        ordered = sorted(latencies)
+        results[label] = {
+            'seconds': seconds,
+            'pipelines_per_second': pipelines / seconds,
+            'p50_ms': _percentile(ordered, 0.50) * 1000,
+            'p95_ms': _percentile(ordered, 0.95) * 1000,
+            'p99_ms': _percentile(ordered, 0.99) * 1000,
+            'max_ms': ordered[-1] * 1000,
+            'llm_calls': calls,
+            'fallbacks': fallbacks
+        }
+
+    with MockLLMServer(latency=latency, canned=True) as server:
+        backend = server_backend(server)
+
+        def engines():
+            # Fresh engines per pipeline so the concept index never short-circuits analysis
+            template_engine = FreeAITemplateEngine()
+            code_generator = FreeAICodeGenerator()
+            template_engine.backend = code_generator.backend = backend
+            return template_engine, code_generator
+
+        def timed_sync(prompt: str):
+            start = time.perf_counter()
+            result = run_pipeline(prompt, *engines(), coalesce=False)
+            return time.perf_counter() - start, result['used_fallback']
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(timed_sync, prompts))
+        summarize('threads', time.perf_counter() - start, [latency for latency, _ in outcomes],
+                  server.stats['requests'], sum(fallback for _, fallback in outcomes))
+
+        async def run_all():
+            limit = asyncio.Semaphore(concurrency)
+
+            async def timed_async(client, prompt: str):
+                async with limit:
+                    start = time.perf_counter()
+                    result = await run_pipeline_async(prompt, client, *engines(), coalesce=False)
+                    return time.perf_counter() - start, result['used_fallback']
+
+            async with AsyncLLMClient(max_connections_per_host=concurrency * 2) as client:
+                return await asyncio.gather(*(timed_async(client, prompt) for prompt in prompts))
+
+        server.stats['requests'] = 0
+        start = time.perf_counter()
+        outcomes = asyncio.run(run_all())
+        summarize('async', time.perf_counter() - start, [latency for latency, _ in outcomes],
+                  server.stats['requests'], sum(fallback for _, fallback in outcomes))
+
+    set_response_cache(response_cache)
+    return results
+
+if __name__ == "__main__":
+    throughput = benchmark_throughput()
+    print("📈 PIPELINE THROUGHPUT AND TAIL LATENCY (canned stub backend)")
+    print("=" * 50)
+    print(f"{throughput['pipelines']} pipelines, {throughput['concurrency']} concurrent, "
+          f"LLM latency {throughput['latency']}")
+    for label in ('threads', 'async'):
+        entry = throughput[label]
+        print(f"{label:>7}: {entry['pipelines_per_second']:.1f} pipelines/s, p50 {entry['p50_ms']:.0f}ms, "
+              f"p95 {entry['p95_ms']:.0f}ms, p99 {entry['p99_ms']:.0f}ms, max {entry['max_ms']:.0f}ms "
+              f"({entry['llm_calls']} LLM calls, {entry['fallbacks']} fallbacks)")
+    print()
+
+    coalescing = benchmark_coalescing()
+    print("🪢 SINGLE-FLIGHT COALESCING (local mock LLM)")
+    print("=" * 50)
+    for label in ('independent', 'coalesced'):
+        entry = coalescing[label]
+        print(f"{label:>11}: {entry['llm_calls']} LLM calls for {coalescing['users']} identical prompts "
+              f"in {entry['seconds']:.2f}s")
+    print()
+
+    result = benchmark_pipeline()
+    print("⚡ AI PIPELINE BENCHMARK (local mock LLM)")
+    print("=" * 50)
+    print(f"{result['users']} users, {result['latency_ms']:.0f}ms simulated LLM latency")
+    print(f"Sequential blocking: {result['sync_seconds']:.2f}s ({result['sync_calls']} LLM calls)")
+    print(f"Async, one loop:     {result['async_seconds']:.2f}s ({result['async_calls']} LLM calls)")
+    print(f"Per-user async latency: {result['per_user_ms']:.0f}ms")
+    print(f"Speedup: {result['speedup']:.2f}x")
@@ -5,7 +5,7 @@ Generates actual playable HTML5 games with complete file delivery system
 FIXED: Removed all problematic imports that cause ImportError
 """
 
-from flask import Flask, request, jsonify, send_file, render_template_string
+from flask import Flask, Response, request, jsonify, send_file, render_template_string, stream_with_context
 from flask_cors import CORS
 import os
 import json
@@ -14,10 +14,29 @@ import datetime
 import tempfile
 import zipfile
 import shutil
+import sys
+import random
+import threading
+import time
 import traceback
+from game_store import GameStore
+from lazy_loader import get_library, get_library_status, preload_libraries
+from true_randomization_engine import derive_seed, SEED_MASK
+from circuit_breaker import get_breaker_metrics
+from llm_cache import get_response_cache
+from prompt_similarity import normalize_prompt
+from single_flight import SingleFlight
+from prompt_builder import prompt_builder
+from rate_limiter import get_rate_limit_metrics
+from hedging import HedgedCall
+from page_compression import compress_page
+from shared_assets import shared_assets
+from static_assets import ASSET_MAX_AGE, register_template_files, static_assets
 
 app = Flask(__name__)
 CORS(app)
+# Let a fronting nginx/Apache stream asset files itself (X-Sendfile) instead of a worker
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', 'false').lower() == 'true'
 
 # Global stats
 stats = {
@@ -27,11 +46,41 @@ stats = {
     'enhanced_games': 0,
     'basic_games': 0,
     'files_downloaded': 0,
-    'games_opened': 0
+    'games_opened': 0,
+    'ai_upgrades': 0
 }
 
-# Game storage
-generated_games = {}
+# Bumped whenever generator output changes, so replayed recipes can be told apart
+RENDER_ENGINE_VERSION = '13.0.0'
+
+def render_game_recipe(prompt, mode, seed):
+    return generate_game_from_prompt(prompt, mode, seed)
+
+# Game storage: GAME_STORAGE_MODE=recipe keeps (prompt, mode, seed, version) per game
+# and re-renders on demand instead of holding every game's HTML. Served pages get asset
+# links fingerprinted, then are minified and precompressed once per game; in html mode the
+# original markup is kept zlib-packed for downloads (GAME_PAGE_COMPRESSION=off keeps raw HTML)
+def build_game_page(html):
+    return compress_page(static_assets.rewrite_links(html))
+
+generated_games = GameStore(
+    render_game_recipe,
+    RENDER_ENGINE_VERSION,
+    mode=os.environ.get('GAME_STORAGE_MODE', 'html'),
+    render_cache_size=int(os.environ.get('RENDER_CACHE_SIZE', 64)),
+    page_compressor=build_game_page if os.environ.get('GAME_PAGE_COMPRESSION', 'on') != 'off' else None
+)
+
+# Fingerprinted static assets: template files and shared snippets built by earlier runs
+register_template_files()
+shared_assets.register_built()
+
+# Game pages never change once generated, so browsers and CDNs may keep them for a year;
+# a hedged game the AI may still upgrade is only revalidated until its window closes
+GAME_PAGE_MAX_AGE = int(os.environ.get('GAME_PAGE_MAX_AGE', 31536000))
+AI_UPGRADE_WINDOW = float(os.environ.get('AI_UPGRADE_WINDOW', 120))
+pending_upgrades = {}   # game_id -> time after which a late AI result is dropped
+upgrade_lock = threading.Lock()   # orders upgrades against play_game's cacheability check
 
 # Game templates with complete HTML5 implementations
 def generate_darts_game(prompt, mode, character, theme, difficulty):
@@ -2294,19 +2343,39 @@ def generate_racing_game(prompt, mode, character, theme, difficulty):
         'created_at': datetime.datetime.now().isoformat()
     }
 
-def generate_game_from_prompt(prompt, mode='ultimate'):
+def parse_seed(data):
+    """Optional replay seed from a request body; raises ValueError if malformed"""
+    seed = data.get('seed')
+    if seed is None:
+        return None
+    try:
+        if isinstance(seed, bool) or not isinstance(seed, (int, str)):
+            raise ValueError
+        seed = int(seed)
+    except ValueError:
+        raise ValueError('seed must be a non-negative integer')
+    if seed < 0 or seed > SEED_MASK:
+        raise ValueError(f'seed must be between 0 and {SEED_MASK}')
+    return seed
+
+def generate_game_from_prompt(prompt, mode='ultimate', seed=None):
     """Main game generation function with intelligent prompt processing"""
     
     # Extract game type from prompt
     prompt_lower = prompt.lower()
     
+    # Same (prompt, mode, seed) always yields the same game, so any game can be replayed
+    if seed is None:
+        seed = derive_seed(mode, prompt)
+    rng = random.Random(seed)
+    
     # Character generation
     characters = ['Champion', 'Master', 'Elite', 'Pro', 'Legend', 'Hero', 'Expert', 'Ace']
-    character = characters[hash(prompt) % len(characters)]
+    character = rng.choice(characters)
     
     # Theme generation
     themes = ['Professional', 'Championship', 'Tournament', 'Elite Competition', 'Master Class', 'Ultimate Challenge']
-    theme = themes[hash(prompt + mode) % len(themes)]
+    theme = rng.choice(themes)
     
     # Difficulty based on mode
     difficulties = {
@@ -2319,23 +2388,27 @@ def generate_game_from_prompt(prompt, mode='ultimate'):
     
     # Intelligent game type detection
     if any(word in prompt_lower for word in ['dart', 'dartboard', 'bullseye', 'throw']):
-        return generate_darts_game(prompt, mode, character, theme, difficulty)
+        game = generate_darts_game(prompt, mode, character, theme, difficulty)
     elif any(word in prompt_lower for word in ['basketball', 'hoop', 'shoot', 'court', 'ball']):
-        return generate_basketball_game(prompt, mode, character, theme, difficulty)
+        game = generate_basketball_game(prompt, mode, character, theme, difficulty)
     elif any(word in prompt_lower for word in ['underwater', 'ocean', 'sea', 'dive', 'treasure', 'submarine']):
-        return generate_underwater_game(prompt, mode, character, theme, difficulty)
+        game = generate_underwater_game(prompt, mode, character, theme, difficulty)
     elif any(word in prompt_lower for word in ['medieval', 'knight', 'dragon', 'castle', 'sword', 'quest']):
-        return generate_medieval_game(prompt, mode, character, theme, difficulty)
+        game = generate_medieval_game(prompt, mode, character, theme, difficulty)
     elif any(word in prompt_lower for word in ['space', 'alien', 'laser', 'spaceship', 'galaxy', 'star']):
-        return generate_space_game(prompt, mode, character, theme, difficulty)
+        game = generate_space_game(prompt, mode, character, theme, difficulty)
     elif any(word in prompt_lower for word in ['racing', 'car', 'speed', 'race', 'track', 'fast']):
-        return generate_racing_game(prompt, mode, character, theme, difficulty)
+        game = generate_racing_game(prompt, mode, character, theme, difficulty)
     else:
         # Default to most popular game type based on prompt complexity
         if len(prompt.split()) > 5:
-            return generate_medieval_game(prompt, mode, character, theme, difficulty)
+            game = generate_medieval_game(prompt, mode, character, theme, difficulty)
         else:
-            return generate_darts_game(prompt, mode, character, theme, difficulty)
+            game = generate_darts_game(prompt, mode, character, theme, difficulty)
+    
+    game['prompt'] = prompt
+    game['seed'] = seed
+    return game
 
 # API Routes
 @app.route('/')
@@ -2356,12 +2429,17 @@ def health_check():
         'endpoints': [
             '/ultimate-generate-game',
             '/ai-generate-game', 
+            '/ai-stream-game',
             '/generate-game',
             '/play-game/<game_id>',
             '/download-game/<game_id>',
-            '/generation-stats'
+            '/generation-stats',
+            '/llm-metrics',
+            '/assets/<fingerprinted name>',
+            '/assets/manifest.json'
         ],
         'port': os.environ.get('PORT', '5000'),
+        'template_libraries': get_library_status(),
         'stats': stats
     })
 
@@ -2374,8 +2452,13 @@ def ultimate_generate_game():
         if not prompt:
             return jsonify({'success': False, 'message': 'Prompt is required'}), 400
         
+        try:
+            seed = parse_seed(data)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
         # Generate game
-        game = generate_game_from_prompt(prompt, 'ultimate')
+        game = generate_game_from_prompt(prompt, 'ultimate', seed)
         generated_games[game['id']] = game
         
         # Update stats
@@ -2404,9 +2487,38 @@ def ai_generate_game():
         if not prompt:
             return jsonify({'success': False, 'message': 'Prompt is required'}), 400
         
-        # Generate game
-        game = generate_game_from_prompt(prompt, 'free_ai')
-        generated_games[game['id']] = game
+        try:
+            seed = parse_seed(data)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
+        game_id = str(uuid.uuid4())
+        
+        def render_local_game(upgradable=False):
+            # Stored (and opened for upgrades) before any late AI result can arrive
+            game = dict(generate_game_from_prompt(prompt, 'free_ai', seed), id=game_id)
+            generated_games[game_id] = game
+            if upgradable:
+                with upgrade_lock:
+                    pending_upgrades[game_id] = time.time() + AI_UPGRADE_WINDOW
+            return game
+        
+        # Race the AI pipeline against the local game; never wait past the SLO
+        if get_library('ai_code_generator').backend.configured:
+            game, from_ai = ai_hedge.run(
+                lambda: generate_ai_game(prompt, game_id),
+                lambda: render_local_game(upgradable=True),
+                AI_GENERATION_SLO,
+                on_late_result=lambda ai_game: upgrade_game(game_id, ai_game),
+                upgrade_window=AI_UPGRADE_WINDOW
+            )
+            if from_ai:
+                prepared = generated_games.prepare(game)   # compress outside the lock play_game waits on
+                with upgrade_lock:
+                    generated_games.put(game_id, prepared)
+                    pending_upgrades.pop(game_id, None)
+        else:
+            game, from_ai = render_local_game(), False
         
         # Update stats
         stats['total_games_generated'] += 1
@@ -2415,7 +2527,8 @@ def ai_generate_game():
         return jsonify({
             'success': True,
             'message': 'FREE AI game generated successfully!',
-            'game': game
+            'game': game,
+            'source': 'ai' if from_ai else 'local'
         })
         
     except Exception as e:
@@ -2425,6 +2538,139 @@ def ai_generate_game():
             'error': str(e)
         }), 500
 
+# Viral prompts: concurrent identical AI requests share one template and one code stream
+ai_flights = SingleFlight()
+
+# Latency SLO for /ai-generate-game; past it the local game is served and upgraded later
+AI_GENERATION_SLO = float(os.environ.get('AI_GENERATION_SLO', 8))
+ai_hedge = HedgedCall()
+
+def ai_game_record(game_id, prompt, template, html, features):
+    concept = template.concept
+    return {
+        'id': game_id,
+        'title': template.game_structure.get('title', 'AI Generated Game'),
+        'type': concept.genre,
+        'html': html,
+        'character': 'AI',
+        'theme': concept.theme,
+        'difficulty': concept.complexity,
+        'quality': 'free_ai',
+        'features': ['FREE AI generated'] + features + list(concept.mechanics),
+        'art_style': concept.visual_style,
+        'multiplayer_mode': 'single_player',
+        'created_at': datetime.datetime.now().isoformat(),
+        'prompt': prompt
+    }
+
+def generate_ai_game(prompt, game_id):
+    """
+    Full FREE AI pipeline; None when the AI backends failed and only the
+    fallback game came back, or when the reply isn't a valid document
+    (truncated, fenced or malformed), so the local game is served instead
+    """
+    from ai_game_pipeline import run_pipeline
+    
+    result = run_pipeline(prompt, get_library('ai_template_engine'), get_library('ai_code_generator'))
+    if result['used_fallback']:
+        return None
+    if not result['validation']['is_valid_html']:
+        print(f"Discarding AI game {game_id}: {'; '.join(result['validation']['issues'])}")
+        return None
+    return ai_game_record(game_id, prompt, result['template'], result['html'], [])
+
+def upgrade_game(game_id, ai_game):
+    """
+    Replace the locally rendered game with the AI one that missed the SLO,
+    unless its window has closed: by then the local page is served as
+    immutable and caches would never see the change. An invalid page never
+    replaces the working local one
+    """
+    validation = get_library('ai_code_generator').validate_generated_code(ai_game['html'])
+    if not validation['is_valid_html']:
+        print(f"Dropping late AI result for game {game_id}: {'; '.join(validation['issues'])}")
+        with upgrade_lock:
+            pending_upgrades.pop(game_id, None)   # no other result is coming; the local page can be cached
+        return False
+    # Compressed before taking the lock, so play_game's cacheability check never waits on it
+    prepared = generated_games.prepare(dict(ai_game, features=ai_game['features'] + ['Upgraded after SLO']))
+    with upgrade_lock:
+        deadline = pending_upgrades.get(game_id)
+        if deadline is None or time.time() >= deadline:
+            pending_upgrades.pop(game_id, None)
+            print(f"Dropping late AI result for game {game_id}: upgrade window closed")
+            return False
+        generated_games.put(game_id, prepared)
+        pending_upgrades.pop(game_id, None)
+    stats['ai_upgrades'] += 1
+    return True
+
+def upgrade_pending(game_id):
+    """Whether a late AI result may still replace this game's page"""
+    with upgrade_lock:
+        deadline = pending_upgrades.get(game_id)
+        if deadline is not None and time.time() >= deadline:
+            pending_upgrades.pop(game_id, None)
+            return False
+        return deadline is not None
+
+def build_ai_template(prompt):
+    template_engine = get_library('ai_template_engine')
+    concept = template_engine.analyze_prompt(prompt)
+    return concept, template_engine.generate_template(concept)
+
+def sse_event(event, data):
+    """One Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/ai-stream-game', methods=['POST'])
+def ai_stream_game():
+    """FREE AI generation streamed to the browser as Server-Sent Events"""
+    data = request.get_json() or {}
+    prompt = data.get('prompt', '')
+    
+    if not prompt:
+        return jsonify({'success': False, 'message': 'Prompt is required'}), 400
+    
+    def events():
+        try:
+            yield sse_event('status', {'stage': 'analyzing'})
+            
+            code_generator = get_library('ai_code_generator')
+            flight_key = normalize_prompt(prompt)
+            
+            concept, template = ai_flights.do(('template', flight_key), build_ai_template, prompt)
+            yield sse_event('template', code_generator.generate_game_preview(template))
+            
+            chunks = []
+            # Keyed on the template itself: a joiner that got its template from another
+            # flight must not share code generated from a different one
+            code_stream = ai_flights.stream(('code', template), lambda: code_generator.stream_complete_game(template))
+            for chunk in code_stream:
+                chunks.append(chunk)
+                yield sse_event('chunk', {'html': chunk})
+            
+            html, validation, used_fallback = code_generator.finalize_streamed_game(''.join(chunks), template)
+            game_id = str(uuid.uuid4())
+            generated_games[game_id] = ai_game_record(game_id, prompt, template, html, ['Streamed generation'])
+            
+            stats['total_games_generated'] += 1
+            stats['free_ai_games'] += 1
+            
+            yield sse_event('done', {
+                'game_id': game_id,
+                'play_url': f'/play-game/{game_id}',
+                'validation': validation,
+                'fallback': used_fallback
+            })
+            
+        except Exception as e:
+            yield sse_event('error', {'message': f'Generation failed: {str(e)}'})
+    
+    # No proxy buffering, or the browser sees nothing until the end
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/generate-game', methods=['POST'])
 def generate_game():
     try:
@@ -2435,8 +2681,13 @@ def generate_game():
         if not prompt:
             return jsonify({'success': False, 'message': 'Prompt is required'}), 400
         
+        try:
+            seed = parse_seed(data)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
         # Generate game
-        game = generate_game_from_prompt(prompt, mode)
+        game = generate_game_from_prompt(prompt, mode, seed)
         generated_games[game['id']] = game
         
         # Update stats
@@ -2465,10 +2716,31 @@ def play_game(game_id):
         if game_id not in generated_games:
             return "Game not found", 404
         
-        game = generated_games[game_id]
+        # Decided before reading the page: once this says final, no upgrade can land any more
+        cacheable = not upgrade_pending(game_id)
+        page = generated_games.page(game_id)
         stats['games_opened'] += 1
         
-        return game['html']
+        if page is None:
+            response = Response(static_assets.rewrite_links(generated_games[game_id]['html']), mimetype='text/html')
+            response.add_etag()
+        else:
+            encoding, body = page.negotiate(request.headers.get('Accept-Encoding', ''))
+            response = Response(body, mimetype='text/html')
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+            response.vary.add('Accept-Encoding')
+            response.set_etag(page.etag(encoding))
+        
+        if cacheable:
+            response.cache_control.public = True
+            response.cache_control.max_age = GAME_PAGE_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        
+        # 304 without a body when If-None-Match already names this representation
+        return response.make_conditional(request)
         
     except Exception as e:
         return f"Error loading game: {str(e)}", 500
@@ -2485,10 +2757,10 @@ def download_game(game_id):
         temp_dir = tempfile.mkdtemp()
         
         try:
-            # Write game HTML file
+            # Write game HTML file (standalone: shared assets inlined again)
             game_file_path = os.path.join(temp_dir, 'index.html')
             with open(game_file_path, 'w', encoding='utf-8') as f:
-                f.write(game['html'])
+                f.write(shared_assets.inline(game['html']))
             
             # Create README file
             readme_content = f"""# {game['title']}
@@ -2546,15 +2818,63 @@ Generated by MYTHIQ.AI Ultimate Game Maker
     except Exception as e:
         return jsonify({'error': f'Download failed: {str(e)}'}), 500
 
+@app.route('/assets/<path:filename>')
+def serve_asset(filename):
+    """Fingerprinted template files and shared snippets; a URL's content never changes"""
+    asset = static_assets.lookup(filename)
+    if asset is None:
+        return "Asset not found", 404
+    
+    response = send_file(asset.path, mimetype=asset.mimetype, etag=asset.digest,
+                         max_age=ASSET_MAX_AGE, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/assets/manifest.json')
+def asset_manifest():
+    # Changes whenever an asset does, so always revalidated
+    response = jsonify(static_assets.manifest())
+    response.cache_control.no_cache = True
+    return response
+
+@app.context_processor
+def inject_asset_urls():
+    """asset_url('name') in templates resolves to the fingerprinted URL"""
+    return {'asset_url': static_assets.url, 'asset_manifest': static_assets.manifest()}
+
+@app.route('/llm-metrics')
+def llm_metrics():
+    response_cache = get_response_cache()
+    return jsonify({
+        'success': True,
+        'breakers': get_breaker_metrics(),
+        'single_flight': ai_flights.get_stats(),
+        'prompt_tokens': prompt_builder.get_stats(),
+        'hedging': {'slo_seconds': AI_GENERATION_SLO, **ai_hedge.get_stats()},
+        'rate_limits': get_rate_limit_metrics(),
+        'response_cache': response_cache.get_stats() if response_cache is not None else None
+    })
+
 @app.route('/generation-stats')
 def generation_stats():
     return jsonify({
         'success': True,
         'stats': stats,
         'total_games_stored': len(generated_games),
+        'storage': generated_games.get_stats(),
         'available_games': list(generated_games.keys())
     })
 
 if __name__ == '__main__':
+    if '--profile-startup' in sys.argv:
+        from lazy_loader import profile_startup, format_startup_report
+        print(format_startup_report(profile_startup()))
+        sys.exit(0)
+    
+    # Template libraries load on first use unless eager loading is requested
+    if os.environ.get('TEMPLATE_LOADING', 'lazy') == 'eager':
+        preload_libraries()
+    
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=True)
@@ -0,0 +1,57 @@
+"""
+Async LLM Client - asyncio Front End for the Pooled requests Session
+Lets one event loop keep many LLM calls in flight; each call runs
+llm_client's blocking path (breaker, rate limiter, cache) on a bounded
+worker pool over a keep-alive session sized like llm_client's pool
+"""
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
+
+import requests
+
+from llm_client import (GROQ_CHAT_URL, GROQ_MODEL, POOL_BLOCK, POOL_HOSTS, POOL_MAXSIZE,
+                        chat_completion, create_http_session, post_json)
+
+class AsyncLLMClient:
+    """
+    Awaitable wrappers around llm_client.post_json/chat_completion. Calls in
+    flight are bounded by max_connections_per_host, the same as the session's
+    per-host pool, so a worker never waits on a connection.
+    """
+
+    def __init__(self, max_connections_per_host: int = POOL_MAXSIZE):
+        self.max_connections_per_host = max_connections_per_host
+        self.session = create_http_session(POOL_HOSTS, max_connections_per_host, POOL_BLOCK)
+        self._executor = ThreadPoolExecutor(max_workers=max_connections_per_host,
+                                            thread_name_prefix='async-llm')
+
+    async def __aenter__(self) -> 'AsyncLLMClient':
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _run(self, fn, *args, **kwargs):
+        # Context is copied so per-task settings (llm_priority) reach the rate limiter
+        call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    async def post_json(self, url: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None,
+                        timeout: float = 30) -> requests.Response:
+        """llm_client.post_json on this client's session; a cancelled call still completes its accounting"""
+        return await self._run(post_json, url, payload, headers, timeout, session=self.session)
+
+    async def chat_completion(self, api_key: str, messages: List[Dict], temperature: float = 0.3,
+                              max_tokens: int = 1000, timeout: float = 30, url: str = GROQ_CHAT_URL,
+                              model: str = GROQ_MODEL, use_cache: bool = True) -> str:
+        """OpenAI-compatible chat completion; returns the reply text"""
+        return await self._run(chat_completion, api_key, messages, temperature, max_tokens, timeout,
+                               url, model, use_cache, session=self.session)
+
+    async def close(self):
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        self.session.close()
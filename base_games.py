@@ -1056,7 +1056,8 @@ def get_customizable_elements(game_key):
     game = BASE_GAMES.get(game_key)
     return game['customizable_elements'] if game else []
 
-print("🎮 Base Games Library Loaded:")
-for key, game in BASE_GAMES.items():
-    print(f"  {game['name']} ({game['genre']}) - {len(game['customizable_elements'])} customizable elements")
-print("✅ All games are complete, playable, and ready for AI customization!")
+if __name__ == "__main__":
+    print("🎮 Base Games Library Loaded:")
+    for key, game in BASE_GAMES.items():
+        print(f"  {game['name']} ({game['genre']}) - {len(game['customizable_elements'])} customizable elements")
+    print("✅ All games are complete, playable, and ready for AI customization!")
@@ -400,11 +400,12 @@ CUSTOMIZATION_EXAMPLES = {
     }
 }
 
-print("🎮 Base Games Preview:")
-print("1. Forest Runner - Complete platformer with movement, jumping, coins")
-print("2. Crystal Matcher - Full match-3 puzzle with scoring")
-print("3. Village Quest - Mini-RPG with NPCs and exploration")
-print("4. Speed Circuit - Racing game (similar structure)")
-print("5. Space Defense - Shooter game (similar structure)")
-print("\n🤖 AI will intelligently customize these games based on user prompts!")
-print("✅ All games are fully playable and Railway-ready!")
+if __name__ == "__main__":
+    print("🎮 Base Games Preview:")
+    print("1. Forest Runner - Complete platformer with movement, jumping, coins")
+    print("2. Crystal Matcher - Full match-3 puzzle with scoring")
+    print("3. Village Quest - Mini-RPG with NPCs and exploration")
+    print("4. Speed Circuit - Racing game (similar structure)")
+    print("5. Space Defense - Shooter game (similar structure)")
+    print("\n🤖 AI will intelligently customize these games based on user prompts!")
+    print("✅ All games are fully playable and Railway-ready!")
@@ -0,0 +1,140 @@
+"""
+Circuit Breaker - Per-Backend Failure Isolation for the FREE AI APIs
+Stops calling a backend that keeps failing so callers drop straight to their
+local fallbacks, and sizes each call's timeout from the backend's recent latency
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('LLM_BREAKER_FAILURES', 5))     # consecutive failures to open
+BREAKER_RESET_TIMEOUT = float(os.environ.get('LLM_BREAKER_RESET', 30))         # seconds open before a trial call
+ADAPTIVE_TIMEOUT_MULTIPLIER = float(os.environ.get('LLM_TIMEOUT_MULTIPLIER', 3.0))  # × recent p95 latency
+ADAPTIVE_TIMEOUT_MIN = float(os.environ.get('LLM_TIMEOUT_MIN', 5.0))           # seconds
+ADAPTIVE_TIMEOUT_SAMPLES = 10   # successes needed before the timeout adapts
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose breaker is open"""
+
+class CircuitBreaker:
+    """
+    Closed → open after failure_threshold consecutive failures; open → half-open
+    after reset_timeout, letting one trial call through; its outcome closes or
+    re-opens the circuit. Latencies are tracked per profile (e.g. max_tokens),
+    since a 4000-token completion legitimately takes longer than a 500-token one.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT, window: int = 50):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.window = window
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._latencies = {}   # profile -> deque of recent successful latencies (seconds)
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'successes': 0, 'failures': 0, 'rejected': 0, 'timeouts': 0, 'opened': 0}
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (reserves the half-open trial slot)"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    self.stats['rejected'] += 1
+                    return False
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+
+            if self.state == HALF_OPEN:
+                if self._trial_in_flight:
+                    self.stats['rejected'] += 1
+                    return False
+                self._trial_in_flight = True
+
+            self.stats['calls'] += 1
+            return True
+
+    def check(self):
+        """allow() that raises CircuitOpenError"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open; using fallback")
+
+    def release(self):
+        """Give back a slot whose call ended with no outcome (no quota, cancelled), freeing the half-open trial"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def timeout(self, requested: float, profile: Any = None) -> float:
+        """Adaptive timeout: multiplier × recent p95 latency, within [ADAPTIVE_TIMEOUT_MIN, requested]"""
+        with self._lock:
+            samples = self._latencies.get(profile)
+            if not samples or len(samples) < ADAPTIVE_TIMEOUT_SAMPLES:
+                return requested
+            ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return max(ADAPTIVE_TIMEOUT_MIN, min(requested, p95 * ADAPTIVE_TIMEOUT_MULTIPLIER))
+
+    def record_success(self, latency: float, profile: Any = None):
+        with self._lock:
+            self.stats['successes'] += 1
+            self.consecutive_failures = 0
+            self.state = CLOSED
+            self._trial_in_flight = False
+            self._latencies.setdefault(profile, deque(maxlen=self.window)).append(latency)
+
+    def record_failure(self, timed_out: bool = False):
+        with self._lock:
+            self.stats['failures'] += 1
+            if timed_out:
+                self.stats['timeouts'] += 1
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.stats['opened'] += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = {str(profile): round(sum(samples) / len(samples) * 1000, 2)
+                         for profile, samples in self._latencies.items() if samples}
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)) if self.state == OPEN else 0.0
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'retry_in_seconds': round(retry_in, 2),
+                'mean_latency_ms': latencies,
+                **self.stats
+            }
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(backend: str) -> CircuitBreaker:
+    """Process-wide breaker for a backend (keyed by host)"""
+    breaker = _breakers.get(backend)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(backend, CircuitBreaker(backend))
+    return breaker
+
+def get_breaker_metrics() -> Dict[str, Any]:
+    return {name: breaker.get_metrics() for name, breaker in list(_breakers.items())}
+
+def reset_breakers(backend: Optional[str] = None):
+    """Forget breaker state (all backends, or one)"""
+    with _breakers_lock:
+        if backend is None:
+            _breakers.clear()
+        else:
+            _breakers.pop(backend, None)
@@ -621,8 +621,9 @@ class CustomizationEngine:
             'difficulty_levels': list(self.difficulty_settings.keys())
         }
 
-print("🎨 Customization Engine Loaded:")
-print(f"  {len(CustomizationEngine().color_schemes)} theme color schemes")
-print(f"  {len(CustomizationEngine().character_styles)} character styles")
-print(f"  {len(CustomizationEngine().difficulty_settings)} difficulty levels")
-print("✅ Ready to customize base games with AI intelligence!")
+if __name__ == "__main__":
+    print("🎨 Customization Engine Loaded:")
+    print(f"  {len(CustomizationEngine().color_schemes)} theme color schemes")
+    print(f"  {len(CustomizationEngine().character_styles)} character styles")
+    print(f"  {len(CustomizationEngine().difficulty_settings)} difficulty levels")
+    print("✅ Ready to customize base games with AI intelligence!")
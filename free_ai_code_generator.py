@@ -3,24 +3,49 @@ Free AI Code Generator - Converts AI-generated templates into complete, playable
 Uses FREE APIs (Groq, Hugging Face) to generate professional HTML/CSS/JavaScript code
 """
 
-import os
 import json
 import re
-import requests
-from typing import Dict, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Iterator
 from free_ai_template_engine import GameTemplate, GameConcept
+from llm_backends import get_llm_backend
+from async_llm_client import AsyncLLMClient
+from prompt_builder import prompt_builder
+from html_validator import quick_check, validate_game_html
+
+# Static instructions, sent as fixed system messages; the user message carries only the per-call payload
+GAME_CODE_INSTRUCTIONS = """
+You are a senior game developer who creates complete, professional HTML games with modern code.
+Generate a complete, playable HTML game file from the game spec the user sends as JSON.
+Requirements:
+- Complete HTML file with embedded CSS and JavaScript
+- Professional 8-9/10 quality
+- Mobile responsive with touch controls
+- Smooth 60fps animations
+- Modern CSS with gradients and effects
+- Complete game mechanics (movement, collision, scoring)
+- Start/pause/reset functionality
+Include semantic HTML structure, professional CSS with animations, complete JavaScript game logic,
+mobile touch support and responsive design. Make it engaging, smooth, and professional quality.
+"""
+
+OPTIMIZATION_INSTRUCTIONS = """
+You are a senior developer who optimizes web games for professional quality and performance.
+Optimize the HTML game code the user sends (it may be truncated). Improve:
+- Complete any missing functionality
+- Enhance visual quality to 8-9/10 level
+- Optimize for 60fps performance
+- Ensure mobile responsiveness
+- Add smooth animations
+- Fix any bugs or issues
+Return the complete, optimized HTML game file.
+"""
 
 class FreeAICodeGenerator:
     """AI-powered code generation system using FREE APIs"""
     
     def __init__(self):
-        # Groq API (FREE - you already have this!)
-        self.groq_api_key = os.environ.get('GROQ_API_KEY')
-        self.groq_base_url = "https://api.groq.com/openai/v1/chat/completions"
-        
-        # Hugging Face API (FREE)
-        self.hf_api_key = os.environ.get('HUGGINGFACE_API_KEY', '')
-        self.hf_base_url = "https://api-inference.huggingface.co/models"
+        # Groq + Hugging Face (FREE), or the offline stub with LLM_BACKEND=stub
+        self.backend = get_llm_backend()
         
         # Code quality standards
         self.quality_standards = {
@@ -49,27 +74,23 @@ class FreeAICodeGenerator:
     def _call_groq_api(self, messages: list, temperature: float = 0.3, max_tokens: int = 2000) -> str:
         """Call Groq API (FREE) for AI responses"""
         
-        if not self.groq_api_key:
-            raise Exception("GROQ_API_KEY not found in environment variables")
+        self.backend.require()
         
-        headers = {
-            "Authorization": f"Bearer {self.groq_api_key}",
-            "Content-Type": "application/json"
-        }
+        try:
+            return self.backend.chat(messages, temperature, max_tokens, timeout=60)
+            
+        except Exception as e:
+            print(f"Groq API error: {e}")
+            raise Exception(f"Groq API call failed: {str(e)}")
+    
+    async def _call_groq_api_async(self, client: AsyncLLMClient, messages: list,
+                                   temperature: float = 0.3, max_tokens: int = 2000) -> str:
+        """Call Groq API (FREE) through an asyncio client"""
         
-        data = {
-            "model": "llama3-8b-8192",  # Free Groq model
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens
-        }
+        self.backend.require()
         
         try:
-            response = requests.post(self.groq_base_url, headers=headers, json=data, timeout=60)
-            response.raise_for_status()
-            
-            result = response.json()
-            return result['choices'][0]['message']['content'].strip()
+            return await self.backend.chat_async(client, messages, temperature, max_tokens, timeout=60)
             
         except Exception as e:
             print(f"Groq API error: {e}")
@@ -91,92 +112,104 @@ class FreeAICodeGenerator:
             print(f"Game generation error: {e}")
             return self._fallback_complete_game(template)
     
-    def _generate_complete_game_code(self, template: GameTemplate) -> str:
-        """Generate complete HTML game using FREE AI in one call"""
+    async def generate_complete_game_async(self, template: GameTemplate, client: AsyncLLMClient) -> str:
+        """generate_complete_game on an asyncio LLM client"""
         
-        game_prompt = f"""
-        Generate a complete HTML game file based on this template:
-        
-        GAME CONCEPT:
-        - Title: {template.game_structure.get('title', 'Game')}
-        - Genre: {template.concept.genre}
-        - Theme: {template.concept.theme}
-        - Mechanics: {', '.join(template.concept.mechanics)}
-        
-        VISUAL DESIGN:
-        - Colors: {template.visual_design.get('color_palette', [])}
-        - Background: {template.visual_design.get('background_style', '')}
-        - Player: {template.visual_design.get('player_design', '')}
-        - Enemies: {template.visual_design.get('enemy_design', '')}
-        
-        GAMEPLAY:
-        - Movement: {template.gameplay_mechanics.get('movement', '')}
-        - Interaction: {template.gameplay_mechanics.get('interaction', '')}
-        - Win Condition: {template.game_structure.get('win_condition', '')}
-        - Scoring: {template.game_structure.get('scoring_system', '')}
-        
-        REQUIREMENTS:
-        - Complete HTML file with embedded CSS and JavaScript
-        - Professional 8-9/10 quality
-        - Mobile responsive with touch controls
-        - Smooth 60fps animations
-        - Modern CSS with gradients and effects
-        - Complete game mechanics (movement, collision, scoring)
-        - Start/pause/reset functionality
-        - Mobile-optimized touch controls
-        
-        Generate a complete, playable HTML game file. Include:
-        1. Semantic HTML structure
-        2. Professional CSS with animations
-        3. Complete JavaScript game logic
-        4. Mobile touch support
-        5. Responsive design
-        
-        Make it engaging, smooth, and professional quality.
+        try:
+            complete_game = await self._generate_complete_game_code_async(template, client)
+            return await self._optimize_code_quality_async(complete_game, template, client)
+            
+        except Exception as e:
+            print(f"Game generation error: {e}")
+            return self._fallback_complete_game(template)
+    
+    def stream_complete_game(self, template: GameTemplate) -> Iterator[str]:
+        """
+        Yield the game's HTML as the FREE AI writes it. The optimization pass
+        is skipped; run finalize_streamed_game on the joined chunks instead.
         """
         
+        streamed = False
         try:
-            messages = [
-                {"role": "system", "content": "You are a senior game developer who creates complete, professional HTML games. Generate high-quality, playable games with modern code."},
-                {"role": "user", "content": game_prompt}
-            ]
+            self.backend.require()
+            messages, temperature, max_tokens = self._game_code_request(template)
+            for chunk in self.backend.stream_chat(messages, temperature, max_tokens, timeout=60):
+                streamed = True
+                yield chunk
             
-            return self._call_groq_api(messages, temperature=0.5, max_tokens=4000)
+        except Exception as e:
+            print(f"Streaming game generation error: {e}")
+            if not streamed:
+                yield self._fallback_complete_game(template)
+    
+    def finalize_streamed_game(self, game_code: str, template: GameTemplate) -> Tuple[str, Dict[str, Any], bool]:
+        """Validate a streamed game; (html, validation, used_fallback) with the fallback game if it's unusable"""
+        
+        game_code = game_code.strip()
+        validation = self.validate_generated_code(game_code)
+        if validation['is_valid_html']:
+            return game_code, validation, False
+        
+        fallback = self._fallback_complete_game(template)
+        return fallback, self.validate_generated_code(fallback), True
+    
+    def _game_code_request(self, template: GameTemplate) -> Tuple[List[Dict], float, int]:
+        """Messages, temperature and max_tokens for complete game generation"""
+        
+        game_spec = {
+            'title': template.game_structure.get('title', 'Game'),
+            'genre': template.concept.genre,
+            'theme': template.concept.theme,
+            'mechanics': template.concept.mechanics,
+            'colors': template.visual_design.get('color_palette', []),
+            'background': template.visual_design.get('background_style', ''),
+            'player': template.visual_design.get('player_design', ''),
+            'enemies': template.visual_design.get('enemy_design', ''),
+            'movement': template.gameplay_mechanics.get('movement', ''),
+            'interaction': template.gameplay_mechanics.get('interaction', ''),
+            'win_condition': template.game_structure.get('win_condition', ''),
+            'scoring': template.game_structure.get('scoring_system', '')
+        }
+        messages = prompt_builder.build('game_code', GAME_CODE_INSTRUCTIONS, "Game: ", game_spec)
+        return messages, 0.5, 4000
+    
+    def _generate_complete_game_code(self, template: GameTemplate) -> str:
+        """Generate complete HTML game using FREE AI in one call"""
+        
+        try:
+            return self._call_groq_api(*self._game_code_request(template))
+            
+        except Exception as e:
+            print(f"Complete game generation error: {e}")
+            return self._fallback_complete_game(template)
+    
+    async def _generate_complete_game_code_async(self, template: GameTemplate, client: AsyncLLMClient) -> str:
+        """_generate_complete_game_code on an asyncio LLM client"""
+        
+        try:
+            return await self._call_groq_api_async(client, *self._game_code_request(template))
             
         except Exception as e:
             print(f"Complete game generation error: {e}")
             return self._fallback_complete_game(template)
     
+    def _needs_optimization(self, game_code: str) -> bool:
+        """Only optimize if the code looks incomplete or low quality"""
+        return len(game_code) < 2000 or not self._is_complete_html(game_code)
+    
+    def _optimization_request(self, game_code: str) -> Tuple[List[Dict], float, int]:
+        """Messages, temperature and max_tokens for code optimization"""
+        
+        # The excerpt is the part the budget trims
+        messages = prompt_builder.build('optimization', OPTIMIZATION_INSTRUCTIONS, f"Current code:\n{game_code}")
+        return messages, 0.2, 4000
+    
     def _optimize_code_quality(self, game_code: str, template: GameTemplate) -> str:
         """Use FREE AI to optimize code quality and performance"""
         
-        # Only optimize if the code looks incomplete or low quality
-        if len(game_code) < 2000 or not self._is_complete_html(game_code):
-            
-            optimization_prompt = f"""
-            Optimize this HTML game code for professional quality:
-            
-            Current Code:
-            {game_code[:1500]}...
-            
-            Improve:
-            - Complete any missing functionality
-            - Enhance visual quality to 8-9/10 level
-            - Optimize for 60fps performance
-            - Ensure mobile responsiveness
-            - Add smooth animations
-            - Fix any bugs or issues
-            
-            Return the complete, optimized HTML game file.
-            """
-            
+        if self._needs_optimization(game_code):
             try:
-                messages = [
-                    {"role": "system", "content": "You are a senior developer who optimizes web games for professional quality and performance."},
-                    {"role": "user", "content": optimization_prompt}
-                ]
-                
-                optimized_code = self._call_groq_api(messages, temperature=0.2, max_tokens=4000)
+                optimized_code = self._call_groq_api(*self._optimization_request(game_code))
                 
                 # Ensure we have a complete HTML document
                 if self._is_complete_html(optimized_code) and len(optimized_code) > len(game_code):
@@ -187,10 +220,25 @@ class FreeAICodeGenerator:
         
         return game_code
     
+    async def _optimize_code_quality_async(self, game_code: str, template: GameTemplate,
+                                           client: AsyncLLMClient) -> str:
+        """_optimize_code_quality on an asyncio LLM client"""
+        
+        if self._needs_optimization(game_code):
+            try:
+                optimized_code = await self._call_groq_api_async(client, *self._optimization_request(game_code))
+                
+                if self._is_complete_html(optimized_code) and len(optimized_code) > len(game_code):
+                    return optimized_code
+                
+            except Exception as e:
+                print(f"Code optimization error: {e}")
+        
+        return game_code
+    
     def _is_complete_html(self, code: str) -> bool:
         """Check if code is a complete HTML document"""
-        required_elements = ['<!DOCTYPE html>', '<html', '<head>', '<body>', '</html>']
-        return all(element in code for element in required_elements)
+        return quick_check(code)['is_complete_document']
     
     def _fallback_complete_game(self, template: GameTemplate) -> str:
         """Generate fallback complete game when AI fails"""
@@ -861,55 +909,6 @@ class FreeAICodeGenerator:
         }
     
     def validate_generated_code(self, game_code: str) -> Dict[str, Any]:
-        """Validate the generated game code"""
-        validation_results = {
-            'is_valid_html': False,
-            'has_css': False,
-            'has_javascript': False,
-            'is_complete': False,
-            'estimated_quality': 0,
-            'issues': [],
-            'free_generation': True
-        }
-        
-        # Check HTML structure
-        if '<!DOCTYPE html>' in game_code and '<html' in game_code and '</html>' in game_code:
-            validation_results['is_valid_html'] = True
-        else:
-            validation_results['issues'].append('Invalid HTML structure')
-        
-        # Check CSS presence
-        if '<style>' in game_code or 'style=' in game_code:
-            validation_results['has_css'] = True
-        else:
-            validation_results['issues'].append('Missing CSS styling')
-        
-        # Check JavaScript presence
-        if '<script>' in game_code or 'onclick=' in game_code:
-            validation_results['has_javascript'] = True
-        else:
-            validation_results['issues'].append('Missing JavaScript logic')
-        
-        # Check completeness
-        required_elements = ['game-container', 'player', 'gameLoop', 'startGame']
-        has_all_elements = any(element in game_code for element in required_elements)
-        validation_results['is_complete'] = has_all_elements
-        
-        if not has_all_elements:
-            validation_results['issues'].append('Missing required game elements')
-        
-        # Estimate quality
-        quality_score = 0
-        if validation_results['is_valid_html']:
-            quality_score += 3
-        if validation_results['has_css']:
-            quality_score += 3
-        if validation_results['has_javascript']:
-            quality_score += 3
-        if validation_results['is_complete']:
-            quality_score += 1
-        
-        validation_results['estimated_quality'] = quality_score
-        
-        return validation_results
+        """Validate the generated game code (structure, CSS/JS and game hooks in one pass)"""
+        return validate_game_html(game_code)
 
@@ -3,18 +3,24 @@ Free AI Template Engine - Revolutionary AI-Powered Game Template Generator
 Uses FREE APIs (Groq, Hugging Face) to analyze prompts and generate unique game templates
 """
 
-import os
-import json
 import re
-import requests
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, replace
+from frozen_structures import FrozenDict, freeze
+from llm_backends import get_llm_backend
+from json_extractor import JSONObjectExtractor, extract_json_object, extract_json_objects
+from async_llm_client import AsyncLLMClient
+from prompt_similarity import PromptSimilarityIndex
+from prompt_builder import prompt_builder
 
-@dataclass
+@dataclass(frozen=True)
 class GameConcept:
-    """Structured representation of analyzed game concept"""
+    """Structured representation of analyzed game concept (immutable, hashable)"""
+    __slots__ = ('genre', 'mechanics', 'theme', 'visual_style', 'complexity',
+                 'objective', 'target_audience', 'estimated_playtime')
+    
     genre: str
-    mechanics: List[str]
+    mechanics: Tuple[str, ...]
     theme: str
     visual_style: str
     complexity: str
@@ -22,27 +28,120 @@ class GameConcept:
     target_audience: str
     estimated_playtime: str
 
-@dataclass
+@dataclass(frozen=True)
 class GameTemplate:
-    """Complete game template generated by AI"""
+    """Complete game template generated by AI (immutable, hashable; sections are FrozenDicts)"""
+    __slots__ = ('concept', 'game_structure', 'visual_design', 'gameplay_mechanics',
+                 'ui_elements', 'code_architecture')
+    
     concept: GameConcept
-    game_structure: Dict[str, Any]
-    visual_design: Dict[str, Any]
-    gameplay_mechanics: Dict[str, Any]
-    ui_elements: Dict[str, Any]
-    code_architecture: Dict[str, Any]
+    game_structure: FrozenDict
+    visual_design: FrozenDict
+    gameplay_mechanics: FrozenDict
+    ui_elements: FrozenDict
+    code_architecture: FrozenDict
+
+# Fallback tables, frozen once and shared by every fallback concept/template
+FALLBACK_COLOR_PALETTES = freeze({
+    'sci-fi': ['#00ffff', '#ff00ff', '#ffff00', '#00ff00'],
+    'fantasy': ['#8b4513', '#228b22', '#ffd700', '#9370db'],
+    'retro': ['#ff6b6b', '#4ecdc4', '#45b7d1', '#f9ca24'],
+    'modern': ['#3498db', '#e74c3c', '#2ecc71', '#f39c12']
+})
+
+FALLBACK_RULES = freeze([
+    'Use arrow keys or touch to move',
+    'Collect items to increase score',
+    'Avoid obstacles and enemies',
+    'Survive as long as possible'
+])
+
+FALLBACK_GAMEPLAY_MECHANICS = freeze({
+    'movement': 'Smooth directional movement with momentum',
+    'interaction': 'Collision-based with visual feedback',
+    'physics': 'Basic 2D movement with optional gravity',
+    'collision': 'Bounding box detection with overlap calculation',
+    'spawning': 'Random intervals with increasing frequency',
+    'progression': 'Gradual difficulty increase with level system'
+})
+
+FALLBACK_UI_ELEMENTS = freeze({
+    'hud': ['score', 'health', 'level', 'time'],
+    'controls': 'Arrow keys, WASD, or touch/swipe gestures',
+    'feedback': 'Score popups, screen shake, particle effects',
+    'menus': 'Start screen, pause menu, game over screen'
+})
+
+FALLBACK_CODE_ARCHITECTURE = freeze({
+    'html_structure': 'Game container with canvas, UI overlay, and control elements',
+    'css_classes': ['game-container', 'player', 'enemy', 'collectible', 'ui-element', 'particle'],
+    'js_functions': ['gameLoop', 'handleInput', 'checkCollisions', 'updateScore', 'spawnEnemies', 'updateUI'],
+    'game_loop': 'RequestAnimationFrame-based loop with delta time',
+    'event_handling': 'Keyboard, mouse, and touch event listeners with mobile support'
+})
+
+# Static instructions, sent as fixed system messages; the user message carries only the per-call payload
+ANALYSIS_INSTRUCTIONS = """
+You are a game design expert who analyzes game concepts and extracts structured information.
+Analyze the user's game description and respond with JSON with these fields:
+{"genre": "primary game genre (action/puzzle/strategy/adventure/simulation/racing/sports/casual)",
+"mechanics": ["list", "of", "core", "gameplay", "mechanics"],
+"theme": "visual/narrative theme (fantasy/sci-fi/modern/retro/abstract/nature/space/etc)",
+"visual_style": "visual aesthetic (minimalist/retro/modern/fantasy/sci-fi/cartoon/realistic/abstract)",
+"complexity": "game complexity (simple/medium/complex)",
+"objective": "main game objective in one sentence",
+"target_audience": "target player demographic (kids/teens/adults/all)",
+"estimated_playtime": "typical session length (1-5min/5-15min/15-30min/30min+)"}
+Focus on extracting the core game concept, not implementation details.
+If information is unclear, make reasonable assumptions based on context.
+Respond ONLY with valid JSON, no other text.
+"""
+
+TEMPLATE_INSTRUCTIONS = """
+You are a professional game designer who creates detailed, implementable game templates.
+Given a game concept as JSON, create a complete game template as JSON with these sections:
+{"game_structure": {"title": "engaging game title", "rules": ["rule1", "rule2", "rule3"],
+"win_condition": "how to win", "lose_condition": "how to lose", "scoring_system": "how scoring works",
+"difficulty_progression": "how difficulty increases"},
+"visual_design": {"color_palette": ["#color1", "#color2", "#color3", "#color4"],
+"background_style": "CSS background description", "player_design": "player character/object description",
+"enemy_design": "enemy/obstacle description", "ui_style": "UI element styling approach",
+"animation_style": "animation and effects approach"},
+"gameplay_mechanics": {"movement": "movement system description", "interaction": "how player interacts with game",
+"physics": "physics system if needed", "collision": "collision detection approach",
+"spawning": "how enemies/items spawn", "progression": "how game progresses"},
+"ui_elements": {"hud": ["score", "health", "level", "other"], "controls": "control scheme description",
+"feedback": "visual/audio feedback systems", "menus": "menu structure if needed"},
+"code_architecture": {"html_structure": "main HTML elements needed", "css_classes": ["class1", "class2", "class3"],
+"js_functions": ["function1", "function2", "function3"], "game_loop": "game loop structure description",
+"event_handling": "event handling approach"}}
+Make this template specific, detailed, and implementable. Focus on creating a unique, engaging game experience.
+Ensure all colors are valid hex codes. Make mechanics fun and intuitive.
+Respond ONLY with valid JSON, no other text.
+"""
+
+ENHANCEMENT_INSTRUCTIONS = """
+You are a senior game developer who optimizes game templates for professional quality and performance.
+The user sends an enhancement focus and a game template as JSON. Enhance it focusing on:
+- Professional visual quality (8-9/10 level)
+- Smooth, engaging gameplay mechanics
+- Modern, responsive design
+- Mobile optimization
+- Performance optimization
+Return the enhanced template in the same JSON format, but with improved details.
+Add specific CSS properties, animation timings, and implementation details.
+Respond ONLY with valid JSON, no other text.
+"""
 
 class FreeAITemplateEngine:
     """AI-powered game template generation engine using FREE APIs"""
     
     def __init__(self):
-        # Groq API (FREE - you already have this!)
-        self.groq_api_key = os.environ.get('GROQ_API_KEY')
-        self.groq_base_url = "https://api.groq.com/openai/v1/chat/completions"
+        # Groq + Hugging Face (FREE), or the offline stub with LLM_BACKEND=stub
+        self.backend = get_llm_backend()
         
-        # Hugging Face API (FREE)
-        self.hf_api_key = os.environ.get('HUGGINGFACE_API_KEY', '')
-        self.hf_base_url = "https://api-inference.huggingface.co/models"
+        # Near-duplicate prompts reuse an earlier AI analysis
+        self.concept_index = PromptSimilarityIndex()
         
         # Game genre classifications
         self.genres = {
@@ -71,27 +170,23 @@ class FreeAITemplateEngine:
     def _call_groq_api(self, messages: List[Dict], temperature: float = 0.3, max_tokens: int = 1000) -> str:
         """Call Groq API (FREE) for AI responses"""
         
-        if not self.groq_api_key:
-            raise Exception("GROQ_API_KEY not found in environment variables")
+        self.backend.require()
         
-        headers = {
-            "Authorization": f"Bearer {self.groq_api_key}",
-            "Content-Type": "application/json"
-        }
+        try:
+            return self.backend.chat(messages, temperature, max_tokens, timeout=30)
+            
+        except Exception as e:
+            print(f"Groq API error: {e}")
+            raise Exception(f"Groq API call failed: {str(e)}")
+    
+    async def _call_groq_api_async(self, client: AsyncLLMClient, messages: List[Dict],
+                                   temperature: float = 0.3, max_tokens: int = 1000) -> str:
+        """Call Groq API (FREE) through an asyncio client"""
         
-        data = {
-            "model": "llama3-8b-8192",  # Free Groq model
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens
-        }
+        self.backend.require()
         
         try:
-            response = requests.post(self.groq_base_url, headers=headers, json=data, timeout=30)
-            response.raise_for_status()
-            
-            result = response.json()
-            return result['choices'][0]['message']['content'].strip()
+            return await self.backend.chat_async(client, messages, temperature, max_tokens, timeout=30)
             
         except Exception as e:
             print(f"Groq API error: {e}")
@@ -100,223 +195,214 @@ class FreeAITemplateEngine:
     def _call_huggingface_api(self, model: str, prompt: str) -> str:
         """Call Hugging Face API (FREE) for AI responses"""
         
-        headers = {}
-        if self.hf_api_key:
-            headers["Authorization"] = f"Bearer {self.hf_api_key}"
-        
-        data = {"inputs": prompt}
-        
         try:
-            response = requests.post(f"{self.hf_base_url}/{model}", headers=headers, json=data, timeout=30)
-            
-            if response.status_code == 503:
-                # Model is loading, wait and retry
-                import time
-                time.sleep(10)
-                response = requests.post(f"{self.hf_base_url}/{model}", headers=headers, json=data, timeout=30)
-            
-            response.raise_for_status()
-            result = response.json()
-            
-            if isinstance(result, list) and len(result) > 0:
-                return result[0].get('generated_text', prompt)
-            
-            return str(result)
+            # A 503 (model still loading) counts against the HF breaker and falls
+            # through to Groq now rather than stalling this request on a retry
+            return self.backend.generate_text(model, prompt, timeout=30)
             
         except Exception as e:
             print(f"Hugging Face API error: {e}")
             # Fallback to Groq if HF fails
             return self._call_groq_api([{"role": "user", "content": prompt}])
     
+    def _analysis_request(self, prompt: str) -> Tuple[List[Dict], float, int]:
+        """Messages, temperature and max_tokens for prompt analysis"""
+        
+        messages = prompt_builder.build('analysis', ANALYSIS_INSTRUCTIONS, 'Game description: ', prompt)
+        return messages, 0.3, 500
+    
+    def _concept_from_response(self, analysis_text: str) -> GameConcept:
+        """Parse the analysis reply into a GameConcept"""
+        return self._concept_from_data(extract_json_object(analysis_text))
+    
+    def _concept_from_data(self, analysis_data: Dict[str, Any]) -> GameConcept:
+        # LLM JSON may put lists or objects anywhere; coerce so the concept stays hashable
+        def text(key: str, default: str) -> str:
+            value = analysis_data.get(key)
+            if value is None or value == '':
+                return default
+            if isinstance(value, (list, tuple)):
+                return ', '.join(str(item) for item in value) or default
+            return str(value)
+        
+        mechanics = analysis_data.get('mechanics') or ['movement', 'interaction']
+        return GameConcept(
+            genre=text('genre', 'action'),
+            mechanics=freeze(mechanics if isinstance(mechanics, (list, tuple)) else [str(mechanics)]),
+            theme=text('theme', 'modern'),
+            visual_style=text('visual_style', 'modern'),
+            complexity=text('complexity', 'medium'),
+            objective=text('objective', 'Complete the challenge'),
+            target_audience=text('target_audience', 'all'),
+            estimated_playtime=text('estimated_playtime', '5-15min')
+        )
+    
     def analyze_prompt(self, prompt: str) -> GameConcept:
         """Use FREE AI to analyze user prompt and extract game concept"""
         
-        analysis_prompt = f"""
-        Analyze this game description and extract key information:
-        "{prompt}"
-        
-        Provide a JSON response with these fields:
-        {{
-            "genre": "primary game genre (action/puzzle/strategy/adventure/simulation/racing/sports/casual)",
-            "mechanics": ["list", "of", "core", "gameplay", "mechanics"],
-            "theme": "visual/narrative theme (fantasy/sci-fi/modern/retro/abstract/nature/space/etc)",
-            "visual_style": "visual aesthetic (minimalist/retro/modern/fantasy/sci-fi/cartoon/realistic/abstract)",
-            "complexity": "game complexity (simple/medium/complex)",
-            "objective": "main game objective in one sentence",
-            "target_audience": "target player demographic (kids/teens/adults/all)",
-            "estimated_playtime": "typical session length (1-5min/5-15min/15-30min/30min+)"
-        }}
-        
-        Focus on extracting the core game concept, not implementation details.
-        If information is unclear, make reasonable assumptions based on context.
-        Respond ONLY with valid JSON, no other text.
-        """
+        cached = self.concept_index.lookup(prompt)
+        if cached is not None:
+            return cached[0]
         
         try:
-            messages = [
-                {"role": "system", "content": "You are a game design expert who analyzes game concepts and extracts structured information. Always respond with valid JSON only."},
-                {"role": "user", "content": analysis_prompt}
-            ]
-            
-            analysis_text = self._call_groq_api(messages, temperature=0.3, max_tokens=500)
-            
-            # Extract JSON from response
-            json_match = re.search(r'\{.*\}', analysis_text, re.DOTALL)
-            if json_match:
-                analysis_data = json.loads(json_match.group())
-            else:
-                # Try parsing the entire response
-                analysis_data = json.loads(analysis_text)
-            
-            return GameConcept(
-                genre=analysis_data.get('genre', 'action'),
-                mechanics=analysis_data.get('mechanics', ['movement', 'interaction']),
-                theme=analysis_data.get('theme', 'modern'),
-                visual_style=analysis_data.get('visual_style', 'modern'),
-                complexity=analysis_data.get('complexity', 'medium'),
-                objective=analysis_data.get('objective', 'Complete the challenge'),
-                target_audience=analysis_data.get('target_audience', 'all'),
-                estimated_playtime=analysis_data.get('estimated_playtime', '5-15min')
-            )
+            analysis_text = self._call_groq_api(*self._analysis_request(prompt))
+            concept = self._concept_from_response(analysis_text)
+            self.concept_index.add(prompt, concept)
+            return concept
             
         except Exception as e:
             print(f"AI analysis error: {e}")
             # Fallback to basic analysis
             return self._fallback_analysis(prompt)
     
-    def generate_template(self, concept: GameConcept) -> GameTemplate:
-        """Generate complete game template using FREE AI"""
+    async def analyze_prompt_async(self, prompt: str, client: AsyncLLMClient) -> GameConcept:
+        """analyze_prompt on an asyncio LLM client"""
+        
+        cached = self.concept_index.lookup(prompt)
+        if cached is not None:
+            return cached[0]
         
-        template_prompt = f"""
-        Create a complete game template for this concept:
-        
-        Genre: {concept.genre}
-        Mechanics: {', '.join(concept.mechanics)}
-        Theme: {concept.theme}
-        Visual Style: {concept.visual_style}
-        Complexity: {concept.complexity}
-        Objective: {concept.objective}
-        
-        Generate a comprehensive game template as JSON with these sections:
-        
-        {{
-            "game_structure": {{
-                "title": "engaging game title",
-                "rules": ["rule1", "rule2", "rule3"],
-                "win_condition": "how to win",
-                "lose_condition": "how to lose",
-                "scoring_system": "how scoring works",
-                "difficulty_progression": "how difficulty increases"
-            }},
-            "visual_design": {{
-                "color_palette": ["#color1", "#color2", "#color3", "#color4"],
-                "background_style": "CSS background description",
-                "player_design": "player character/object description",
-                "enemy_design": "enemy/obstacle description",
-                "ui_style": "UI element styling approach",
-                "animation_style": "animation and effects approach"
-            }},
-            "gameplay_mechanics": {{
-                "movement": "movement system description",
-                "interaction": "how player interacts with game",
-                "physics": "physics system if needed",
-                "collision": "collision detection approach",
-                "spawning": "how enemies/items spawn",
-                "progression": "how game progresses"
-            }},
-            "ui_elements": {{
-                "hud": ["score", "health", "level", "other"],
-                "controls": "control scheme description",
-                "feedback": "visual/audio feedback systems",
-                "menus": "menu structure if needed"
-            }},
-            "code_architecture": {{
-                "html_structure": "main HTML elements needed",
-                "css_classes": ["class1", "class2", "class3"],
-                "js_functions": ["function1", "function2", "function3"],
-                "game_loop": "game loop structure description",
-                "event_handling": "event handling approach"
-            }}
-        }}
-        
-        Make this template specific, detailed, and implementable. Focus on creating a unique, engaging game experience.
-        Ensure all colors are valid hex codes. Make mechanics fun and intuitive.
-        Respond ONLY with valid JSON, no other text.
+        try:
+            analysis_text = await self._call_groq_api_async(client, *self._analysis_request(prompt))
+            concept = self._concept_from_response(analysis_text)
+            self.concept_index.add(prompt, concept)
+            return concept
+            
+        except Exception as e:
+            print(f"AI analysis error: {e}")
+            return self._fallback_analysis(prompt)
+    
+    def analyze_prompt_streaming(self, prompt: str,
+                                 on_field: Optional[Callable[[str, Any], None]] = None) -> GameConcept:
+        """
+        analyze_prompt over a streamed reply; on_field(key, value) receives each
+        concept field as soon as it has arrived, before the reply is complete
         """
         
+        cached = self.concept_index.lookup(prompt)
+        if cached is not None:
+            return cached[0]
+        
         try:
-            messages = [
-                {"role": "system", "content": "You are a professional game designer who creates detailed, implementable game templates. Always respond with valid JSON only."},
-                {"role": "user", "content": template_prompt}
-            ]
+            self.backend.require()
+            messages, temperature, max_tokens = self._analysis_request(prompt)
+            extractor = JSONObjectExtractor(on_field=on_field)
+            analysis_data = None
+            for chunk in self.backend.stream_chat(messages, temperature, max_tokens, timeout=30):
+                objects = extractor.feed(chunk)
+                if objects:
+                    analysis_data = objects[0]
+                    break
             
-            template_text = self._call_groq_api(messages, temperature=0.7, max_tokens=2000)
+            if analysis_data is None:
+                raise ValueError("No JSON object found in response")
             
-            # Extract JSON from response
-            json_match = re.search(r'\{.*\}', template_text, re.DOTALL)
-            if json_match:
-                template_data = json.loads(json_match.group())
-            else:
-                template_data = json.loads(template_text)
+            concept = self._concept_from_data(analysis_data)
+            self.concept_index.add(prompt, concept)
+            return concept
             
-            return GameTemplate(
-                concept=concept,
-                game_structure=template_data.get('game_structure', {}),
-                visual_design=template_data.get('visual_design', {}),
-                gameplay_mechanics=template_data.get('gameplay_mechanics', {}),
-                ui_elements=template_data.get('ui_elements', {}),
-                code_architecture=template_data.get('code_architecture', {})
-            )
+        except Exception as e:
+            print(f"AI analysis error: {e}")
+            return self._fallback_analysis(prompt)
+    
+    def _template_request(self, concept: GameConcept) -> Tuple[List[Dict], float, int]:
+        """Messages, temperature and max_tokens for template generation"""
+        
+        concept_data = {
+            'genre': concept.genre,
+            'mechanics': concept.mechanics,
+            'theme': concept.theme,
+            'visual_style': concept.visual_style,
+            'complexity': concept.complexity,
+            'objective': concept.objective
+        }
+        messages = prompt_builder.build('template', TEMPLATE_INSTRUCTIONS, "Concept: ", concept_data)
+        return messages, 0.7, 2000
+    
+    def _template_from_response(self, concept: GameConcept, template_text: str) -> GameTemplate:
+        """Parse the template reply into a GameTemplate"""
+        
+        template_data = extract_json_object(template_text)
+        
+        return GameTemplate(
+            concept=concept,
+            game_structure=freeze(template_data.get('game_structure', {})),
+            visual_design=freeze(template_data.get('visual_design', {})),
+            gameplay_mechanics=freeze(template_data.get('gameplay_mechanics', {})),
+            ui_elements=freeze(template_data.get('ui_elements', {})),
+            code_architecture=freeze(template_data.get('code_architecture', {}))
+        )
+    
+    def generate_template(self, concept: GameConcept) -> GameTemplate:
+        """Generate complete game template using FREE AI"""
+        
+        try:
+            template_text = self._call_groq_api(*self._template_request(concept))
+            return self._template_from_response(concept, template_text)
             
         except Exception as e:
             print(f"Template generation error: {e}")
             # Fallback to basic template
             return self._fallback_template(concept)
     
-    def enhance_template(self, template: GameTemplate, enhancement_focus: str = "quality") -> GameTemplate:
-        """Use FREE AI to enhance and optimize the generated template"""
+    async def generate_template_async(self, concept: GameConcept, client: AsyncLLMClient) -> GameTemplate:
+        """generate_template on an asyncio LLM client"""
         
-        enhancement_prompt = f"""
-        Enhance this game template to improve {enhancement_focus}:
+        try:
+            template_text = await self._call_groq_api_async(client, *self._template_request(concept))
+            return self._template_from_response(concept, template_text)
+            
+        except Exception as e:
+            print(f"Template generation error: {e}")
+            return self._fallback_template(concept)
+    
+    def _enhancement_request(self, template: GameTemplate, enhancement_focus: str) -> Tuple[List[Dict], float, int]:
+        """Messages, temperature and max_tokens for template enhancement"""
         
-        Current Template:
-        {json.dumps({
+        template_data = {
             'game_structure': template.game_structure,
             'visual_design': template.visual_design,
             'gameplay_mechanics': template.gameplay_mechanics
-        }, indent=2)}
-        
-        Provide enhanced version focusing on:
-        - Professional visual quality (8-9/10 level)
-        - Smooth, engaging gameplay mechanics
-        - Modern, responsive design
-        - Mobile optimization
-        - Performance optimization
-        
-        Return the enhanced template in the same JSON format, but with improved details.
-        Add specific CSS properties, animation timings, and implementation details.
-        Respond ONLY with valid JSON, no other text.
-        """
+        }
+        messages = prompt_builder.build('enhancement', ENHANCEMENT_INSTRUCTIONS,
+                                        f"Focus: {enhancement_focus}\nTemplate: ", template_data)
+        return messages, 0.5, 1500
+    
+    def _enhanced_from_response(self, template: GameTemplate, enhanced_text: str) -> GameTemplate:
+        """Merge the enhancement reply into a copy of the template"""
         
-        try:
-            messages = [
-                {"role": "system", "content": "You are a senior game developer who optimizes game templates for professional quality and performance. Respond with JSON only."},
-                {"role": "user", "content": enhancement_prompt}
-            ]
-            
-            enhanced_text = self._call_groq_api(messages, temperature=0.5, max_tokens=1500)
+        enhanced_objects = extract_json_objects(enhanced_text)
+        if enhanced_objects:
+            enhanced_data = enhanced_objects[0]
             
-            # Extract JSON from response
-            json_match = re.search(r'\{.*\}', enhanced_text, re.DOTALL)
-            if json_match:
-                enhanced_data = json.loads(json_match.group())
-                
-                # Update template with enhanced data
-                template.game_structure.update(enhanced_data.get('game_structure', {}))
-                template.visual_design.update(enhanced_data.get('visual_design', {}))
-                template.gameplay_mechanics.update(enhanced_data.get('gameplay_mechanics', {}))
+            # Templates are immutable: return a copy with the enhanced sections merged in
+            template = replace(
+                template,
+                game_structure=freeze({**template.game_structure, **enhanced_data.get('game_structure', {})}),
+                visual_design=freeze({**template.visual_design, **enhanced_data.get('visual_design', {})}),
+                gameplay_mechanics=freeze({**template.gameplay_mechanics, **enhanced_data.get('gameplay_mechanics', {})})
+            )
+        
+        return template
+    
+    def enhance_template(self, template: GameTemplate, enhancement_focus: str = "quality") -> GameTemplate:
+        """Use FREE AI to enhance and optimize the generated template"""
+        
+        try:
+            enhanced_text = self._call_groq_api(*self._enhancement_request(template, enhancement_focus))
+            return self._enhanced_from_response(template, enhanced_text)
             
+        except Exception as e:
+            print(f"Template enhancement error: {e}")
             return template
+    
+    async def enhance_template_async(self, template: GameTemplate, client: AsyncLLMClient,
+                                     enhancement_focus: str = "quality") -> GameTemplate:
+        """enhance_template on an asyncio LLM client"""
+        
+        try:
+            enhanced_text = await self._call_groq_api_async(client, *self._enhancement_request(template, enhancement_focus))
+            return self._enhanced_from_response(template, enhanced_text)
             
         except Exception as e:
             print(f"Template enhancement error: {e}")
@@ -357,7 +443,7 @@ class FreeAITemplateEngine:
         
         return GameConcept(
             genre=genre,
-            mechanics=mechanics,
+            mechanics=tuple(mechanics),
             theme=theme,
             visual_style='modern',
             complexity='medium',
@@ -370,59 +456,29 @@ class FreeAITemplateEngine:
         """Fallback template when AI fails"""
         
         # Generate color palette based on theme
-        color_palettes = {
-            'sci-fi': ['#00ffff', '#ff00ff', '#ffff00', '#00ff00'],
-            'fantasy': ['#8b4513', '#228b22', '#ffd700', '#9370db'],
-            'retro': ['#ff6b6b', '#4ecdc4', '#45b7d1', '#f9ca24'],
-            'modern': ['#3498db', '#e74c3c', '#2ecc71', '#f39c12']
-        }
-        
-        colors = color_palettes.get(concept.theme, color_palettes['modern'])
+        colors = FALLBACK_COLOR_PALETTES.get(concept.theme, FALLBACK_COLOR_PALETTES['modern'])
         
         return GameTemplate(
             concept=concept,
-            game_structure={
+            game_structure=FrozenDict({
                 'title': f'{concept.theme.title()} {concept.genre.title()} Adventure',
-                'rules': [
-                    'Use arrow keys or touch to move',
-                    'Collect items to increase score',
-                    'Avoid obstacles and enemies',
-                    'Survive as long as possible'
-                ],
+                'rules': FALLBACK_RULES,
                 'win_condition': 'Achieve target score or complete all levels',
                 'lose_condition': 'Health reaches zero or time runs out',
                 'scoring_system': 'Points for collection, survival time, and special actions',
                 'difficulty_progression': 'Speed and enemy count increase over time'
-            },
-            visual_design={
+            }),
+            visual_design=FrozenDict({
                 'color_palette': colors,
                 'background_style': f'linear-gradient(135deg, {colors[0]} 0%, {colors[1]} 100%)',
                 'player_design': f'Rounded rectangle with gradient from {colors[2]} to {colors[3]}',
                 'enemy_design': f'Angular shapes with contrasting colors {colors[1]} and {colors[0]}',
                 'ui_style': 'Modern flat design with subtle shadows and {colors[2]} accents',
                 'animation_style': 'Smooth CSS transitions with easing functions'
-            },
-            gameplay_mechanics={
-                'movement': 'Smooth directional movement with momentum',
-                'interaction': 'Collision-based with visual feedback',
-                'physics': 'Basic 2D movement with optional gravity',
-                'collision': 'Bounding box detection with overlap calculation',
-                'spawning': 'Random intervals with increasing frequency',
-                'progression': 'Gradual difficulty increase with level system'
-            },
-            ui_elements={
-                'hud': ['score', 'health', 'level', 'time'],
-                'controls': 'Arrow keys, WASD, or touch/swipe gestures',
-                'feedback': 'Score popups, screen shake, particle effects',
-                'menus': 'Start screen, pause menu, game over screen'
-            },
-            code_architecture={
-                'html_structure': 'Game container with canvas, UI overlay, and control elements',
-                'css_classes': ['game-container', 'player', 'enemy', 'collectible', 'ui-element', 'particle'],
-                'js_functions': ['gameLoop', 'handleInput', 'checkCollisions', 'updateScore', 'spawnEnemies', 'updateUI'],
-                'game_loop': 'RequestAnimationFrame-based loop with delta time',
-                'event_handling': 'Keyboard, mouse, and touch event listeners with mobile support'
-            }
+            }),
+            gameplay_mechanics=FALLBACK_GAMEPLAY_MECHANICS,
+            ui_elements=FALLBACK_UI_ELEMENTS,
+            code_architecture=FALLBACK_CODE_ARCHITECTURE
         )
     
     def validate_template(self, template: GameTemplate) -> bool:
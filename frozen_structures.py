@@ -0,0 +1,44 @@
+"""
+Frozen Structures - Immutable, Hashable Containers
+Lets engines build their lookup tables once and share sub-structures by
+reference across every per-request object without defensive copying
+"""
+
+from typing import Any
+
+class FrozenDict(dict):
+    """
+    Read-only, hashable dict. Still a real dict, so json.dumps and
+    isinstance(..., dict) keep working; .copy() returns a mutable plain dict.
+    """
+    __slots__ = ('_hash',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._hash = None
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"'{type(self).__name__}' object is immutable")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(frozenset(self.items()))
+        return self._hash
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+def freeze(value: Any) -> Any:
+    """Recursively convert dicts/lists/sets into FrozenDict/tuple/frozenset"""
+    if isinstance(value, FrozenDict):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(item) for item in value)
+    return value
@@ -0,0 +1,185 @@
+"""
+Game Store - Storage for Generated Games
+Keeps either the full game (html mode) or only the recipe needed to rebuild
+it (recipe mode); recipes are re-rendered on demand through a small LRU cache.
+With a page compressor, each game's served bytes are also built once per game;
+in html mode the generated markup itself is then kept zlib-compressed, so readers
+(downloads) still get the original source rather than the served page
+"""
+
+import datetime
+import threading
+import zlib
+from collections import OrderedDict, namedtuple
+from typing import Callable, Dict, List, Any, Optional
+
+# Everything needed to deterministically rebuild a game
+GameRecipe = namedtuple('GameRecipe', ['prompt', 'mode', 'seed', 'engine_version', 'created_at'])
+# A game with its expensive parts (compressed page, packed source) already built
+PreparedGame = namedtuple('PreparedGame', ['entry', 'page', 'source'])
+
+SOURCE_COMPRESS_LEVEL = 6
+
+STORAGE_MODES = ('html', 'recipe')
+
+class GameStore:
+    """
+    Dict-like game storage keyed by game id
+    """
+
+    def __init__(self, renderer: Callable[[str, str, int], Dict[str, Any]], engine_version: str,
+                 mode: str = 'html', render_cache_size: int = 64,
+                 page_compressor: Optional[Callable[[str], Any]] = None):
+        if mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode '{mode}' (expected one of {', '.join(STORAGE_MODES)})")
+
+        self.renderer = renderer
+        self.engine_version = engine_version
+        self.mode = mode
+        self.render_cache_size = render_cache_size
+        self.page_compressor = page_compressor
+
+        self._games = {}
+        self._render_cache = OrderedDict()
+        # html mode: compressed page per game id; recipe mode: per recipe, alongside the render cache
+        self._pages = {}
+        self._page_cache = OrderedDict()
+        self._sources = {}   # html mode with pages: zlib-compressed original markup
+        self._lock = threading.Lock()
+        self.render_cache_hits = 0
+        self.render_cache_misses = 0
+
+    def prepare(self, game: Dict[str, Any]) -> PreparedGame:
+        """
+        Do the expensive part of storing a game (page compression) up front, so
+        callers holding their own locks only pay for put()
+        """
+        if self.mode == 'recipe' and 'prompt' in game and 'seed' in game:
+            created_at = datetime.datetime.fromisoformat(game['created_at'])
+            recipe = GameRecipe(game['prompt'], game['quality'], game['seed'],
+                                self.engine_version, int(created_at.timestamp()))
+            return PreparedGame(recipe, None, None)
+        if not self.page_compressor or 'html' not in game:
+            return PreparedGame(game, None, None)
+        # Compressed at store time so serving never compresses
+        return PreparedGame(
+            {key: value for key, value in game.items() if key != 'html'},
+            self.page_compressor(game['html']),
+            zlib.compress(game['html'].encode('utf-8'), SOURCE_COMPRESS_LEVEL)
+        )
+
+    def put(self, game_id: str, prepared: PreparedGame):
+        with self._lock:
+            self._games[game_id] = prepared.entry
+            if prepared.page is None:
+                self._pages.pop(game_id, None)
+                self._sources.pop(game_id, None)
+            else:
+                self._pages[game_id] = prepared.page
+                self._sources[game_id] = prepared.source
+
+    def __setitem__(self, game_id: str, game: Dict[str, Any]):
+        self.put(game_id, self.prepare(game))
+
+    def __getitem__(self, game_id: str) -> Dict[str, Any]:
+        with self._lock:
+            entry = self._games[game_id]
+            source = self._sources.get(game_id)
+        if isinstance(entry, GameRecipe):
+            return self._render(game_id, entry)
+        if source is not None:
+            return dict(entry, html=zlib.decompress(source).decode('utf-8'))
+        return entry
+
+    def __contains__(self, game_id) -> bool:
+        return game_id in self._games
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def keys(self) -> List[str]:
+        return list(self._games.keys())
+
+    def get(self, game_id: str, default=None):
+        return self[game_id] if game_id in self._games else default
+
+    def page(self, game_id: str):
+        """The precompressed page for a game (None without a page compressor); KeyError if unknown"""
+        entry = self._games[game_id]
+        if self.page_compressor is None:
+            return None
+        if not isinstance(entry, GameRecipe):
+            page = self._pages.get(game_id)
+            return page if page is not None else self.page_compressor(entry['html'])
+
+        key = entry[:4]
+        with self._lock:
+            page = self._page_cache.get(key)
+            if page is not None:
+                self._page_cache.move_to_end(key)
+                return page
+
+        page = self.page_compressor(self._render(game_id, entry)['html'])
+        with self._lock:
+            self._page_cache[key] = page
+            if len(self._page_cache) > self.render_cache_size:
+                self._page_cache.popitem(last=False)
+        return page
+
+    def _render(self, game_id: str, recipe: GameRecipe) -> Dict[str, Any]:
+        """Rebuild a game from its recipe, reusing recent renders"""
+        key = recipe[:4]
+
+        with self._lock:
+            rendered = self._render_cache.get(key)
+            if rendered is not None:
+                self._render_cache.move_to_end(key)
+                self.render_cache_hits += 1
+
+        if rendered is None:
+            if recipe.engine_version != self.engine_version:
+                print(f"Replaying game {game_id} built by engine {recipe.engine_version} with {self.engine_version}")
+            rendered = self.renderer(recipe.prompt, recipe.mode, recipe.seed)
+            with self._lock:
+                self.render_cache_misses += 1
+                self._render_cache[key] = rendered
+                if len(self._render_cache) > self.render_cache_size:
+                    self._render_cache.popitem(last=False)
+
+        # Identity fields come from the recipe, not the fresh render
+        game = dict(rendered)
+        game['id'] = game_id
+        game['created_at'] = datetime.datetime.fromtimestamp(recipe.created_at).isoformat()
+        return game
+
+    def stored_bytes(self) -> int:
+        """Approximate payload bytes held by the store (HTML, packed or not, or recipe fields; pages are in compressed_bytes)"""
+        total = sum(len(source) for source in list(self._sources.values()))
+        for entry in list(self._games.values()):
+            if isinstance(entry, GameRecipe):
+                total += len(entry.prompt.encode('utf-8')) + len(entry.mode) + len(entry.engine_version) + 16
+            else:
+                total += len(entry.get('html', '').encode('utf-8'))
+        return total
+
+    def compressed_bytes(self) -> Dict[str, int]:
+        """Bytes held by precompressed pages, per encoding"""
+        totals = {}
+        with self._lock:
+            pages = list(self._pages.values()) + list(self._page_cache.values())
+        for page in pages:
+            for encoding, size in page.sizes().items():
+                totals[encoding] = totals.get(encoding, 0) + size
+        return totals
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'storage_mode': self.mode,
+            'games_stored': len(self._games),
+            'stored_bytes': self.stored_bytes(),
+            'render_cache_size': len(self._render_cache),
+            'render_cache_hits': self.render_cache_hits,
+            'render_cache_misses': self.render_cache_misses,
+            'compressed_pages': len(self._pages) + len(self._page_cache),
+            'compressed_bytes': self.compressed_bytes()
+        }
@@ -6,6 +6,7 @@ Manages HTML templates, CSS styles, and game assets
 import os
 import json
 from datetime import datetime
+from shared_assets import shared_assets
 
 class GameTemplateManager:
     """
@@ -345,6 +346,14 @@ class GameTemplateManager:
                 }
             '''
         }
+        
+        # Snippets every page uses are served once as versioned static files instead of inlined;
+        # registering is in memory only, the files are written when a page first links them
+        self.shared_asset_names = []
+        for name, code in list(self.js_snippets.items()) + list(self.state_management.items()):
+            shared_assets.register(name, 'js', code)
+            self.shared_asset_names.append(name)
+        self.assets_managed = len(self.shared_asset_names)
     
     def generate_complete_html(self, game_config):
         """
@@ -526,6 +535,7 @@ class GameTemplateManager:
         </div>
     </div>
     
+    {shared_assets.tags(self.shared_asset_names)}
     <script>
         // Game initialization
         const canvas = document.getElementById('gameCanvas');
@@ -540,20 +550,11 @@ class GameTemplateManager:
         let gameStartTime = Date.now();
         let lastFrameTime = 0;
         
-        // Include utility functions
-        {self.js_snippets['particle_system']}
-        {self.js_snippets['sound_effects']}
-        {self.js_snippets['collision_detection']}
-        {self.js_snippets['animation_system']}
-        {self.js_snippets['input_handler']}
+        // Utility functions and state classes come from the shared assets loaded above
         
         // Initialize input handler
         const input = new InputHandler();
         
-        // Game state management
-        {self.state_management['game_state']}
-        {self.state_management['save_system']}
-        
         // Initialize save system
         const saveSystem = new SaveSystem();
         
@@ -783,8 +784,9 @@ class GameTemplateManager:
             'available_components': len(self.html_components)
         }
 
-print("🎨 Game Template Manager Loaded:")
-print(f"  {len(GameTemplateManager().css_templates)} CSS theme templates")
-print(f"  {len(GameTemplateManager().js_snippets)} JavaScript code snippets")
-print(f"  {len(GameTemplateManager().html_components)} HTML components")
-print("✅ Ready to generate complete game templates!")
+if __name__ == "__main__":
+    print("🎨 Game Template Manager Loaded:")
+    print(f"  {len(GameTemplateManager().css_templates)} CSS theme templates")
+    print(f"  {len(GameTemplateManager().js_snippets)} JavaScript code snippets")
+    print(f"  {len(GameTemplateManager().html_components)} HTML components")
+    print("✅ Ready to generate complete game templates!")
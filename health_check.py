@@ -561,8 +561,9 @@ def record_generation_metrics(generation_time, success=True):
     """Record game generation metrics"""
     health_checker.record_game_generation(generation_time, success)
 
-print("🏥 Health Check System Loaded:")
-print(f"  Service monitoring: Active")
-print(f"  Performance tracking: Enabled")
-print(f"  Component health checks: {len(health_checker.health_thresholds)} thresholds")
-print("✅ Ready to monitor Mythiq Game Maker health!")
+if __name__ == "__main__":
+    print("🏥 Health Check System Loaded:")
+    print(f"  Service monitoring: Active")
+    print(f"  Performance tracking: Enabled")
+    print(f"  Component health checks: {len(health_checker.health_thresholds)} thresholds")
+    print("✅ Ready to monitor Mythiq Game Maker health!")
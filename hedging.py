@@ -0,0 +1,154 @@
+"""
+Hedging - Latency-Bounded Racing of a Slow Path Against a Local Fallback
+The slow path (the FREE AI pipeline) runs on a worker thread while the cheap
+fallback is rendered on the caller's; whichever is ready at the SLO deadline
+is returned, and a late slow-path result is handed to an upgrade callback
+"""
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, Tuple
+
+HEDGE_WORKERS = int(os.environ.get('HEDGE_WORKERS', 4))
+# Primaries allowed to wait for a worker; beyond that new requests skip straight to the fallback
+HEDGE_MAX_BACKLOG = int(os.environ.get('HEDGE_MAX_BACKLOG', HEDGE_WORKERS))
+
+class HedgedCall:
+    """
+    run(primary, fallback, slo) → (result, from_primary). A primary that
+    returns None or raises has declined, and the fallback is used at once
+    rather than at the deadline. Losing primaries that can no longer be used
+    (no late-result callback, or past the upgrade window) never start, and
+    when the pool's backlog is full the primary isn't attempted at all.
+    """
+
+    def __init__(self, workers: int = HEDGE_WORKERS, max_backlog: int = HEDGE_MAX_BACKLOG):
+        self.workers = workers
+        self.max_backlog = max_backlog
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hedge')
+        self._lock = threading.Lock()
+        self._in_flight = 0   # primaries submitted and not yet finished (running or queued)
+        self.stats = {'primary_wins': 0, 'fallback_wins': 0, 'primary_declined': 0, 'primary_skipped': 0,
+                      'primary_expired': 0, 'late_results': 0, 'late_upgrades': 0, 'late_dropped': 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _finished(self, future):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _run_primary(self, context, primary: Callable[[], Any], expires: float):
+        # Queued behind other primaries until nobody can use the result any more: don't start
+        if time.perf_counter() >= expires:
+            self._count('primary_expired')
+            return None
+        return context.run(primary)
+
+    def run(self, primary: Callable[[], Any], fallback: Callable[[], Any], slo: float,
+            on_late_result: Optional[Callable[[Any], Any]] = None,
+            upgrade_window: Optional[float] = None) -> Tuple[Any, bool]:
+        """
+        on_late_result gets a primary result that misses the SLO, for up to
+        upgrade_window seconds after it (unbounded when None); returning False
+        from it means the result was dropped
+        """
+        started = time.perf_counter()
+        if on_late_result is None:
+            expires = started + slo
+        else:
+            expires = started + slo + (upgrade_window if upgrade_window is not None else float('inf'))
+
+        with self._lock:
+            saturated = self._in_flight >= self.workers + self.max_backlog
+            if saturated:
+                self.stats['primary_skipped'] += 1
+            else:
+                self._in_flight += 1
+        if saturated:
+            return fallback(), False
+
+        # Worker threads don't inherit context; carry it over (LLM call priority lives there)
+        future = self._executor.submit(self._run_primary, contextvars.copy_context(), primary, expires)
+        future.add_done_callback(self._finished)
+        fallback_result = fallback()
+
+        try:
+            result = future.result(timeout=max(0.0, slo - (time.perf_counter() - started)))
+        except FutureTimeoutError:
+            self._count('fallback_wins')
+            if on_late_result is None:
+                future.cancel()   # only succeeds while still queued; a running primary just finishes
+            else:
+                future.add_done_callback(lambda done: self._deliver_late(done, on_late_result))
+            return fallback_result, False
+        except Exception as e:
+            print(f"Hedged primary failed: {e}")
+            result = None
+
+        if result is None:
+            self._count('primary_declined')
+            return fallback_result, False
+        self._count('primary_wins')
+        return result, True
+
+    def _deliver_late(self, future, on_late_result: Callable[[Any], Any]):
+        if future.cancelled():
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            self._count('late_results')
+            print(f"Hedged primary failed after the deadline: {e}")
+            return
+        if result is None:
+            return
+        self._count('late_results')
+        try:
+            accepted = on_late_result(result)
+        except Exception as e:
+            print(f"Late result upgrade failed: {e}")
+            return
+        self._count('late_dropped' if accepted is False else 'late_upgrades')
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats)
+
+if __name__ == "__main__":
+    import random
+
+    hedge = HedgedCall()
+    upgraded = []
+
+    def slow_ai():
+        time.sleep(random.choice([0.05, 0.05, 0.05, 0.4]))
+        return 'ai'
+
+    latencies = []
+    for _ in range(40):
+        start = time.perf_counter()
+        hedge.run(slow_ai, lambda: 'fallback', slo=0.1, on_late_result=upgraded.append)
+        latencies.append((time.perf_counter() - start) * 1000)
+    time.sleep(0.5)
+
+    latencies.sort()
+    print("🏁 HEDGED GENERATION (SLO 100ms, 1 in 4 AI calls takes 400ms)")
+    print("=" * 50)
+    print(f"p50 {latencies[len(latencies) // 2]:.0f}ms, max {latencies[-1]:.0f}ms")
+    print(f"Stats: {hedge.get_stats()}")
+
+    # A burst bigger than the pool: excess primaries are skipped or never start once they can't win
+    burst = HedgedCall(workers=2, max_backlog=2)
+    threads = [threading.Thread(target=burst.run, args=(lambda: time.sleep(0.3) or 'ai', lambda: 'fallback', 0.1))
+               for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    time.sleep(0.7)
+    print(f"Burst of 12 on 2 workers: {burst.get_stats()}")
@@ -0,0 +1,363 @@
+"""
+HTML Validator - Structural Validation of Generated Games
+quick_check() is a handful of substring scans for hot paths; scan_html() is
+one tokenizer pass that checks balanced tags, script/style blocks and the
+hooks a playable game needs, then scores the result (LLM output and CI)
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+VOID_ELEMENTS = frozenset({'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+                           'meta', 'param', 'source', 'track', 'wbr'})
+# End tags the HTML spec lets authors omit; closing them implicitly isn't an error
+OPTIONAL_END_ELEMENTS = frozenset({'p', 'li', 'dt', 'dd', 'option', 'optgroup', 'tr', 'td', 'th',
+                                   'thead', 'tbody', 'tfoot', 'colgroup', 'caption', 'rt', 'rp'})
+RAW_TEXT_ELEMENTS = ('script', 'style')
+
+# What every playable game needs: somewhere to play, state that updates, a way to start, and input
+GAME_HOOKS = ('playfield', 'update', 'start', 'input')
+
+# Comments, declarations, and start/end tags (quoted attribute values may contain '>')
+_TOKEN = re.compile(
+    r"<!--.*?(?:-->|\Z)"
+    r"|<!(?P<decl>[^>]*)>"
+    r"|<(?P<end>/)?(?P<tag>[a-zA-Z][a-zA-Z0-9-]*)(?P<attrs>(?:[^>\"']|\"[^\"]*\"|'[^']*')*)>",
+    re.DOTALL
+)
+_ATTRIBUTE = re.compile(r"""([^\s=/>"']+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+_RAW_TEXT_END = {tag: re.compile(rf'</{tag}\s*>', re.IGNORECASE) for tag in RAW_TEXT_ELEMENTS}
+
+_PLAYFIELD_NAME = re.compile(r'game|board|arena|playfield|stage', re.IGNORECASE)
+# One search per hook still missing; each stops at its first match
+_JS_HOOKS = {
+    'update': re.compile(r'gameLoop|requestAnimationFrame|setInterval|(?:update|render|draw)\w*\s*\('),
+    'start': re.compile(r'(?:start|Start|init|reset)\w*\s*\(|new[A-Z]\w*\s*\(|DOMContentLoaded|onload'),
+    'input': re.compile(r"addEventListener\(\s*['\"](?:key|touch|mouse|click|pointer)"
+                        r"|\.on(?:key|click|touch|mouse|pointer)\w*\s*=")
+}
+_DOCTYPE = re.compile(r'<!doctype\s+html\s*>', re.IGNORECASE)
+# Just the tokens quick_check needs: comments, and script/style start tags whose raw text it skips
+_RAW_TEXT_START = re.compile(
+    r"<!--.*?(?:-->|\Z)"
+    r"|<(?P<tag>script|style)\b(?P<attrs>(?:[^>\"']|\"[^\"]*\"|'[^']*')*)>",
+    re.IGNORECASE | re.DOTALL
+)
+_INPUT_HANDLER = re.compile(r'on(?:key|click|touch|mouse|pointer)', re.IGNORECASE)
+
+@dataclass(frozen=True)
+class HTMLReport:
+    """Everything the scan found; properties derive the verdicts"""
+    has_doctype: bool
+    has_html: bool
+    html_closed: bool
+    has_head: bool
+    has_body: bool
+    unclosed: Tuple[str, ...]      # elements still open at EOF or implicitly closed by a mismatched end tag
+    stray_end_tags: int            # end tags that matched nothing open
+    style_blocks: int
+    script_blocks: int
+    inline_styles: int
+    inline_handlers: int
+    hooks: FrozenSet[str]
+
+    @property
+    def unclosed_raw_text(self) -> bool:
+        """A <script> or <style> left open (typically truncated LLM output)"""
+        return 'script' in self.unclosed or 'style' in self.unclosed
+
+    @property
+    def is_valid_html(self) -> bool:
+        return self.has_doctype and self.has_html and self.html_closed and not self.unclosed_raw_text
+
+    @property
+    def is_complete_document(self) -> bool:
+        return self.is_valid_html and self.has_head and self.has_body
+
+    @property
+    def has_css(self) -> bool:
+        return self.style_blocks > 0 or self.inline_styles > 0
+
+    @property
+    def has_javascript(self) -> bool:
+        return self.script_blocks > 0 or self.inline_handlers > 0
+
+    @property
+    def missing_hooks(self) -> List[str]:
+        return [hook for hook in GAME_HOOKS if hook not in self.hooks]
+
+    @property
+    def is_playable(self) -> bool:
+        return not self.missing_hooks and not self.unclosed_raw_text
+
+    @property
+    def quality(self) -> int:
+        """0-10: document 2, well-formed 1, CSS 2, JavaScript 2, game hooks 3"""
+        score = 2 * self.is_complete_document
+        score += not self.unclosed and not self.stray_end_tags
+        score += 2 * self.has_css + 2 * self.has_javascript
+        score += round(3 * (len(GAME_HOOKS) - len(self.missing_hooks)) / len(GAME_HOOKS))
+        return score
+
+    def issues(self) -> List[str]:
+        issues = []
+        if not self.has_doctype:
+            issues.append('Missing <!DOCTYPE html>')
+        if not self.has_html or not self.html_closed:
+            issues.append('Invalid HTML structure')
+        elif not self.has_head or not self.has_body:
+            issues.append('Missing <head> or <body>')
+        if self.unclosed:
+            issues.append(f"Unclosed elements: {', '.join(self.unclosed)}")
+        if self.stray_end_tags:
+            issues.append(f"{self.stray_end_tags} unmatched end tag(s)")
+        if not self.has_css:
+            issues.append('Missing CSS styling')
+        if not self.has_javascript:
+            issues.append('Missing JavaScript logic')
+        if self.missing_hooks:
+            issues.append(f"Missing game hooks: {', '.join(self.missing_hooks)}")
+        return issues
+
+class _GameHTMLScanner:
+    """Walks the token stream once, filling in what an HTMLReport needs"""
+
+    def __init__(self):
+        self.stack = []
+        self.unclosed = []
+        self.stray_end_tags = 0
+        self.flags = {'doctype': False, 'html': False, 'html_closed': False, 'head': False, 'body': False}
+        self.counts = {'style': 0, 'script': 0, 'inline_styles': 0, 'inline_handlers': 0}
+        self.hooks = set()
+
+    def scan(self, code: str):
+        position = 0
+        while True:
+            match = _TOKEN.search(code, position)
+            if match is None:
+                return
+            position = match.end()
+
+            tag = match.group('tag')
+            if tag is None:
+                decl = match.group('decl')
+                if decl is not None and decl.lower().split() == ['doctype', 'html']:
+                    self.flags['doctype'] = True
+                continue
+
+            tag = tag.lower()
+            if match.group('end'):
+                self._end_tag(tag)
+                continue
+
+            attrs = match.group('attrs')
+            self._start_tag(tag, attrs)
+            if tag in RAW_TEXT_ELEMENTS and not attrs.endswith('/'):
+                # Raw text: jump straight to the closing tag instead of tokenizing JS/CSS
+                close = _RAW_TEXT_END[tag].search(code, position)
+                if close is None:
+                    self.stack.append(tag)
+                    if tag == 'script':
+                        self._scan_script(code[position:])
+                    return
+                if tag == 'script':
+                    self._scan_script(code[position:close.start()])
+                position = close.end()
+            elif tag not in VOID_ELEMENTS and not attrs.endswith('/'):
+                self.stack.append(tag)
+
+    def _start_tag(self, tag: str, attrs: str):
+        if tag in ('html', 'head', 'body'):
+            self.flags[tag] = True
+        elif tag == 'style':
+            self.counts['style'] += 1
+        elif tag == 'script':
+            self.counts['script'] += 1
+        elif tag == 'canvas':
+            self.hooks.add('playfield')
+
+        if not attrs.strip():
+            return
+        for name, double_quoted, single_quoted, bare in _ATTRIBUTE.findall(attrs):
+            name = name.lower()
+            value = double_quoted or single_quoted or bare
+            if name == 'style':
+                self.counts['inline_styles'] += 1
+            elif name.startswith('on'):
+                self.counts['inline_handlers'] += 1
+                if _INPUT_HANDLER.match(name):
+                    self.hooks.add('input')
+                self._scan_script(value)
+            elif name in ('id', 'class') and _PLAYFIELD_NAME.search(value):
+                self.hooks.add('playfield')
+            elif name == 'rel' and tag == 'link' and 'stylesheet' in value.lower():
+                self.counts['style'] += 1
+
+    def _end_tag(self, tag: str):
+        if tag == 'html':
+            self.flags['html_closed'] = True
+        for depth in range(len(self.stack) - 1, -1, -1):
+            if self.stack[depth] == tag:
+                self.unclosed.extend(open_tag for open_tag in self.stack[depth + 1:]
+                                     if open_tag not in OPTIONAL_END_ELEMENTS)
+                del self.stack[depth:]
+                return
+        if tag not in VOID_ELEMENTS:
+            self.stray_end_tags += 1
+
+    def _scan_script(self, code: str):
+        for hook, pattern in _JS_HOOKS.items():
+            if hook not in self.hooks and pattern.search(code):
+                self.hooks.add(hook)
+
+    def report(self) -> HTMLReport:
+        # Whatever is still open at EOF never got its end tag
+        unclosed = self.unclosed + [tag for tag in self.stack if tag not in OPTIONAL_END_ELEMENTS]
+        return HTMLReport(
+            has_doctype=self.flags['doctype'], has_html=self.flags['html'], html_closed=self.flags['html_closed'],
+            has_head=self.flags['head'], has_body=self.flags['body'],
+            unclosed=tuple(unclosed), stray_end_tags=self.stray_end_tags,
+            style_blocks=self.counts['style'], script_blocks=self.counts['script'],
+            inline_styles=self.counts['inline_styles'], inline_handlers=self.counts['inline_handlers'],
+            hooks=frozenset(self.hooks)
+        )
+
+def _raw_text_closed(code: str) -> bool:
+    """
+    Whether every <script>/<style> block ends, walked the way _GameHTMLScanner
+    does (skip comments, jump over raw text to its end tag), so markup-like
+    text inside JS or CSS never counts
+    """
+    position = 0
+    while True:
+        match = _RAW_TEXT_START.search(code, position)
+        if match is None:
+            return True
+        position = match.end()
+        tag = match.group('tag')
+        if tag is None or match.group('attrs').endswith('/'):
+            continue
+        close = _RAW_TEXT_END[tag.lower()].search(code, position)
+        if close is None:
+            return False   # an LLM reply cut off mid-block
+        position = close.end()
+
+def quick_check(code: str) -> Dict[str, bool]:
+    """
+    Document shape and truncation without tokenizing the markup: substring
+    searches plus a walk over script/style blocks only; no tag balancing or
+    game hooks. Prose or a code fence around the document is tolerated, as
+    scan_html does
+    """
+    valid = _DOCTYPE.search(code) is not None and '<html' in code and code.rfind('</html>') > 0
+    raw_text_closed = valid and _raw_text_closed(code)
+    return {
+        'is_valid_html': valid and raw_text_closed,
+        'is_complete_document': valid and raw_text_closed and '<head' in code and '<body' in code,
+        'has_css': '<style' in code or 'style=' in code,
+        'has_javascript': '<script' in code or 'onclick=' in code
+    }
+
+# Small: only the pipeline re-validating the same reply hits it
+@lru_cache(maxsize=8)
+def scan_html(code: str) -> HTMLReport:
+    """One tokenizer pass over the document; ~10x the cost of quick_check, for full reports"""
+    scanner = _GameHTMLScanner()
+    scanner.scan(code)
+    return scanner.report()
+
+def validate_game_html(code: str) -> Dict[str, Any]:
+    """
+    Validation summary in the shape FreeAICodeGenerator.validate_generated_code
+    returns; runs the full scan, so keep it off per-request paths
+    """
+    report = scan_html(code)
+    return {
+        'is_valid_html': report.is_valid_html,
+        'has_css': report.has_css,
+        'has_javascript': report.has_javascript,
+        'is_complete': report.is_playable,
+        'estimated_quality': report.quality,
+        'missing_hooks': report.missing_hooks,
+        'issues': report.issues(),
+        'free_generation': True
+    }
+
+def local_templates() -> Dict[str, str]:
+    """Every game HTML this repo renders itself, by name"""
+    import os
+    from app import generate_game_from_prompt
+    from free_ai_code_generator import FreeAICodeGenerator
+    from free_ai_template_engine import FreeAITemplateEngine
+    from mock_llm_server import CANNED_GAME_HTML
+
+    templates = {}
+    for prompt in ('throw darts at the dartboard', 'basketball hoop', 'underwater treasure dive',
+                   'medieval dragon castle', 'space alien galaxy', 'racing car track'):
+        for mode in ('basic', 'enhanced', 'ultimate'):
+            game = generate_game_from_prompt(prompt, mode, seed=1)
+            templates[f"{game['type']}/{mode}"] = game['html']
+
+    template_engine = FreeAITemplateEngine()
+    concept = template_engine._fallback_analysis('space shooter with power-ups')
+    templates['free_ai/fallback'] = FreeAICodeGenerator()._fallback_complete_game(
+        template_engine._fallback_template(concept))
+    templates['stub/canned'] = CANNED_GAME_HTML
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'enhanced_space_shooter_template.html')
+    with open(path, encoding='utf-8') as f:
+        templates['enhanced_space_shooter_template.html'] = f.read()
+    return templates
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    def substring_checks(code: str) -> bool:
+        # The separate `in` scans validate_generated_code used to make
+        valid = '<!DOCTYPE html>' in code and '<html' in code and '</html>' in code
+        css = '<style>' in code or 'style=' in code
+        js = '<script>' in code or 'onclick=' in code
+        complete = any(element in code for element in ['game-container', 'player', 'gameLoop', 'startGame'])
+        document = all(element in code for element in ['<!DOCTYPE html>', '<html', '<head>', '<body>', '</html>'])
+        return valid and css and js and complete and document
+
+    templates = local_templates()
+    print("🧪 GAME HTML VALIDATION (local templates)")
+    print("=" * 50)
+    failures = 0
+    for name, code in templates.items():
+        report = scan_html(code)
+        failures += not (report.is_complete_document and report.is_playable and quick_check(code)['is_complete_document'])
+        print(f"{name:>38}: quality {report.quality:2d}/10 {'; '.join(report.issues()) or 'ok'}")
+
+    truncated = templates['stub/canned'][:len(templates['stub/canned']) // 2]
+    print(f"{'truncated LLM output':>38}: old substring checks {'pass' if substring_checks(truncated) else 'fail'}, "
+          f"quick_check {'pass' if quick_check(truncated)['is_complete_document'] else 'fail'}, "
+          f"validator quality {scan_html(truncated).quality}/10 ({'; '.join(scan_html(truncated).issues())})")
+
+    # The fast path must agree with the full scan on replies the old checks got wrong
+    canned = templates['stub/canned']
+    tricky = {
+        'fenced reply': f"Here is your game:\n```html\n{canned}\n```",
+        'markup in JS': canned.replace('</script>', "var tag = '<style', x = a<script;</script>", 1),
+        'cut mid-script': canned[:canned.rfind('</script>')]
+    }
+    for name, code in tricky.items():
+        agree = quick_check(code)['is_valid_html'] == scan_html(code).is_valid_html
+        failures += not agree
+        print(f"{name:>38}: quick_check and scan_html {'agree' if agree else 'DISAGREE'}")
+
+    rounds = 20
+    for label, check in (('old substring checks', substring_checks), ('quick_check', quick_check),
+                         ('scan_html', scan_html.__wrapped__)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for code in templates.values():
+                check(code)
+        elapsed = (time.perf_counter() - start) / (rounds * len(templates)) * 1000
+        print(f"{label:>20}: {elapsed:.3f}ms per document")
+
+    sys.exit(1 if failures else 0)
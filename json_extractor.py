@@ -0,0 +1,181 @@
+"""
+JSON Extractor - Single-Pass JSON Object Extraction from LLM Output
+Finds balanced top-level {...} objects in free-form model replies with one
+linear scan, incrementally, so partially streamed output can be parsed and
+top-level fields consumed as soon as each one is complete
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Union
+
+# Invalid {...} wrappers peeled off when looking for a valid object inside; bounds
+# the rescans (each one linear) on pathological input like '{' * n + '}' * n
+MAX_NESTED_RETRIES = 32
+
+class JSONObjectExtractor:
+    """
+    Incremental scanner: feed() text as it arrives and get back every
+    top-level JSON object completed by that text. Braces inside strings are
+    ignored; a balanced {...} that isn't valid JSON (prose like "{name} is
+    {"genre": ...}") is searched again from its next '{', so a valid object
+    nested in it is still found. on_field(key, value) fires for each
+    top-level field of the current object as soon as its value closes.
+    """
+
+    def __init__(self, on_field: Optional[Callable[[str, Any], None]] = None):
+        self.on_field = on_field
+        self.fields = {}          # top-level fields of the object being scanned
+        self._buffer = []         # text of the current candidate object
+        self._field = []          # text since the last depth-1 '{' or ',' (the field being scanned)
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        return self._scan(text, retry=True)
+
+    def _scan(self, text: str, retry: bool) -> List[Union[Dict[str, Any], str]]:
+        """Completed objects; with retry=False a rejected candidate is returned as its text"""
+        completed = []
+        start = 0  # offset in text where the current candidate's unbuffered part begins
+
+        for i, char in enumerate(text):
+            if self._depth == 0:
+                if char == '{':
+                    self._depth = 1
+                    self._buffer = ['{']
+                    self._field = []
+                    self.fields = {}
+                    start = i + 1
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._absorb(text[start:i + 1])
+                    self._field_done()
+                    candidate = ''.join(self._buffer)
+                    try:
+                        value = json.loads(candidate)
+                    except ValueError:
+                        value = None
+                    if isinstance(value, dict):
+                        completed.append(value)
+                    elif retry:
+                        # Retry from the next '{' inside the rejected candidate
+                        nested = _nested_objects(candidate)
+                        if nested:
+                            completed.extend(nested)
+                            self.fields = nested[-1]
+                    else:
+                        completed.append(candidate)
+                    self._buffer = []
+                    self._field = []
+            elif char == ',' and self._depth == 1:
+                self._absorb(text[start:i + 1])
+                start = i + 1
+                self._field_done()
+
+        if self._depth > 0:
+            self._absorb(text[start:])
+        return completed
+
+    def _absorb(self, chunk: str):
+        self._buffer.append(chunk)
+        self._field.append(chunk)
+
+    def _field_done(self):
+        """Parse the `"key": value` segment that just closed at depth 1 (minus its ',' or '}')"""
+        segment = ''.join(self._field)[:-1].strip()
+        self._field = []
+        if not segment:
+            return
+        try:
+            field = json.loads('{' + segment + '}')
+        except ValueError:
+            return
+        for key, value in field.items():
+            self.fields[key] = value
+            if self.on_field is not None:
+                self.on_field(key, value)
+
+    @property
+    def pending(self) -> bool:
+        """Whether an object has been opened but not yet closed"""
+        return self._depth > 0
+
+def _nested_objects(candidate: str) -> List[Dict[str, Any]]:
+    """Valid objects inside a balanced but invalid candidate, in order, one level per pass"""
+    items = [candidate]
+    for _ in range(MAX_NESTED_RETRIES):
+        if not any(isinstance(item, str) for item in items):
+            break
+        expanded = []
+        for item in items:
+            if isinstance(item, str):
+                expanded.extend(JSONObjectExtractor()._scan(item[1:], retry=False))
+            else:
+                expanded.append(item)
+        items = expanded
+    return [item for item in items if isinstance(item, dict)]
+
+def extract_json_objects(text: str) -> List[Dict[str, Any]]:
+    """Every valid top-level JSON object in text, in order"""
+    return JSONObjectExtractor().feed(text)
+
+def extract_json_object(text: str) -> Dict[str, Any]:
+    """First valid top-level JSON object in text; ValueError if there is none"""
+    objects = extract_json_objects(text)
+    if not objects:
+        raise ValueError("No JSON object found in response")
+    return objects[0]
+
+if __name__ == "__main__":
+    import re
+    import time
+
+    reply = 'Sure! Here is the {analysis} you asked for:\n' + json.dumps({
+        'genre': 'action', 'mechanics': ['shooting', 'dodging'], 'theme': 'sci-fi',
+        'objective': 'Survive {wave} after wave'
+    }) + '\nLet me know if you need {anything} else.'
+
+    print("🧩 JSON EXTRACTION FROM LLM OUTPUT")
+    print("=" * 50)
+    try:
+        json.loads(re.search(r'\{.*\}', reply, re.DOTALL).group())
+        print("Greedy regex: parsed")
+    except ValueError as e:
+        print(f"Greedy regex: failed ({e})")
+    print(f"Extractor:    {extract_json_object(reply)}")
+    wrapped = '{Here is the concept: ' + json.dumps({'genre': 'puzzle'}) + ' hope it helps}'
+    print(f"Inside prose braces: {extract_json_object(wrapped)}")
+
+    streamed = []
+    extractor = JSONObjectExtractor(on_field=lambda key, value: streamed.append(key))
+    for i in range(0, len(reply), 7):
+        extractor.feed(reply[i:i + 7])
+    print(f"Fields as they streamed in: {streamed}")
+
+    # Pathological output: many opening braces and no closing ones
+    pathological = '{' * 5000 + 'x' * 5000
+    for label, parse in (('regex', lambda text: re.search(r'\{.*\}', text, re.DOTALL)),
+                         ('extractor', extract_json_objects)):
+        start = time.perf_counter()
+        parse(pathological)
+        print(f"{label:>9} on 10KB of unbalanced braces: {(time.perf_counter() - start) * 1000:.2f}ms")
+    start = time.perf_counter()
+    extract_json_objects('{' * 5000 + '}' * 5000)
+    print(f"extractor on 10KB of nested invalid braces: {(time.perf_counter() - start) * 1000:.2f}ms")
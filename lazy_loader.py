@@ -0,0 +1,187 @@
+"""
+Lazy Loader - Deferred Template Library Loading and Startup Profiling
+Builds the large template libraries on first use instead of at import time,
+and reports per-module import and init cost for cold-start tuning
+"""
+
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Any, Optional
+
+# Modules measured by --profile-startup, Flask first as the baseline
+STARTUP_MODULES = [
+    'flask',
+    'flask_cors',
+    'base_games',
+    'base_games_preview',
+    'customization_engine',
+    'game_templates',
+    'game_ai',
+    'health_check',
+    'comprehensive_game_template_library',
+    'intelligent_game_generator',
+    'enhanced_ai_game_scraper_fixed',
+    'expanded_game_template_library',
+    'revolutionary_prompt_processor',
+    'true_randomization_engine',
+    'free_ai_template_engine',
+    'free_ai_code_generator'
+]
+
+# Child-process probe: cold import + optional init, banners counted not shown
+_PROBE_SCRIPT = '''
+import contextlib, importlib, io, json, sys, time
+module_name, attribute = sys.argv[1], sys.argv[2] or None
+result = {'module': module_name, 'import_ms': None, 'init_ms': None, 'printed_lines': 0, 'error': None}
+buffer = io.StringIO()
+try:
+    with contextlib.redirect_stdout(buffer):
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        result['import_ms'] = (time.perf_counter() - start) * 1000
+        if attribute:
+            target = getattr(module, attribute)
+            start = time.perf_counter()
+            if isinstance(target, type):
+                target()
+            result['init_ms'] = (time.perf_counter() - start) * 1000
+except Exception as e:
+    result['error'] = f'{type(e).__name__}: {e}'
+result['printed_lines'] = len(buffer.getvalue().splitlines())
+print(json.dumps(result))
+'''
+
+class LazyLibrary:
+    """
+    Proxy that imports a module and builds its library object on first use
+    """
+
+    def __init__(self, module_name: str, attribute: str):
+        self.module_name = module_name
+        self.attribute = attribute
+        self.import_ms = None
+        self.init_ms = None
+        self._instance = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def load(self):
+        """Import and build the library, once per process"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self.module_name)
+                    imported = time.perf_counter()
+
+                    # Classes are instantiated, module-level singletons are reused
+                    target = getattr(module, self.attribute)
+                    instance = target() if isinstance(target, type) else target
+
+                    self.import_ms = (imported - start) * 1000
+                    self.init_ms = (time.perf_counter() - imported) * 1000
+                    self._instance = instance
+        return self._instance
+
+    def __getattr__(self, name):
+        # Only reached for attributes not defined on the proxy itself
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'module': self.module_name,
+            'loaded': self.loaded,
+            'import_ms': round(self.import_ms, 2) if self.import_ms is not None else None,
+            'init_ms': round(self.init_ms, 2) if self.init_ms is not None else None
+        }
+
+# Template libraries, built on first use
+TEMPLATE_LIBRARIES = {
+    'expanded': LazyLibrary('expanded_game_template_library', 'ExpandedGameTemplateLibrary'),
+    'comprehensive': LazyLibrary('comprehensive_game_template_library', 'game_library'),
+    'scraper': LazyLibrary('enhanced_ai_game_scraper_fixed', 'enhanced_scraper'),
+    'template_manager': LazyLibrary('game_templates', 'GameTemplateManager'),
+    'ai_template_engine': LazyLibrary('free_ai_template_engine', 'FreeAITemplateEngine'),
+    'ai_code_generator': LazyLibrary('free_ai_code_generator', 'FreeAICodeGenerator')
+}
+
+def get_library(name: str):
+    """Get a template library by name, building it on first use"""
+    return TEMPLATE_LIBRARIES[name].load()
+
+def preload_libraries(names: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Eagerly build libraries (used when TEMPLATE_LOADING=eager)"""
+    status = {}
+    for name in names or list(TEMPLATE_LIBRARIES.keys()):
+        try:
+            TEMPLATE_LIBRARIES[name].load()
+            status[name] = TEMPLATE_LIBRARIES[name].status()
+        except Exception as e:
+            status[name] = {'loaded': False, 'error': str(e)}
+    return status
+
+def get_library_status() -> Dict[str, Any]:
+    """Loaded state and build cost of every registered library"""
+    return {name: library.status() for name, library in TEMPLATE_LIBRARIES.items()}
+
+def _library_attribute(module_name: str) -> str:
+    for library in TEMPLATE_LIBRARIES.values():
+        if library.module_name == module_name:
+            return library.attribute
+    return ''
+
+def profile_startup(modules: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Measure cold import and init time of each module in its own interpreter,
+    so results don't depend on what the current process already imported
+    """
+    project_dir = os.path.dirname(os.path.abspath(__file__))
+    report = []
+
+    for module_name in modules or STARTUP_MODULES:
+        try:
+            completed = subprocess.run(
+                [sys.executable, '-c', _PROBE_SCRIPT, module_name, _library_attribute(module_name)],
+                cwd=project_dir, capture_output=True, text=True, timeout=120
+            )
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+        except Exception as e:
+            result = {'module': module_name, 'import_ms': None, 'init_ms': None,
+                      'printed_lines': 0, 'error': f'probe failed: {e}'}
+        report.append(result)
+
+    return report
+
+def format_startup_report(report: List[Dict[str, Any]]) -> str:
+    """Render a profile_startup() report as a text table"""
+    def ms(value):
+        return f'{value:9.1f}' if value is not None else '        -'
+
+    lines = [
+        '⏱️  STARTUP PROFILE (cold import per module, includes its dependencies)',
+        f"{'module':<40}{'import ms':>10}{'init ms':>10}{'prints':>8}",
+        '-' * 68
+    ]
+    for entry in report:
+        line = f"{entry['module']:<40}{ms(entry['import_ms']):>10}{ms(entry['init_ms']):>10}{entry['printed_lines']:>8}"
+        if entry.get('error'):
+            line += f"  ({entry['error']})"
+        lines.append(line)
+
+    baseline = sum(e['import_ms'] or 0 for e in report if e['module'] in ('flask', 'flask_cors'))
+    lines.append('-' * 68)
+    lines.append(f'Flask baseline: {baseline:.1f} ms (template libraries load lazily on first use)')
+    return '\n'.join(lines)
+
+if __name__ == "__main__":
+    print(format_startup_report(profile_startup()))
@@ -0,0 +1,113 @@
+"""
+LLM Backends - Pluggable Chat and Text-Generation Endpoints for the FREE AI Engines
+Groq chat plus Hugging Face text generation in production, or an in-process
+deterministic stub server for offline load tests; selected with LLM_BACKEND
+"""
+
+import os
+import threading
+from typing import Dict, List, Any, Callable, Iterator, Optional
+
+from llm_client import GROQ_CHAT_URL, GROQ_MODEL, chat_completion, post_json, stream_chat_completion
+
+LLM_BACKEND = os.environ.get('LLM_BACKEND', 'groq')
+HF_INFERENCE_URL = "https://api-inference.huggingface.co/models"
+
+# Stub backend: latency is seconds or a mock_llm_server.latency_sampler spec
+LLM_STUB_LATENCY = os.environ.get('LLM_STUB_LATENCY', 'lognormal:0.3:0.5')
+LLM_STUB_SEED = int(os.environ.get('LLM_STUB_SEED', 0))
+
+class LLMBackend:
+    """
+    Where the engines send chat completions (OpenAI-compatible) and plain
+    text generation (Hugging Face inference-style), and with which credentials
+    """
+
+    def __init__(self, name: str, chat_url: str, model: str, api_key: Optional[str],
+                 text_url: Optional[str] = None, text_api_key: str = '', missing_key_message: Optional[str] = None):
+        self.name = name
+        self.chat_url = chat_url
+        self.model = model
+        self.api_key = api_key
+        self.text_url = text_url
+        self.text_api_key = text_api_key
+        self.missing_key_message = missing_key_message or f"{name} backend has no API key"
+
+    @property
+    def configured(self) -> bool:
+        """Whether chat calls can go out at all"""
+        return bool(self.api_key)
+
+    def require(self):
+        if not self.api_key:
+            raise Exception(self.missing_key_message)
+
+    def chat(self, messages: List[Dict], temperature: float = 0.3, max_tokens: int = 1000,
+             timeout: float = 30) -> str:
+        self.require()
+        return chat_completion(self.api_key, messages, temperature, max_tokens,
+                               timeout=timeout, url=self.chat_url, model=self.model)
+
+    async def chat_async(self, client, messages: List[Dict], temperature: float = 0.3, max_tokens: int = 1000,
+                         timeout: float = 30) -> str:
+        self.require()
+        return await client.chat_completion(self.api_key, messages, temperature, max_tokens,
+                                            timeout=timeout, url=self.chat_url, model=self.model)
+
+    def stream_chat(self, messages: List[Dict], temperature: float = 0.3, max_tokens: int = 1000,
+                    timeout: float = 30) -> Iterator[str]:
+        self.require()
+        return stream_chat_completion(self.api_key, messages, temperature, max_tokens,
+                                      timeout=timeout, url=self.chat_url, model=self.model)
+
+    def generate_text(self, model: str, prompt: str, timeout: float = 30) -> str:
+        """Hugging Face-style text generation; raises when the backend has none"""
+        if not self.text_url:
+            raise Exception(f"{self.name} backend has no text-generation endpoint")
+
+        headers = {"Authorization": f"Bearer {self.text_api_key}"} if self.text_api_key else {}
+        response = post_json(f"{self.text_url}/{model}", {"inputs": prompt}, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        result = response.json()
+
+        if isinstance(result, list) and len(result) > 0:
+            return result[0].get('generated_text', prompt)
+        return str(result)
+
+    def describe(self) -> Dict[str, Any]:
+        return {'name': self.name, 'chat_url': self.chat_url, 'model': self.model,
+                'configured': self.configured, 'text_generation': bool(self.text_url)}
+
+def groq_backend() -> LLMBackend:
+    return LLMBackend('groq', GROQ_CHAT_URL, GROQ_MODEL, os.environ.get('GROQ_API_KEY'),
+                      HF_INFERENCE_URL, os.environ.get('HUGGINGFACE_API_KEY', ''),
+                      missing_key_message="GROQ_API_KEY not found in environment variables")
+
+def server_backend(server, name: str = 'stub') -> LLMBackend:
+    """Backend pointed at a running MockLLMServer"""
+    return LLMBackend(name, server.chat_url, 'stub-model', 'stub-key', server.text_url)
+
+_stub_server = None
+_stub_lock = threading.Lock()
+
+def stub_backend() -> LLMBackend:
+    """Process-wide stub server with canned replies, started on first use"""
+    global _stub_server
+    with _stub_lock:
+        if _stub_server is None:
+            from mock_llm_server import MockLLMServer
+            _stub_server = MockLLMServer(latency=LLM_STUB_LATENCY, canned=True, seed=LLM_STUB_SEED).start()
+    return server_backend(_stub_server)
+
+BACKENDS: Dict[str, Callable[[], LLMBackend]] = {
+    'groq': groq_backend,
+    'stub': stub_backend
+}
+
+def get_llm_backend(name: Optional[str] = None) -> LLMBackend:
+    """Backend named by LLM_BACKEND (or name)"""
+    name = name or LLM_BACKEND
+    factory = BACKENDS.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown LLM backend '{name}' (expected one of {', '.join(BACKENDS)})")
+    return factory()
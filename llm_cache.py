@@ -0,0 +1,209 @@
+"""
+LLM Cache - Persistent Response Cache for the FREE AI Backends
+SQLite-backed, content-hashed cache of chat completions keyed by the
+normalized request, so repeat prompts skip the network and survive restarts
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Any, Optional
+
+LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+LLM_CACHE_PATH = os.environ.get('LLM_CACHE_PATH', 'llm_cache.sqlite3')
+LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', 7 * 24 * 3600))                   # seconds
+LLM_CACHE_MAX_BYTES = int(os.environ.get('LLM_CACHE_MAX_BYTES', 64 * 1024 * 1024))   # response bytes kept
+# Above this temperature replies are meant to vary, so they are never cached
+LLM_CACHE_MAX_TEMPERATURE = float(os.environ.get('LLM_CACHE_MAX_TEMPERATURE', 0.7))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at);
+"""
+
+def request_key(model: str, messages: List[Dict], temperature: float, max_tokens: int) -> str:
+    """
+    Content hash of a chat request. Message text is whitespace-normalized so
+    re-indented prompt templates still map to the same entry.
+    """
+    normalized = {
+        'model': model,
+        'messages': [[message.get('role'), ' '.join(str(message.get('content', '')).split())]
+                     for message in messages],
+        'temperature': round(float(temperature), 3),
+        'max_tokens': int(max_tokens)
+    }
+    encoded = json.dumps(normalized, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+class LLMResponseCache:
+    """
+    Thread-safe SQLite cache with TTL expiry and a least-recently-used size cap
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl: int = LLM_CACHE_TTL,
+                 max_bytes: int = LLM_CACHE_MAX_BYTES, max_temperature: float = LLM_CACHE_MAX_TEMPERATURE):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_temperature = max_temperature
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._size = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+        self.stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'expired': 0, 'evicted': 0}
+
+    def cacheable(self, temperature: float) -> bool:
+        return temperature <= self.max_temperature
+
+    def get(self, model: str, messages: List[Dict], temperature: float, max_tokens: int) -> Optional[str]:
+        """Cached reply, or None on miss/expiry/bypass"""
+        if not self.cacheable(temperature):
+            self.stats['bypassed'] += 1
+            return None
+
+        key = request_key(model, messages, temperature, max_tokens)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT response, size, created_at FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+
+            response, size, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._size -= size
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            self._conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+            self.stats['hits'] += 1
+            return response
+
+    def put(self, model: str, messages: List[Dict], temperature: float, max_tokens: int, response: str):
+        if not self.cacheable(temperature):
+            return
+
+        key = request_key(model, messages, temperature, max_tokens)
+        size = len(response.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, response, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)',
+                (key, response, size, now, now)
+            )
+            self._size += size - (previous[0] if previous else 0)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop expired rows, then least recently used ones until under the cap (lock held)"""
+        if self.ttl:
+            cursor = self._conn.execute('DELETE FROM responses WHERE created_at < ?', (time.time() - self.ttl,))
+            self.stats['expired'] += cursor.rowcount
+            self._size = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+        rows = self._conn.execute('SELECT key, size FROM responses ORDER BY accessed_at').fetchall()
+        doomed = []
+        for key, size in rows:
+            if self._size <= self.max_bytes:
+                break
+            doomed.append((key,))
+            self._size -= size
+        if doomed:
+            self._conn.executemany('DELETE FROM responses WHERE key = ?', doomed)
+            self.stats['evicted'] += len(doomed)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+            self._size = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            'path': self.path,
+            'entries': entries,
+            'bytes': self._size,
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl,
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0.0,
+            **self.stats
+        }
+
+_UNSET = object()
+_cache = _UNSET
+_cache_lock = threading.Lock()
+
+def get_response_cache() -> Optional[LLMResponseCache]:
+    """Process-wide cache, or None when LLM_CACHE_ENABLED=false or the file can't be opened"""
+    global _cache
+    if _cache is _UNSET:
+        with _cache_lock:
+            if _cache is _UNSET:
+                _cache = None
+                if LLM_CACHE_ENABLED:
+                    try:
+                        _cache = LLMResponseCache()
+                    except sqlite3.Error as e:
+                        print(f"LLM cache disabled: {e}")
+    return _cache
+
+def set_response_cache(cache: Optional[LLMResponseCache]):
+    """Swap the process-wide cache (custom path/TTL); None disables caching"""
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+if __name__ == "__main__":
+    import tempfile
+    import llm_cache
+    from llm_client import chat_completion
+    from mock_llm_server import MockLLMServer
+
+    messages = [{'role': 'user', 'content': 'Analyze: space shooter with power-ups'}]
+    with tempfile.TemporaryDirectory() as directory, MockLLMServer(latency=0.2) as server:
+        cache = LLMResponseCache(os.path.join(directory, 'bench.sqlite3'))
+        llm_cache.set_response_cache(cache)  # the instance llm_client sees, not __main__'s
+
+        start = time.perf_counter()
+        chat_completion('mock-key', messages, url=server.chat_url)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(100):
+            chat_completion('mock-key', messages, url=server.chat_url)
+        warm = (time.perf_counter() - start) / 100
+
+        print("🗄️ LLM RESPONSE CACHE (local mock LLM, 200ms latency)")
+        print("=" * 50)
+        print(f"Cold call: {cold * 1000:.1f}ms, cached call: {warm * 1000:.3f}ms")
+        print(f"Upstream requests: {server.stats['requests']}")
+        print(f"Stats: {cache.get_stats()}")
+        cache.close()
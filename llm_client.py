@@ -0,0 +1,230 @@
+"""
+LLM Client - Shared HTTP Client for the FREE AI Backends
+One pooled, keep-alive requests.Session behind every llm_backends endpoint,
+so a multi-call generation doesn't pay TCP+TLS setup per call
+"""
+
+import os
+import json
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Any, Optional, Iterator
+from urllib.parse import urlsplit
+from llm_cache import get_response_cache
+from circuit_breaker import CircuitBreaker, get_breaker
+from rate_limiter import get_rate_limiter, payload_tokens, usage_tokens
+
+GROQ_CHAT_URL = os.environ.get('GROQ_BASE_URL', "https://api.groq.com/openai/v1/chat/completions")
+GROQ_MODEL = os.environ.get('GROQ_MODEL', "llama3-8b-8192")  # Free Groq model
+
+# Connection pool limits
+POOL_HOSTS = int(os.environ.get('LLM_POOL_HOSTS', 4))          # distinct hosts kept pooled
+POOL_MAXSIZE = int(os.environ.get('LLM_POOL_MAXSIZE', 10))     # keep-alive connections per host
+POOL_BLOCK = os.environ.get('LLM_POOL_BLOCK', 'true').lower() == 'true'  # wait instead of exceeding per-host limit
+
+_session = None
+_session_lock = threading.Lock()
+
+def create_http_session(pool_hosts: int = POOL_HOSTS, pool_maxsize: int = POOL_MAXSIZE,
+                        pool_block: bool = POOL_BLOCK) -> requests.Session:
+    """Session with a bounded keep-alive connection pool"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_maxsize, pool_block=pool_block)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def get_http_session() -> requests.Session:
+    """Process-wide pooled session shared by every AI engine"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_http_session()
+    return _session
+
+def reset_http_session():
+    """Close pooled connections (e.g. after fork or between benchmarks)"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+def backend_breaker(url: str) -> CircuitBreaker:
+    """Circuit breaker for the backend serving url (one per host)"""
+    return get_breaker(urlsplit(url).netloc)
+
+def is_backend_failure(status_code: int) -> bool:
+    """Statuses that count against a backend: overload, rate limiting, server errors"""
+    return status_code == 429 or status_code >= 500
+
+def refund_quota(limiter, tokens: int):
+    """Return a reservation for a call that produced no response"""
+    if limiter is not None and tokens:
+        limiter.settle(tokens, 0)
+
+def post_json(url: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None,
+              timeout: float = 30, session: Optional[requests.Session] = None) -> requests.Response:
+    """
+    POST a JSON payload over the pooled session (or session). Raises CircuitOpenError right
+    away while the backend's breaker is open; timeout is an upper bound that
+    shrinks to the backend's recent latency once enough calls have succeeded.
+    Quota-limited backends queue the call for rate-limiter tokens first.
+    """
+    breaker = backend_breaker(url)
+    breaker.check()
+    profile = payload.get('max_tokens')
+    
+    limiter = get_rate_limiter(url)
+    reserved = payload_tokens(payload) if limiter is not None else 0
+    held = 0   # tokens reserved so far, refunded if the call never completes
+    try:
+        if limiter is not None:
+            limiter.acquire(reserved)
+            held = reserved
+        start = time.perf_counter()
+        response = (session or get_http_session()).post(url, headers=headers or {}, json=payload,
+                                                        timeout=breaker.timeout(timeout, profile))
+    except requests.Timeout:
+        breaker.record_failure(timed_out=True)
+        refund_quota(limiter, held)
+        raise
+    except requests.RequestException:
+        breaker.record_failure()
+        refund_quota(limiter, held)
+        raise
+    except BaseException:
+        # No quota (RateLimitExceeded) or interrupted: neither success nor failure
+        breaker.release()
+        refund_quota(limiter, held)
+        raise
+    
+    if is_backend_failure(response.status_code):
+        breaker.record_failure()
+    else:
+        breaker.record_success(time.perf_counter() - start, profile)
+    
+    if limiter is not None:
+        used = None
+        if response.ok:
+            try:
+                used = usage_tokens(response.json())
+            except ValueError:
+                pass
+        limiter.observe(reserved, response.status_code, used, response.headers.get('Retry-After'))
+    return response
+
+def chat_completion(api_key: str, messages: List[Dict], temperature: float = 0.3, max_tokens: int = 1000,
+                    timeout: float = 30, url: str = GROQ_CHAT_URL, model: str = GROQ_MODEL,
+                    use_cache: bool = True, session: Optional[requests.Session] = None) -> str:
+    """OpenAI-compatible chat completion; returns the reply text"""
+    cache = get_response_cache() if use_cache else None
+    if cache is not None:
+        cached = cache.get(model, messages, temperature, max_tokens)
+        if cached is not None:
+            return cached
+    
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+
+    data = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens
+    }
+
+    response = post_json(url, data, headers=headers, timeout=timeout, session=session)
+    response.raise_for_status()
+
+    result = response.json()
+    content = result['choices'][0]['message']['content'].strip()
+    if cache is not None:
+        cache.put(model, messages, temperature, max_tokens, content)
+    return content
+
+def stream_chat_completion(api_key: str, messages: List[Dict], temperature: float = 0.3, max_tokens: int = 1000,
+                           timeout: float = 30, url: str = GROQ_CHAT_URL, model: str = GROQ_MODEL,
+                           use_cache: bool = True) -> Iterator[str]:
+    """
+    Streaming chat completion (OpenAI-style SSE); yields reply text deltas as
+    they arrive. timeout bounds the connect and each read, not the whole reply.
+    """
+    cache = get_response_cache() if use_cache else None
+    if cache is not None:
+        cached = cache.get(model, messages, temperature, max_tokens)
+        if cached is not None:
+            yield cached
+            return
+    
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+        "Accept": "text/event-stream"
+    }
+    
+    data = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stream": True
+    }
+    
+    breaker = backend_breaker(url)
+    breaker.check()
+    
+    limiter = get_rate_limiter(url)
+    reserved = payload_tokens(data) if limiter is not None else 0
+    held = 0
+    try:
+        if limiter is not None:
+            limiter.acquire(reserved)
+            held = reserved
+        start = time.perf_counter()
+        response = get_http_session().post(url, headers=headers, json=data, timeout=timeout, stream=True)
+    except requests.Timeout:
+        breaker.record_failure(timed_out=True)
+        refund_quota(limiter, held)
+        raise
+    except requests.RequestException:
+        breaker.record_failure()
+        refund_quota(limiter, held)
+        raise
+    except BaseException:
+        breaker.release()
+        refund_quota(limiter, held)
+        raise
+    
+    # Streams are judged on time to response headers
+    if is_backend_failure(response.status_code):
+        breaker.record_failure()
+    else:
+        breaker.record_success(time.perf_counter() - start, 'stream')
+    if limiter is not None and not response.ok:
+        limiter.observe(reserved, response.status_code, retry_after=response.headers.get('Retry-After'))
+    
+    parts = []
+    with response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line.startswith(b'data:'):
+                continue
+            payload = line[5:].strip()
+            if payload == b'[DONE]':
+                break
+            delta = json.loads(payload)['choices'][0].get('delta', {}).get('content')
+            if delta:
+                parts.append(delta)
+                yield delta
+    
+    # Streamed replies carry no usage block; settle on the estimated size
+    if limiter is not None:
+        limiter.settle(reserved, payload_tokens({'messages': messages + [{'content': ''.join(parts)}]}))
+    if cache is not None:
+        cache.put(model, messages, temperature, max_tokens, ''.join(parts).strip())
@@ -0,0 +1,363 @@
+"""
+Mock LLM Server - Local OpenAI-Compatible Stub for Benchmarks
+Serves /openai/v1/chat/completions (and Hugging Face-style /models/<name>)
+over HTTP/1.1 keep-alive with seeded latency distributions and canned
+per-stage replies, so the AI pipeline can be load-tested without network or quota
+"""
+
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Any, Optional, Union
+
+CHAT_PATH = '/openai/v1/chat/completions'
+TEXT_PATH = '/models/'
+
+def latency_sampler(spec: Union[float, str], seed: int = 0) -> Callable[[], float]:
+    """
+    Seconds-per-request sampler from a spec: a number (fixed),
+    'uniform:LOW:HIGH', 'lognormal:MEDIAN:SIGMA' or 'exponential:MEAN'.
+    Seeded, so a load test sees the same latency sequence on every run.
+    """
+    if isinstance(spec, (int, float)):
+        return lambda: float(spec)
+
+    kind, _, args = spec.partition(':')
+    params = [float(value) for value in args.split(':') if value]
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def sampled(draw: Callable[[], float]) -> Callable[[], float]:
+        def sample() -> float:
+            with lock:
+                return max(0.0, draw())
+        return sample
+
+    if not params:
+        fixed = float(kind)
+        return lambda: fixed
+    if kind == 'uniform' and len(params) == 2:
+        return sampled(lambda: rng.uniform(params[0], params[1]))
+    if kind == 'lognormal' and len(params) == 2:
+        return sampled(lambda: rng.lognormvariate(math.log(params[0]), params[1]))
+    if kind == 'exponential' and len(params) == 1:
+        return sampled(lambda: rng.expovariate(1.0 / params[0]))
+    raise ValueError(f"Unknown latency spec '{spec}'")
+
+# Canned replies keyed by a phrase unique to each FREE AI stage's system message
+CANNED_ANALYSIS = {
+    'genre': 'action', 'mechanics': ['movement', 'shooting', 'dodging'], 'theme': 'sci-fi',
+    'visual_style': 'sci-fi', 'complexity': 'medium', 'objective': 'Survive waves of enemies',
+    'target_audience': 'all', 'estimated_playtime': '5-15min'
+}
+
+CANNED_TEMPLATE = {
+    'game_structure': {
+        'title': 'Stub Arena', 'rules': ['Move with arrows', 'Avoid enemies', 'Collect stars'],
+        'win_condition': 'Reach 1000 points', 'lose_condition': 'Lose all lives',
+        'scoring_system': '10 points per star', 'difficulty_progression': 'Faster enemies each level'
+    },
+    'visual_design': {
+        'color_palette': ['#00ffff', '#ff00ff', '#ffff00', '#00ff00'],
+        'background_style': 'linear-gradient(135deg, #0f0c29, #302b63)', 'player_design': 'Glowing circle',
+        'enemy_design': 'Red squares', 'ui_style': 'Neon HUD', 'animation_style': 'Smooth easing'
+    },
+    'gameplay_mechanics': {
+        'movement': 'Arrow keys with momentum', 'interaction': 'Collision', 'physics': 'None',
+        'collision': 'Bounding boxes', 'spawning': 'Timed waves', 'progression': 'Levels every 200 points'
+    },
+    'ui_elements': {
+        'hud': ['score', 'lives', 'level'], 'controls': 'Arrow keys or touch',
+        'feedback': 'Flashes and popups', 'menus': 'Start and game over'
+    },
+    'code_architecture': {
+        'html_structure': 'Container, canvas, HUD', 'css_classes': ['game-container', 'player', 'enemy'],
+        'js_functions': ['gameLoop', 'startGame', 'checkCollisions'], 'game_loop': 'requestAnimationFrame',
+        'event_handling': 'Keyboard and touch listeners'
+    }
+}
+
+CANNED_GAME_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>Stub Arena</title>
+<style>
+body { margin: 0; background: linear-gradient(135deg, #0f0c29, #302b63); color: #fff; font-family: Arial, sans-serif; }
+.game-container { position: relative; width: 100vw; height: 100vh; overflow: hidden; }
+#hud { position: absolute; top: 10px; left: 10px; font-size: 18px; text-shadow: 0 0 8px #00ffff; }
+#start { position: absolute; top: 50%; left: 50%; transform: translate(-50%, -50%); padding: 12px 32px;
+         font-size: 20px; border: none; border-radius: 24px; background: #ff00ff; color: #fff; cursor: pointer; }
+canvas { display: block; width: 100%; height: 100%; }
+</style>
+</head>
+<body>
+<div class="game-container">
+<canvas id="game"></canvas>
+<div id="hud">Score: <span id="score">0</span> Lives: <span id="lives">3</span></div>
+<button id="start" onclick="startGame()">Start</button>
+</div>
+<script>
+const canvas = document.getElementById('game');
+const ctx = canvas.getContext('2d');
+const player = { x: 0, y: 0, r: 14, vx: 0, vy: 0 };
+let enemies = [], stars = [], keys = {}, score = 0, lives = 3, running = false, last = 0;
+function resize() { canvas.width = innerWidth; canvas.height = innerHeight; }
+addEventListener('resize', resize); resize();
+addEventListener('keydown', e => keys[e.key] = true);
+addEventListener('keyup', e => keys[e.key] = false);
+canvas.addEventListener('touchmove', e => { player.x = e.touches[0].clientX; player.y = e.touches[0].clientY; });
+function startGame() {
+  Object.assign(player, { x: canvas.width / 2, y: canvas.height / 2, vx: 0, vy: 0 });
+  enemies = []; stars = []; score = 0; lives = 3; running = true;
+  document.getElementById('start').style.display = 'none';
+  requestAnimationFrame(gameLoop);
+}
+function spawn() {
+  if (Math.random() < 0.02 + score / 50000) enemies.push({ x: Math.random() * canvas.width, y: -20, s: 2 + score / 300 });
+  if (Math.random() < 0.01) stars.push({ x: Math.random() * canvas.width, y: Math.random() * canvas.height });
+}
+function checkCollisions() {
+  enemies = enemies.filter(e => {
+    if (Math.hypot(e.x - player.x, e.y - player.y) < player.r + 10) { lives--; return false; }
+    return e.y < canvas.height + 20;
+  });
+  stars = stars.filter(s => {
+    if (Math.hypot(s.x - player.x, s.y - player.y) < player.r + 8) { score += 10; return false; }
+    return true;
+  });
+}
+function gameLoop(now) {
+  if (!running) return;
+  const dt = Math.min(32, now - last || 16) / 16; last = now;
+  player.vx += ((keys.ArrowRight ? 1 : 0) - (keys.ArrowLeft ? 1 : 0)) * 0.8 * dt;
+  player.vy += ((keys.ArrowDown ? 1 : 0) - (keys.ArrowUp ? 1 : 0)) * 0.8 * dt;
+  player.vx *= 0.9; player.vy *= 0.9; player.x += player.vx * dt; player.y += player.vy * dt;
+  spawn(); enemies.forEach(e => e.y += e.s * dt); checkCollisions();
+  ctx.clearRect(0, 0, canvas.width, canvas.height);
+  ctx.fillStyle = '#00ffff'; ctx.beginPath(); ctx.arc(player.x, player.y, player.r, 0, Math.PI * 2); ctx.fill();
+  ctx.fillStyle = '#ff4444'; enemies.forEach(e => ctx.fillRect(e.x - 10, e.y - 10, 20, 20));
+  ctx.fillStyle = '#ffff00'; stars.forEach(s => ctx.fillRect(s.x - 4, s.y - 4, 8, 8));
+  document.getElementById('score').textContent = score;
+  document.getElementById('lives').textContent = lives;
+  if (lives <= 0) { running = false; document.getElementById('start').style.display = 'block'; return; }
+  requestAnimationFrame(gameLoop);
+}
+</script>
+</body>
+</html>"""
+
+CANNED_REPLIES = {
+    'analyzes game concepts': json.dumps(CANNED_ANALYSIS),
+    'creates detailed, implementable game templates': json.dumps(CANNED_TEMPLATE),
+    'optimizes game templates': json.dumps(CANNED_TEMPLATE),
+    'creates complete, professional HTML games': CANNED_GAME_HTML,
+    'optimizes web games': CANNED_GAME_HTML
+}
+
+def canned_reply(request: Dict[str, Any]) -> Optional[str]:
+    """Stage-appropriate reply for a FREE AI engine request (None if the stage isn't recognized)"""
+    messages = request.get('messages') or []
+    system = messages[0].get('content', '') if messages and messages[0].get('role') == 'system' else ''
+    for phrase, reply in CANNED_REPLIES.items():
+        if phrase in system:
+            return reply
+    return None
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """Answers chat completions with a fixed JSON reply"""
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    disable_nagle_algorithm = True  # headers and body are separate writes
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.stats['connections'] += 1
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+
+        with self.server.stats_lock:
+            self.server.stats['requests'] += 1
+
+        if self.path != CHAT_PATH and not self.path.startswith(TEXT_PATH):
+            self._send_json(404, {'error': {'message': f'Unknown path {self.path}'}})
+            return
+
+        delay = self.server.next_latency()
+        if delay:
+            time.sleep(delay)
+
+        if self.path.startswith(TEXT_PATH):
+            prompt = str(request.get('inputs', ''))
+            self._send_json(200, [{'generated_text': prompt + '\n' + self.server.reply}])
+            return
+
+        reply = self.server.reply_for(request)
+        if request.get('stream'):
+            self._send_stream(request.get('model', 'mock'), reply)
+            return
+
+        prompt_tokens = sum(len(str(message.get('content', ''))) for message in request.get('messages', [])) // 4
+        self._send_json(200, {
+            'id': 'mock-completion',
+            'object': 'chat.completion',
+            'model': request.get('model', 'mock'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': reply},
+                'finish_reason': 'stop'
+            }],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': len(reply) // 4,
+                      'total_tokens': prompt_tokens + len(reply) // 4}
+        })
+
+    def _send_json(self, status: int, body: Any):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_stream(self, model: str, reply: str):
+        """SSE over chunked transfer encoding, one delta per stream_chunk_size characters"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        size = self.server.stream_chunk_size
+        deltas = [{'role': 'assistant', 'content': reply[i:i + size]} for i in range(0, len(reply), size)]
+        try:
+            for delta in deltas:
+                event = {'id': 'mock-completion', 'object': 'chat.completion.chunk', 'model': model,
+                         'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]}
+                self._write_chunk(f'data: {json.dumps(event)}\n\n'.encode('utf-8'))
+                if self.server.stream_interval:
+                    time.sleep(self.server.stream_interval)
+            self._write_chunk(b'data: [DONE]\n\n')
+            self._write_chunk(b'')
+        except (BrokenPipeError, ConnectionResetError):
+            # Client stopped reading early (e.g. it already had the JSON it needed)
+            self.close_connection = True
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+class MockLLMServer(ThreadingHTTPServer):
+    """
+    Threaded stub server; use start()/stop() or as a context manager.
+    latency is seconds or a latency_sampler() spec; with canned=True the
+    FREE AI stages get realistic replies instead of the fixed one.
+    """
+    daemon_threads = True
+    request_queue_size = 128  # concurrent benchmark clients connect at once
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: Union[float, str] = 0.0,
+                 reply: str = '{"genre": "action", "mechanics": ["movement"], "theme": "sci-fi"}',
+                 stream_chunk_size: int = 16, stream_interval: float = 0.0, canned: bool = False, seed: int = 0):
+        super().__init__((host, port), MockLLMHandler)
+        self.reply = reply
+        self.canned = canned
+        self.seed = seed
+        self.latency = latency
+        self.stream_chunk_size = stream_chunk_size
+        self.stream_interval = stream_interval
+        self.stats = {'connections': 0, 'requests': 0}
+        self.stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def latency(self) -> Union[float, str]:
+        return self._latency
+
+    @latency.setter
+    def latency(self, spec: Union[float, str]):
+        self._latency = spec
+        self.next_latency = latency_sampler(spec, self.seed)
+
+    def reply_for(self, request: Dict[str, Any]) -> str:
+        if self.canned:
+            reply = canned_reply(request)
+            if reply is not None:
+                return reply
+        return self.reply
+
+    @property
+    def chat_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}{CHAT_PATH}'
+
+    @property
+    def text_url(self) -> str:
+        """Base URL for Hugging Face-style text generation (append the model name)"""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}{TEXT_PATH.rstrip("/")}'
+
+    def start(self) -> 'MockLLMServer':
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def benchmark_connection_reuse(calls: int = 200) -> Dict[str, Any]:
+    """Compare one-shot requests.post against the shared pooled session"""
+    import requests
+    from llm_client import chat_completion, reset_http_session
+
+    messages = [{'role': 'user', 'content': 'Analyze: space shooter'}]
+    results = {}
+
+    with MockLLMServer() as server:
+        start = time.perf_counter()
+        for _ in range(calls):
+            response = requests.post(server.chat_url, json={'messages': messages}, timeout=10)
+            response.raise_for_status()
+        results['unpooled'] = {
+            'seconds': time.perf_counter() - start,
+            'connections': server.stats['connections']
+        }
+
+        server.stats['connections'] = 0
+        reset_http_session()
+        start = time.perf_counter()
+        for _ in range(calls):
+            chat_completion('mock-key', messages, url=server.chat_url, use_cache=False)
+        results['pooled'] = {
+            'seconds': time.perf_counter() - start,
+            'connections': server.stats['connections']
+        }
+        reset_http_session()
+
+    results['calls'] = calls
+    results['speedup'] = results['unpooled']['seconds'] / results['pooled']['seconds']
+    return results
+
+if __name__ == "__main__":
+    result = benchmark_connection_reuse()
+    print("🔌 CONNECTION REUSE BENCHMARK (local mock LLM)")
+    print("=" * 50)
+    for label in ('unpooled', 'pooled'):
+        entry = result[label]
+        print(f"{label:>9}: {entry['seconds'] * 1000 / result['calls']:.2f} ms/call, "
+              f"{entry['connections']} TCP connections for {result['calls']} calls")
+    print(f"Speedup: {result['speedup']:.2f}x")
@@ -0,0 +1,245 @@
+"""
+Page Compression - Minified, Precompressed Game Pages
+Strips comments, indentation and console.log banners from game HTML and its
+inline CSS/JS, then gzips (and brotlis, when available) the result once so
+play_game only has to pick the encoding the browser accepts
+"""
+
+import gzip
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# Server preference when the client accepts several encodings equally
+ENCODING_PREFERENCE = ('br', 'gzip', 'identity')
+
+# Comments, and elements whose text must not be reflowed (script/style get their own minifiers)
+_HTML_SEGMENT = re.compile(
+    r"<!--(?!\[if).*?-->"
+    r"|<(?P<tag>script|style|pre|textarea)\b(?P<attrs>(?:[^>\"']|\"[^\"]*\"|'[^']*')*)>(?P<body>.*?)</(?P=tag)\s*>",
+    re.IGNORECASE | re.DOTALL
+)
+_HTML_TEXT_WHITESPACE = re.compile(r"""(?P<tag><[a-zA-Z/!](?:[^>"']|"[^"]*"|'[^']*')*>)|\s+""")
+_SCRIPT_TYPE = re.compile(r"""\btype\s*=\s*["']?([^"'\s>]+)""", re.IGNORECASE)
+_JS_TYPES = ('', 'text/javascript', 'application/javascript', 'module')
+
+# JS literals and comments; a '/' is a regex literal only where an operand may start (see _regex_allowed)
+_JS_TOKEN = re.compile(
+    r"""(?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')"""
+    r"|(?P<template>`(?:[^`\\]|\\.)*`)"
+    r"|(?P<line_comment>//[^\n]*)"
+    r"|(?P<block_comment>/\*.*?\*/)"
+    r"|(?P<regex>/(?![*/])(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-z]*)",
+    re.DOTALL
+)
+_REGEX_KEYWORDS = ('return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw', 'case', 'do', 'else')
+_TRAILING_WORD = re.compile(r'[A-Za-z_$][\w$]*$')
+
+# Literals are swapped for placeholders while code is rewritten, so quotes never confuse the patterns
+_PLACEHOLDER = re.compile('\x00(\\d+)\x00')
+# A whole console.log(...) statement with at most one level of nested parentheses
+_CONSOLE_LOG = re.compile(r'console\.log\((?:[^()\n]|\([^()\n]*\))*\)[ \t]*;?')
+_CSS_STRING = re.compile(r""""(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*'""")
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+
+def _protect(literals: List[str], literal: str) -> str:
+    literals.append(literal)
+    return f'\x00{len(literals) - 1}\x00'
+
+def _restore(code: str, literals: List[str]) -> str:
+    return _PLACEHOLDER.sub(lambda match: literals[int(match.group(1))], code)
+
+def _regex_allowed(parts: List[str]) -> bool:
+    """Whether a '/' after the code emitted so far starts a regex literal rather than a division"""
+    stripped = next((part.rstrip() for part in reversed(parts) if part.strip()), '')
+    if not stripped:
+        return True
+    if stripped[-1] in ')]}\x00' or stripped[-1].isalnum() or stripped[-1] in '_$':
+        word = _TRAILING_WORD.search(stripped)
+        return bool(word) and word.group(0) in _REGEX_KEYWORDS
+    return True
+
+def _statement_start(code: str, position: int) -> bool:
+    previous = code[:position].rstrip()
+    return not previous or previous[-1] in ';{}'
+
+def minify_js(code: str) -> str:
+    """
+    Comment, indentation and console.log removal only; line breaks are kept
+    so automatic semicolon insertion sees the same statements
+    """
+    literals: List[str] = []
+    parts = []
+    position = 0
+    while True:
+        match = _JS_TOKEN.search(code, position)
+        if match is None:
+            parts.append(code[position:])
+            break
+        parts.append(code[position:match.start()])
+        kind, text = match.lastgroup, match.group(0)
+        if kind == 'regex' and not _regex_allowed(parts):
+            # A division: emit the slash and rescan right after it
+            parts.append('/')
+            position = match.start() + 1
+            continue
+        if kind == 'line_comment':
+            pass
+        elif kind == 'block_comment':
+            parts.append('\n' if '\n' in text else ' ')
+        else:
+            parts.append(_protect(literals, text))
+        position = match.end()
+
+    code = ''.join(parts)
+    code = _CONSOLE_LOG.sub(
+        lambda match: '' if _statement_start(match.string, match.start()) else match.group(0), code)
+    lines = (re.sub(r'[ \t]+', ' ', line).strip() for line in code.split('\n'))
+    return _restore('\n'.join(line for line in lines if line), literals)
+
+def minify_css(css: str) -> str:
+    literals: List[str] = []
+    css = _CSS_STRING.sub(lambda match: _protect(literals, match.group(0)), css)
+    css = _CSS_COMMENT.sub('', css)
+    css = re.sub(r'\s+', ' ', css)
+    css = _CSS_PUNCTUATION.sub(r'\1', css)
+    # Only after a colon: a space before one is a descendant combinator ("div :hover")
+    css = re.sub(r':\s+', ':', css).replace(';}', '}')
+    return _restore(css.strip(), literals)
+
+def _collapse_whitespace(text: str) -> str:
+    # One whitespace character keeps inline elements apart exactly as before; tags are left untouched
+    return _HTML_TEXT_WHITESPACE.sub(
+        lambda match: match.group(0) if match.group('tag') else ('\n' if '\n' in match.group(0) else ' '), text)
+
+def minify_html(html: str) -> str:
+    """Minify markup outside pre/textarea, and inline style/script blocks with their own rules"""
+    parts = []
+    position = 0
+    for match in _HTML_SEGMENT.finditer(html):
+        parts.append(_collapse_whitespace(html[position:match.start()]))
+        position = match.end()
+
+        tag = match.group('tag')
+        if tag is None:
+            continue   # comment
+        tag = tag.lower()
+        body = match.group('body')
+        if tag == 'style':
+            body = minify_css(body)
+        elif tag == 'script':
+            script_type = _SCRIPT_TYPE.search(match.group('attrs'))
+            if (script_type.group(1).lower() if script_type else '') in _JS_TYPES:
+                body = minify_js(body)
+        if tag in ('style', 'script'):
+            start_tag = match.group(0)[:match.start('body') - match.start()]
+            parts.append(f"{start_tag}{body}</{tag}>")
+        else:
+            parts.append(match.group(0))
+    parts.append(_collapse_whitespace(html[position:]))
+    return ''.join(parts).strip()
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Accept-Encoding → {coding: q}; identity is acceptable unless refused"""
+    accepted = {}
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    if '*' in accepted:
+        for coding in ENCODING_PREFERENCE:
+            accepted.setdefault(coding, accepted['*'])
+    accepted.setdefault('identity', 1.0)
+    return accepted
+
+@dataclass(frozen=True)
+class CompressedPage:
+    """A page's bytes in every encoding we serve, built once"""
+    identity: bytes
+    gzip: bytes
+    br: Optional[bytes]
+    original_size: int
+    content_hash: str     # of the served (minified) bytes
+
+    def etag(self, coding: Optional[str] = None) -> str:
+        """Strong validator; each encoding is a different representation, so gets its own"""
+        return f"{self.content_hash}-{coding}" if coding else self.content_hash
+
+    def encoded(self, coding: str) -> Optional[bytes]:
+        return {'identity': self.identity, 'gzip': self.gzip, 'br': self.br}.get(coding)
+
+    def negotiate(self, accept_encoding: str) -> Tuple[Optional[str], bytes]:
+        """(Content-Encoding or None for identity, body) for a request's Accept-Encoding"""
+        accepted = _accepted_encodings(accept_encoding)
+        candidates = [coding for coding in ENCODING_PREFERENCE
+                      if accepted.get(coding, 0) > 0 and self.encoded(coding) is not None]
+        if not candidates:
+            return None, self.identity   # 406 helps no one; identity always renders
+        coding = max(candidates, key=lambda coding: accepted[coding])
+        return (None if coding == 'identity' else coding), self.encoded(coding)
+
+    def sizes(self) -> Dict[str, int]:
+        sizes = {'original': self.original_size, 'minified': len(self.identity), 'gzip': len(self.gzip)}
+        if self.br is not None:
+            sizes['br'] = len(self.br)
+        return sizes
+
+def compress_page(html: str) -> CompressedPage:
+    """Minify and precompress a game page; falls back to the original markup if minifying breaks it"""
+    from html_validator import quick_check
+
+    minified = minify_html(html)
+    if quick_check(html) != quick_check(minified):
+        print("Minified page failed validation, serving it unminified")
+        minified = html
+
+    body = minified.encode('utf-8')
+    return CompressedPage(
+        identity=body,
+        gzip=gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0),
+        br=brotli.compress(body, quality=BROTLI_QUALITY) if brotli is not None else None,
+        original_size=len(html.encode('utf-8')),
+        content_hash=hashlib.sha256(body).hexdigest()[:32]
+    )
+
+if __name__ == "__main__":
+    import time
+    from html_validator import local_templates
+
+    templates = local_templates()
+    print("🗜️  GAME PAGE COMPRESSION (local templates)")
+    print("=" * 50)
+    totals = {}
+    start = time.perf_counter()
+    for name, html in templates.items():
+        page = compress_page(html)
+        for key, size in page.sizes().items():
+            totals[key] = totals.get(key, 0) + size
+        print(f"{name:>38}: {page.original_size:6d} → {len(page.identity):6d} minified, {len(page.gzip):5d} gzip")
+    elapsed = (time.perf_counter() - start) / len(templates) * 1000
+
+    print(f"Total bytes: {totals}")
+    for key in ('minified', 'gzip', 'br'):
+        if key in totals:
+            print(f"{key:>9}: {totals['original'] / totals[key]:.1f}x smaller than the original")
+    print(f"Store-time cost: {elapsed:.1f}ms per page (brotli {'on' if brotli else 'not installed'})")
@@ -0,0 +1,200 @@
+"""
+Prompt Builder - Token-Budgeted Chat Messages for the FREE AI Engines
+Static instructions live in fixed system messages (built once, identical on
+every call), dynamic payloads are serialized compactly, and each stage's
+request is held to a token budget measured with a local approximate tokenizer
+"""
+
+import json
+import os
+import re
+import textwrap
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+# Words, punctuation and runs of indentation/newlines; long words count as one
+# token per ~4 characters, which tracks BPE tokenizers closely enough for budgeting
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]|\s{2,}|\n")
+CHARS_PER_TOKEN = 4
+
+# Per-stage budget for the whole request (system + user), in approximate tokens
+PROMPT_TOKEN_BUDGETS = {
+    'analysis': int(os.environ.get('LLM_BUDGET_ANALYSIS', 500)),
+    'template': int(os.environ.get('LLM_BUDGET_TEMPLATE', 900)),
+    'enhancement': int(os.environ.get('LLM_BUDGET_ENHANCEMENT', 900)),
+    'game_code': int(os.environ.get('LLM_BUDGET_GAME_CODE', 600)),
+    'optimization': int(os.environ.get('LLM_BUDGET_OPTIMIZATION', 600))
+}
+
+# Share of a stage's budget the per-call payload is always guaranteed, even if the
+# instructions then have to be cut; a request with no payload has no task
+MIN_USER_SHARE = float(os.environ.get('LLM_BUDGET_MIN_USER_SHARE', 0.25))
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count, no tokenizer dependency"""
+    return sum((len(piece) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN for piece in _TOKEN_PATTERN.findall(text))
+
+def compact_json(value: Any) -> str:
+    """JSON without indentation or padding (FrozenDicts serialize as plain dicts)"""
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+@lru_cache(maxsize=None)
+def system_message(text: str) -> Tuple[Dict[str, str], int]:
+    """Dedented, blank-line-free system message and its token count, built once per distinct text"""
+    lines = [line.rstrip() for line in textwrap.dedent(text).strip().splitlines()]
+    content = '\n'.join(line for line in lines if line)
+    return {"role": "system", "content": content}, estimate_tokens(content)
+
+def fit_to_budget(text: str, budget: int, marker: str = '…') -> str:
+    """Longest prefix of text within budget tokens (whole text if it already fits)"""
+    if budget <= 0:
+        return ''
+    if estimate_tokens(text) <= budget:
+        return text
+
+    # Binary search on the cut point; token estimate is monotonic in prefix length
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) + 1 <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low] + marker
+
+MIN_TRIMMED_STRING = 16   # chars; strings are never shortened below this before fields are dropped
+
+def _trim_candidates(value: Any, container: Any = None, key: Any = None):
+    """(container, key, item) for every string and list inside value"""
+    if isinstance(value, str):
+        yield container, key, value
+    elif isinstance(value, (list, dict)):
+        if isinstance(value, list):
+            yield container, key, value
+        for child_key, child in (value.items() if isinstance(value, dict) else enumerate(value)):
+            yield from _trim_candidates(child, value, child_key)
+
+def fit_json_to_budget(value: Any, budget: int, marker: str = '…') -> str:
+    """
+    Compact JSON for value within budget tokens that is still valid JSON:
+    the longest strings are halved first, then the longest lists lose their
+    last items, then trailing dict fields (callers put the least important
+    last) are dropped
+    """
+    text = compact_json(value)
+    if estimate_tokens(text) <= budget:
+        return text
+
+    value = json.loads(text)   # plain, mutable copy
+    while True:
+        candidates = [entry for entry in _trim_candidates(value) if entry[0] is not None]
+        strings = [entry for entry in candidates if isinstance(entry[2], str) and len(entry[2]) > MIN_TRIMMED_STRING + len(marker)]
+        lists = [entry for entry in candidates if isinstance(entry[2], list) and len(entry[2]) > 1]
+        if strings:
+            container, key, item = max(strings, key=lambda entry: len(entry[2]))
+            container[key] = item[:max(MIN_TRIMMED_STRING, len(item) // 2)] + marker
+        elif lists:
+            max(lists, key=lambda entry: len(entry[2]))[2].pop()
+        elif isinstance(value, dict) and value:
+            value.popitem()
+        elif isinstance(value, str) and len(value) > MIN_TRIMMED_STRING + len(marker):
+            value = value[:max(MIN_TRIMMED_STRING, len(value) // 2)] + marker
+        else:
+            return compact_json(value)   # nothing left to trim
+        text = compact_json(value)
+        if estimate_tokens(text) <= budget:
+            return text
+
+class PromptBuilder:
+    """
+    Assembles [system, user] messages within each stage's budget and records
+    the tokens sent per stage
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None):
+        self.budgets = dict(PROMPT_TOKEN_BUDGETS if budgets is None else budgets)
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def build(self, stage: str, system: str, user: str, data: Any = None) -> List[Dict[str, str]]:
+        """
+        Messages for one call; the user message is user followed by data as
+        compact JSON when data is given. When over budget the per-call part is
+        trimmed (data field by field, so it stays valid JSON; plain text by
+        prefix), but never below MIN_USER_SHARE of the budget: instructions
+        that would leave less are cut first, with a warning.
+        """
+        system_msg, system_tokens = system_message(system)
+        text = user + compact_json(data) if data is not None else user
+        user_tokens = estimate_tokens(text)
+
+        budget = self.budgets.get(stage)
+        trimmed = system_trimmed = False
+        if budget is not None and system_tokens + user_tokens > budget:
+            user_floor = min(user_tokens, max(1, int(budget * MIN_USER_SHARE)))
+            if budget - user_floor <= 0:
+                raise ValueError(f"Prompt budget for '{stage}' ({budget} tokens) leaves no room for instructions")
+            if system_tokens > budget - user_floor:
+                print(f"Prompt for '{stage}': instructions ({system_tokens} tokens) leave under "
+                      f"{user_floor} of {budget} tokens for the payload; trimming the instructions")
+                content = fit_to_budget(system_msg['content'], budget - user_floor)
+                system_msg, system_tokens = {"role": "system", "content": content}, estimate_tokens(content)
+                system_trimmed = True
+        if budget is not None and system_tokens + user_tokens > budget:
+            if data is not None:
+                text = user + fit_json_to_budget(data, budget - system_tokens - estimate_tokens(user))
+            else:
+                text = fit_to_budget(user, budget - system_tokens)
+            user_tokens = estimate_tokens(text)
+            trimmed = True
+        user = text
+
+        with self._lock:
+            entry = self._stats.setdefault(stage, {'calls': 0, 'tokens_sent': 0, 'system_tokens': 0,
+                                                   'user_tokens': 0, 'trimmed': 0, 'system_trimmed': 0})
+            entry['calls'] += 1
+            entry['tokens_sent'] += system_tokens + user_tokens
+            entry['system_tokens'] += system_tokens
+            entry['user_tokens'] += user_tokens
+            entry['trimmed'] += trimmed
+            entry['system_trimmed'] += system_trimmed
+
+        return [system_msg, {"role": "user", "content": user}]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                stage: {
+                    **entry,
+                    'budget': self.budgets.get(stage),
+                    'avg_tokens_per_call': round(entry['tokens_sent'] / entry['calls'], 1) if entry['calls'] else 0
+                }
+                for stage, entry in self._stats.items()
+            }
+
+# Shared by FreeAITemplateEngine and FreeAICodeGenerator
+prompt_builder = PromptBuilder()
+
+if __name__ == "__main__":
+    from free_ai_template_engine import FreeAITemplateEngine
+    from free_ai_code_generator import FreeAICodeGenerator
+    from prompt_builder import prompt_builder as shared_builder  # the engines' instance, not __main__'s
+
+    template_engine = FreeAITemplateEngine()
+    code_generator = FreeAICodeGenerator()
+    concept = template_engine._fallback_analysis('make a space shooter with lasers and power-ups')
+    template = template_engine._fallback_template(concept)
+
+    template_engine._analysis_request('make a space shooter with lasers and power-ups')
+    template_engine._template_request(concept)
+    template_engine._enhancement_request(template, 'quality')
+    code_generator._game_code_request(template)
+    code_generator._optimization_request(code_generator._fallback_complete_game(template))
+
+    print("✂️ PROMPT TOKENS PER STAGE (approximate)")
+    print("=" * 50)
+    for stage, entry in shared_builder.get_stats().items():
+        print(f"{stage:>12}: {entry['tokens_sent']:4d} tokens "
+              f"(system {entry['system_tokens']}, payload {entry['user_tokens']}, budget {entry['budget']}"
+              f"{', trimmed' if entry['trimmed'] else ''})")
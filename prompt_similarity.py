@@ -0,0 +1,260 @@
+"""
+Prompt Similarity - MinHash/LSH Index for Near-Duplicate Prompts
+CPU-only lookup of previously analyzed prompts, so "make a space shooter game"
+and "create space shooter" share one AI analysis instead of two
+"""
+
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+# Words that describe the request, not the game
+STOPWORDS = frozenset("""
+a an the and or of to for with in on at by from into me my i we us you your
+please make create build generate design write code develop want need would like
+can could some simple game games play playable where which that this its it is be
+""".split())
+
+CONCEPT_CACHE_THRESHOLD = float(os.environ.get('CONCEPT_CACHE_THRESHOLD', 0.7))
+CONCEPT_CACHE_SIZE = int(os.environ.get('CONCEPT_CACHE_SIZE', 2048))
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase content words, request phrasing and naive plurals stripped"""
+    words = []
+    for word in re.findall(r'[a-z0-9]+', prompt.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        words.append(word)
+    return ' '.join(words)
+
+def shingle_hashes(normalized: str, k: int = 3) -> FrozenSet[int]:
+    """Hashed character k-grams; robust to word order and small spelling changes"""
+    padded = f' {normalized} '
+    if len(padded) <= k:
+        return frozenset([zlib.crc32(padded.encode('utf-8'))])
+    return frozenset(zlib.crc32(padded[i:i + k].encode('utf-8')) for i in range(len(padded) - k + 1))
+
+def jaccard(left: FrozenSet[int], right: FrozenSet[int]) -> float:
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
+
+class PromptSimilarityIndex:
+    """
+    Bounded (LRU) map from prompts to values with near-duplicate lookup.
+    LSH buckets propose candidates; exact shingle Jaccard confirms them.
+    """
+
+    def __init__(self, threshold: float = CONCEPT_CACHE_THRESHOLD, max_entries: int = CONCEPT_CACHE_SIZE,
+                 bands: int = 16, rows: int = 4, seed: int = 1):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.bands = bands
+        self.rows = rows
+
+        rng = random.Random(seed)
+        self._permutations = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                              for _ in range(bands * rows)]
+
+        self._entries = OrderedDict()   # normalized prompt -> (shingles, band keys, value)
+        self._buckets = [{} for _ in range(bands)]   # band -> band key -> set of normalized prompts
+        self._lock = threading.Lock()
+        self.stats = {'exact_hits': 0, 'near_hits': 0, 'misses': 0, 'candidates_checked': 0}
+
+    def _signature(self, shingles: FrozenSet[int]) -> List[int]:
+        return [min(((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH for value in shingles)
+                for a, b in self._permutations]
+
+    def _band_keys(self, shingles: FrozenSet[int]) -> Tuple[int, ...]:
+        signature = self._signature(shingles)
+        rows = self.rows
+        return tuple(hash(tuple(signature[band * rows:(band + 1) * rows])) for band in range(self.bands))
+
+    def lookup(self, prompt: str) -> Optional[Tuple[Any, float]]:
+        """(value, similarity) of the closest stored prompt above threshold, else None"""
+        normalized = normalize_prompt(prompt)
+
+        with self._lock:
+            entry = self._entries.get(normalized)
+            if entry is not None:
+                self._entries.move_to_end(normalized)
+                self.stats['exact_hits'] += 1
+                return entry[2], 1.0
+
+        shingles = shingle_hashes(normalized)
+        band_keys = self._band_keys(shingles)
+
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(band_keys):
+                candidates.update(self._buckets[band].get(key, ()))
+            self.stats['candidates_checked'] += len(candidates)
+
+            best, best_score = None, self.threshold
+            for candidate in candidates:
+                score = jaccard(shingles, self._entries[candidate][0])
+                if score >= best_score:
+                    best, best_score = candidate, score
+
+            if best is None:
+                self.stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(best)
+            self.stats['near_hits'] += 1
+            return self._entries[best][2], best_score
+
+    def add(self, prompt: str, value: Any):
+        normalized = normalize_prompt(prompt)
+        shingles = shingle_hashes(normalized)
+        band_keys = self._band_keys(shingles)
+
+        with self._lock:
+            if normalized in self._entries:
+                self._remove(normalized)
+            self._entries[normalized] = (shingles, band_keys, value)
+            for band, key in enumerate(band_keys):
+                self._buckets[band].setdefault(key, set()).add(normalized)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, normalized: str):
+        _, band_keys, _ = self._entries.pop(normalized)
+        for band, key in enumerate(band_keys):
+            bucket = self._buckets[band][key]
+            bucket.discard(normalized)
+            if not bucket:
+                del self._buckets[band][key]
+
+    def linear_lookup(self, prompt: str) -> Optional[Tuple[Any, float]]:
+        """Brute-force reference for lookup() (benchmarks only)"""
+        shingles = shingle_hashes(normalize_prompt(prompt))
+        best, best_score = None, self.threshold
+        for candidate_shingles, _, value in self._entries.values():
+            score = jaccard(shingles, candidate_shingles)
+            if score >= best_score:
+                best, best_score = value, score
+        return (best, best_score) if best is not None else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['exact_hits'] + self.stats['near_hits'] + self.stats['misses']
+        return {
+            'entries': len(self._entries),
+            'threshold': self.threshold,
+            'lookups': lookups,
+            'hit_rate': (self.stats['exact_hits'] + self.stats['near_hits']) / lookups if lookups else 0.0,
+            **self.stats
+        }
+
+# Benchmark corpus: paraphrases of a concept should hit, other concepts should miss
+BENCHMARK_CONCEPTS = [
+    'space shooter', 'zombie survival', 'tower defense', 'racing car', 'match 3 puzzle',
+    'dragon adventure', 'platformer with jumping ninja', 'underwater treasure hunt', 'snake',
+    'tetris puzzle', 'farming simulator', 'basketball shootout', 'pirate ship battle',
+    'cooking time management', 'maze escape', 'asteroid mining', 'wizard duel',
+    'endless runner in the city', 'bubble shooter', 'fishing'
+]
+
+PARAPHRASES = [
+    'make a {} game', 'create {}', 'I want a {} game', 'build me a simple {} game',
+    'please generate a {} game', '{} games', 'can you make a playable {}'
+]
+
+# Same words, different game: must not share an analysis
+HARD_NEGATIVES = [
+    'space racer', 'zombie shooter', 'tower builder', 'racing boat', 'match 3 memory',
+    'dragon racing', 'snake ladder', 'basketball manager', 'maze builder', 'fishing tycoon'
+]
+
+def _typo(text: str, rng: random.Random) -> str:
+    """Drop one letter from a longer word"""
+    words = text.split()
+    candidates = [i for i, word in enumerate(words) if len(word) > 4]
+    if not candidates:
+        return text
+    i = rng.choice(candidates)
+    position = rng.randrange(1, len(words[i]) - 1)
+    words[i] = words[i][:position] + words[i][position + 1:]
+    return ' '.join(words)
+
+def benchmark_similarity_index(filler: int = 2000, seed: int = 7) -> Dict[str, Any]:
+    """Precision/recall of near-duplicate hits and LSH vs. linear-scan lookup latency"""
+    rng = random.Random(seed)
+    index = PromptSimilarityIndex(max_entries=filler + len(BENCHMARK_CONCEPTS))
+
+    adjectives = ['neon', 'haunted', 'tiny', 'frozen', 'cyber', 'medieval', 'jungle', 'desert', 'arcade', 'cosmic']
+    subjects = ['knight', 'robot', 'cat', 'tank', 'submarine', 'bee', 'ghost', 'samurai', 'alien', 'chef']
+    activities = ['brawler', 'rhythm', 'stealth', 'golf', 'card battler', 'idle clicker', 'roguelike', 'parkour']
+    for i in range(filler):
+        index.add(f"{rng.choice(adjectives)} {rng.choice(subjects)} {rng.choice(activities)} {i}", ('filler', i))
+
+    stored, held_out = BENCHMARK_CONCEPTS[::2], BENCHMARK_CONCEPTS[1::2]
+    for concept in stored:
+        index.add(PARAPHRASES[0].format(concept), concept)
+
+    true_positive = false_positive = false_negative = true_negative = 0
+    queries = []
+    for concept in stored:
+        for template in PARAPHRASES[1:]:
+            queries.append((template.format(concept), concept))
+        queries.append((rng.choice(PARAPHRASES).format(_typo(concept, rng)), concept))
+    for concept in held_out:
+        for template in PARAPHRASES:
+            queries.append((template.format(concept), None))
+    for concept in HARD_NEGATIVES:
+        queries.append((rng.choice(PARAPHRASES).format(concept), None))
+
+    for query, expected in queries:
+        found = index.lookup(query)
+        value = found[0] if found else None
+        if expected is None:
+            if value is None:
+                true_negative += 1
+            else:
+                false_positive += 1
+        elif value == expected:
+            true_positive += 1
+        elif value is None:
+            false_negative += 1
+        else:
+            false_positive += 1
+
+    timings = {}
+    for name, method in (('lsh', index.lookup), ('linear', index.linear_lookup)):
+        start = time.perf_counter()
+        for query, _ in queries:
+            method(query)
+        timings[name] = (time.perf_counter() - start) * 1e6 / len(queries)
+
+    return {
+        'entries': len(index),
+        'queries': len(queries),
+        'precision': true_positive / (true_positive + false_positive) if true_positive + false_positive else 1.0,
+        'recall': true_positive / (true_positive + false_negative) if true_positive + false_negative else 1.0,
+        'true_negatives': true_negative,
+        'lsh_us_per_lookup': timings['lsh'],
+        'linear_us_per_lookup': timings['linear']
+    }
+
+if __name__ == "__main__":
+    result = benchmark_similarity_index()
+    print("🔎 NEAR-DUPLICATE PROMPT INDEX")
+    print("=" * 50)
+    print(f"{result['queries']} queries against {result['entries']} stored prompts")
+    print(f"Precision: {result['precision']:.3f}  Recall: {result['recall']:.3f}  "
+          f"True negatives: {result['true_negatives']}")
+    print(f"Lookup: LSH {result['lsh_us_per_lookup']:.1f}µs vs linear scan {result['linear_us_per_lookup']:.1f}µs")
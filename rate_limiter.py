@@ -0,0 +1,295 @@
+"""
+Rate Limiter - Token-Bucket Scheduler for the Free-Tier LLM Quota
+Queues LLM calls against per-minute request and token buckets so bursts are
+smoothed to the quota instead of bouncing off it as 429s; interactive calls
+are served before batch ones
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+from prompt_builder import estimate_tokens
+
+INTERACTIVE, BATCH = 0, 1
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BATCH: 'batch'}
+
+GROQ_REQUESTS_PER_MINUTE = int(os.environ.get('GROQ_RPM', 30))
+GROQ_TOKENS_PER_MINUTE = int(os.environ.get('GROQ_TPM', 30000))
+RATE_LIMIT_MAX_WAIT = float(os.environ.get('LLM_RATE_MAX_WAIT', 30))   # seconds before giving up to the fallback
+RATE_LIMIT_DEFAULT_PAUSE = 2.0   # seconds to hold calls after a 429 without Retry-After
+
+# Priority of LLM calls made in the current thread/task
+_priority = contextvars.ContextVar('llm_priority', default=INTERACTIVE)
+
+@contextlib.contextmanager
+def llm_priority(priority: int):
+    """Run the enclosed LLM calls at the given priority (e.g. BATCH for pre-generation jobs)"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def current_priority() -> int:
+    return _priority.get()
+
+class RateLimitExceeded(Exception):
+    """A call waited longer than its limit for quota"""
+
+def payload_tokens(payload: Dict[str, Any]) -> int:
+    """Tokens a chat request may consume: prompt estimate plus its completion allowance"""
+    prompt = sum(estimate_tokens(str(message.get('content', ''))) for message in payload.get('messages', ()))
+    return prompt + int(payload.get('max_tokens') or 0)
+
+def usage_tokens(result: Any) -> Optional[int]:
+    """total_tokens from an OpenAI-style response body, when the backend reports it"""
+    if isinstance(result, dict):
+        total = (result.get('usage') or {}).get('total_tokens')
+        if isinstance(total, int):
+            return total
+    return None
+
+class TokenBucket:
+    """Continuously refilled bucket; not thread-safe on its own (the limiter locks)"""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+    def give(self, amount: float):
+        self.level = min(self.capacity, self.level + amount)
+
+class LLMRateLimiter:
+    """
+    Requests are granted strictly in (priority, arrival) order; only the head
+    of the queue may draw from the buckets, so a waiting interactive call is
+    never overtaken by a batch one. Token reservations are made up front
+    (prompt + max_tokens) and the unused part is refunded with settle().
+    """
+
+    def __init__(self, name: str, requests_per_minute: int = GROQ_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = GROQ_TOKENS_PER_MINUTE, max_wait: float = RATE_LIMIT_MAX_WAIT):
+        self.name = name
+        self.max_wait = max_wait
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._paused_until = 0.0
+
+        self._condition = threading.Condition()
+        self._queue = []
+        self._sequence = itertools.count()
+        self.stats = {
+            'granted': 0, 'rejected': 0, 'max_queue_depth': 0, 'pauses': 0,
+            'wait_seconds': {name: 0.0 for name in PRIORITY_NAMES.values()},
+            'max_wait_seconds': {name: 0.0 for name in PRIORITY_NAMES.values()},
+            'calls': {name: 0 for name in PRIORITY_NAMES.values()}
+        }
+
+    def _enqueue(self, priority: int):
+        ticket = (priority, next(self._sequence))
+        heapq.heappush(self._queue, ticket)
+        self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], len(self._queue))
+        return ticket
+
+    def _dequeue(self, ticket):
+        if self._queue and self._queue[0] == ticket:
+            heapq.heappop(self._queue)
+        else:
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+        self._condition.notify_all()
+
+    def _abandon(self, ticket):
+        """Drop a waiter's ticket if it is still queued (lock held)"""
+        if ticket in self._queue:
+            self._dequeue(ticket)
+
+    def _try_grant(self, ticket, tokens: int, now: float) -> float:
+        """0.0 when granted, else seconds until the head of the queue could be served (lock held)"""
+        if self._queue[0] != ticket:
+            return self.max_wait
+        wait = max(self._paused_until - now,
+                   self._requests.wait_time(1, now),
+                   self._tokens.wait_time(tokens, now))
+        if wait > 0:
+            return wait
+        self._requests.take(1)
+        self._tokens.take(tokens)
+        self._dequeue(ticket)
+        return 0.0
+
+    def _record(self, priority: int, waited: float):
+        name = PRIORITY_NAMES.get(priority, str(priority))
+        self.stats['granted'] += 1
+        self.stats['calls'][name] = self.stats['calls'].get(name, 0) + 1
+        self.stats['wait_seconds'][name] = self.stats['wait_seconds'].get(name, 0.0) + waited
+        self.stats['max_wait_seconds'][name] = max(self.stats['max_wait_seconds'].get(name, 0.0), waited)
+
+    def acquire(self, tokens: int, priority: Optional[int] = None, max_wait: Optional[float] = None) -> float:
+        """Block until the call may go out; returns seconds waited or raises RateLimitExceeded"""
+        priority = current_priority() if priority is None else priority
+        max_wait = self.max_wait if max_wait is None else max_wait
+        start = time.monotonic()
+
+        with self._condition:
+            ticket = self._enqueue(priority)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._try_grant(ticket, tokens, now)
+                    if wait == 0.0:
+                        waited = now - start
+                        self._record(priority, waited)
+                        return waited
+
+                    remaining = max_wait - (now - start)
+                    if remaining <= 0:
+                        self._dequeue(ticket)
+                        self.stats['rejected'] += 1
+                        raise RateLimitExceeded(f"{self.name}: no quota within {max_wait:.0f}s")
+                    self._condition.wait(min(wait, remaining))
+            except BaseException:
+                self._abandon(ticket)
+                raise
+
+    async def acquire_async(self, tokens: int, priority: Optional[int] = None,
+                            max_wait: Optional[float] = None) -> float:
+        """acquire() for asyncio callers; sleeps on the event loop instead of blocking it"""
+        priority = current_priority() if priority is None else priority
+        max_wait = self.max_wait if max_wait is None else max_wait
+        start = time.monotonic()
+
+        with self._condition:
+            ticket = self._enqueue(priority)
+        try:
+            while True:
+                with self._condition:
+                    now = time.monotonic()
+                    wait = self._try_grant(ticket, tokens, now)
+                    if wait == 0.0:
+                        waited = now - start
+                        self._record(priority, waited)
+                        return waited
+
+                    remaining = max_wait - (now - start)
+                    if remaining <= 0:
+                        self._dequeue(ticket)
+                        self.stats['rejected'] += 1
+                        raise RateLimitExceeded(f"{self.name}: no quota within {max_wait:.0f}s")
+                # Calls behind the head re-check often so they move up promptly
+                await asyncio.sleep(min(wait, remaining, 0.05))
+        except BaseException:
+            # Cancelled (client gone, wait_for timeout): a ticket left at the head would block everyone
+            with self._condition:
+                self._abandon(ticket)
+            raise
+
+    def settle(self, reserved_tokens: int, used_tokens: int):
+        """Refund the unused part of a reservation once the real size is known"""
+        if used_tokens < reserved_tokens:
+            with self._condition:
+                self._tokens.give(reserved_tokens - used_tokens)
+                self._condition.notify_all()
+
+    def observe(self, reserved_tokens: int, status: int, used_tokens: Optional[int] = None,
+                retry_after: Optional[str] = None):
+        """Reconcile a finished call: back off on 429, otherwise refund what it didn't use"""
+        if status == 429:
+            try:
+                seconds = float(retry_after)
+            except (TypeError, ValueError):
+                seconds = RATE_LIMIT_DEFAULT_PAUSE
+            self.pause(seconds)
+        elif used_tokens is not None:
+            self.settle(reserved_tokens, used_tokens)
+
+    def pause(self, seconds: float):
+        """Hold every call for a while (upstream said 429 with Retry-After)"""
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self.stats['pauses'] += 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._condition:
+            now = time.monotonic()
+            self._requests._refill(now)
+            self._tokens._refill(now)
+            granted = self.stats['calls']
+            return {
+                'queue_depth': len(self._queue),
+                'requests_available': round(self._requests.level, 2),
+                'tokens_available': round(self._tokens.level),
+                'paused_for_seconds': round(max(0.0, self._paused_until - now), 2),
+                **self.stats,
+                'avg_wait_seconds': {name: round(total / granted[name], 3) if granted.get(name) else 0.0
+                                     for name, total in self.stats['wait_seconds'].items()},
+                'wait_seconds': {name: round(total, 3) for name, total in self.stats['wait_seconds'].items()},
+                'max_wait_seconds': {name: round(value, 3) for name, value in self.stats['max_wait_seconds'].items()}
+            }
+
+# Quota-limited backends, keyed by host; other hosts (local stubs, HF) are not throttled here
+_limiters = {
+    urlsplit(os.environ.get('GROQ_BASE_URL', "https://api.groq.com/openai/v1/chat/completions")).netloc:
+        LLMRateLimiter('groq')
+}
+
+def get_rate_limiter(url: str) -> Optional[LLMRateLimiter]:
+    return _limiters.get(urlsplit(url).netloc)
+
+def register_rate_limiter(url: str, limiter: Optional[LLMRateLimiter]):
+    """Throttle another backend (or stop throttling it with None)"""
+    host = urlsplit(url).netloc
+    if limiter is None:
+        _limiters.pop(host, None)
+    else:
+        _limiters[host] = limiter
+
+def get_rate_limit_metrics() -> Dict[str, Any]:
+    return {host: limiter.get_metrics() for host, limiter in list(_limiters.items())}
+
+if __name__ == "__main__":
+    # 8 batch calls, then 4 interactive ones, against 60 RPM with a 5-call burst allowance
+    limiter = LLMRateLimiter('demo', requests_per_minute=60, tokens_per_minute=100000)
+    limiter._requests.capacity = limiter._requests.level = 5
+    finished = []
+
+    def call(index: int, priority: int):
+        with llm_priority(priority):
+            waited = limiter.acquire(100)
+        finished.append((index, PRIORITY_NAMES[priority], waited))
+
+    threads = [threading.Thread(target=call, args=(i, BATCH)) for i in range(8)]
+    threads += [threading.Thread(target=call, args=(i, INTERACTIVE)) for i in range(8, 12)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+
+    print("🪣 TOKEN-BUCKET SCHEDULER (60 RPM, burst 5)")
+    print("=" * 50)
+    print("Grant order:", ' '.join(f"{index}{name[0]}" for index, name, _ in finished))
+    metrics = limiter.get_metrics()
+    print(f"Max queue depth: {metrics['max_queue_depth']}")
+    print(f"Average wait: {metrics['avg_wait_seconds']}")
@@ -0,0 +1,186 @@
+"""
+Shared Assets - Content-Hashed Static Files for Code Every Game Repeats
+Snippets that would otherwise be inlined into every page (particle system,
+save manager, input handler...) are minified once, written under
+static/shared/ with their hash in the file name when a page first references
+them, and served through the fingerprinted /assets/ route
+"""
+
+import hashlib
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+
+from page_compression import minify_css, minify_js
+from static_assets import ASSETS_URL, static_assets
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+SHARED_DIR = 'shared'
+# Where pages load shared assets from; point at a CDN that mirrors /assets/ to offload the origin
+SHARED_ASSETS_URL = os.environ.get('SHARED_ASSETS_URL', ASSETS_URL).rstrip('/')
+
+ASSET_KINDS = ('js', 'css')
+_MINIFIERS = {'js': minify_js, 'css': minify_css}
+_SHARED_REFERENCE = re.compile(
+    r'<script src="[^"]*/' + SHARED_DIR + r'/(?P<js>[\w.-]+\.js)"></script>'
+    r'|<link rel="stylesheet" href="[^"]*/' + SHARED_DIR + r'/(?P<css>[\w.-]+\.css)">'
+)
+
+@dataclass(frozen=True)
+class SharedAsset:
+    name: str
+    kind: str
+    content: str     # minified
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(self.content.encode('utf-8')).hexdigest()[:12]
+
+    @property
+    def logical_name(self) -> str:
+        """Name in the static asset manifest"""
+        return f"{SHARED_DIR}/{self.name.replace('_', '-')}.{self.kind}"
+
+    @property
+    def filename(self) -> str:
+        # A new version is a new file name, so caches never serve stale code
+        return f"{self.name.replace('_', '-')}.{self.digest}.{self.kind}"
+
+    @property
+    def path(self) -> str:
+        """Path relative to the static directory, and the asset's fingerprinted name"""
+        return f"{SHARED_DIR}/{self.filename}"
+
+    @property
+    def url(self) -> str:
+        return f"{SHARED_ASSETS_URL}/{self.path}"
+
+    def tag(self) -> str:
+        if self.kind == 'css':
+            return f'<link rel="stylesheet" href="{self.url}">'
+        return f'<script src="{self.url}"></script>'
+
+    def inline_tag(self) -> str:
+        if self.kind == 'css':
+            return f"<style>{self.content}</style>"
+        return f"<script>{self.content}</script>"
+
+class SharedAssetRegistry:
+    """
+    Registered snippets by name. register() only keeps them in memory; the
+    hashed file is written under static/ the first time a page links to it
+    (or by build()), and a page falls back to inlining when it can't be
+    """
+
+    def __init__(self, static_dir: str = STATIC_DIR):
+        self.static_dir = static_dir
+        self._assets: Dict[str, SharedAsset] = {}
+        self._by_filename: Dict[str, SharedAsset] = {}
+        self._published: Set[str] = set()   # filenames on disk and served from /assets/
+        self._unwritable: Set[str] = set()  # failed once; pages inline these instead of retrying
+        self._lock = threading.Lock()
+
+    def register(self, name: str, kind: str, content: str) -> SharedAsset:
+        if kind not in ASSET_KINDS:
+            raise ValueError(f"Unknown asset kind '{kind}' (expected one of {', '.join(ASSET_KINDS)})")
+
+        asset = SharedAsset(name, kind, _MINIFIERS[kind](content))
+        with self._lock:
+            self._assets[name] = asset
+            self._by_filename[asset.filename] = asset
+        return asset
+
+    def publish(self, asset: SharedAsset) -> bool:
+        """Write the asset's file if needed and serve it; False if it couldn't be written"""
+        if asset.filename in self._published:
+            return True
+        if asset.filename in self._unwritable:
+            return False
+        with self._lock:
+            if asset.filename in self._published:
+                return True
+            try:
+                path = self._write(asset)
+            except OSError as e:
+                print(f"Could not write shared asset {asset.path}, inlining it: {e}")
+                self._unwritable.add(asset.filename)
+                return False
+            static_assets.register_file(asset.logical_name, path, asset.digest)
+            self._published.add(asset.filename)
+        return True
+
+    def build(self) -> List[SharedAsset]:
+        """Write every registered asset ahead of the first request; returns the ones that failed"""
+        return [asset for asset in list(self._assets.values()) if not self.publish(asset)]
+
+    def _write(self, asset: SharedAsset) -> str:
+        path = os.path.join(self.static_dir, asset.path)
+        if os.path.exists(path):
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written under a temporary name and renamed, so concurrent workers never serve half a file
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(asset.content)
+        os.replace(temp_path, path)
+        return path
+
+    def get(self, name: str) -> Optional[SharedAsset]:
+        return self._assets.get(name)
+
+    def tags(self, names: Iterable[str]) -> str:
+        """<script>/<link> references for registered assets, in the order given (inline if unpublishable)"""
+        assets = [self._assets[name] for name in names]
+        return '\n'.join(asset.tag() if self.publish(asset) else asset.inline_tag() for asset in assets)
+
+    def inline(self, html: str) -> str:
+        """Put shared assets back inline, for pages that must work standalone (downloads)"""
+        def replace(match):
+            asset = self._by_filename.get(match.group('js') or match.group('css'))
+            return asset.inline_tag() if asset is not None else match.group(0)
+        return _SHARED_REFERENCE.sub(replace, html)
+
+    def manifest(self) -> Dict[str, str]:
+        """name → versioned URL"""
+        return {name: asset.url for name, asset in self._assets.items()}
+
+    def register_built(self):
+        """
+        Serve every version already under static/shared/, so pages cached
+        before a restart load their assets before any generator has run
+        """
+        return static_assets.register_fingerprinted_directory(
+            os.path.join(self.static_dir, SHARED_DIR), f"{SHARED_DIR}/")
+
+    def stale_files(self) -> List[str]:
+        """Files in static/shared/ no registered asset points at (older versions)"""
+        directory = os.path.join(self.static_dir, SHARED_DIR)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(filename for filename in os.listdir(directory) if filename not in self._by_filename)
+
+shared_assets = SharedAssetRegistry()
+
+if __name__ == "__main__":
+    # Build step: register everything the generators share and report the savings
+    from game_templates import GameTemplateManager
+    # The registry the generators use lives in the imported module, not in __main__
+    from shared_assets import shared_assets as registry
+
+    manager = GameTemplateManager()
+    failed = registry.build()
+    html = manager.generate_complete_html({'theme': 'space', 'title': 'Asset Check'})
+    standalone = registry.inline(html)
+
+    print("📦 SHARED ASSETS")
+    print("=" * 50)
+    for name, url in registry.manifest().items():
+        print(f"{name:>20}: {url} ({len(registry.get(name).content)} bytes)")
+    print(f"Page with shared assets: {len(html)} bytes, standalone: {len(standalone)} bytes")
+    if failed:
+        print(f"Not written (pages inline them): {', '.join(asset.name for asset in failed)}")
+    stale = registry.stale_files()
+    if stale:
+        print(f"Stale versions in static/{SHARED_DIR}/: {', '.join(stale)}")
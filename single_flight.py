@@ -0,0 +1,144 @@
+"""
+Single Flight - Coalescing of Concurrent Identical Work
+Concurrent callers asking for the same key share one in-flight execution
+(and its result or error) instead of each repeating the same LLM calls
+"""
+
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterator
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class _Stream:
+    __slots__ = ('chunks', 'finished', 'error', 'condition')
+
+    def __init__(self):
+        self.chunks = []
+        self.finished = False
+        self.error = None
+        self.condition = threading.Condition()
+
+class SingleFlight:
+    """
+    Thread-based coalescing. Only in-flight work is shared: once a call
+    finishes, the next caller with the same key starts a fresh one.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._streams = {}
+        self._lock = threading.Lock()
+        self.stats = {'executed': 0, 'coalesced': 0}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) unless the same key is already running; then wait for it"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats['executed'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stream(self, key: Hashable, factory: Callable[[], Iterator[Any]]) -> Iterator[Any]:
+        """
+        Share one iterator among concurrent consumers. A background thread
+        drains factory() into a buffer; every consumer replays the buffer from
+        the start and then follows it live, so a slow or disconnected client
+        never stalls the others.
+        """
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is None:
+                stream = self._streams[key] = _Stream()
+                self.stats['executed'] += 1
+                threading.Thread(target=self._pump, args=(key, stream, factory), daemon=True).start()
+            else:
+                self.stats['coalesced'] += 1
+
+        position = 0
+        while True:
+            with stream.condition:
+                while position == len(stream.chunks) and not stream.finished:
+                    stream.condition.wait()
+                batch = stream.chunks[position:]
+                finished, error = stream.finished, stream.error
+            position += len(batch)
+            yield from batch
+            if finished and position == len(stream.chunks):
+                if error is not None:
+                    raise error
+                return
+
+    def _pump(self, key: Hashable, stream: _Stream, factory: Callable[[], Iterator[Any]]):
+        try:
+            for chunk in factory():
+                with stream.condition:
+                    stream.chunks.append(chunk)
+                    stream.condition.notify_all()
+        except Exception as e:
+            stream.error = e
+        finally:
+            with self._lock:
+                del self._streams[key]
+            with stream.condition:
+                stream.finished = True
+                stream.condition.notify_all()
+
+    def in_flight(self) -> int:
+        return len(self._calls) + len(self._streams)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'in_flight': self.in_flight(), **self.stats}
+
+class AsyncSingleFlight:
+    """asyncio coalescing: callers with the same key await one shared task"""
+
+    def __init__(self):
+        self._tasks = {}
+        self.stats = {'executed': 0, 'coalesced': 0}
+
+    async def do(self, key: Hashable, coroutine_factory: Callable[[], Any]) -> Any:
+        task = self._tasks.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(coroutine_factory())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+            self.stats['executed'] += 1
+        else:
+            self.stats['coalesced'] += 1
+
+        # One waiter being cancelled must not cancel the shared work
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'in_flight': len(self._tasks), **self.stats}
@@ -0,0 +1,146 @@
+"""
+Static Assets - Fingerprinted Files Served with Long-Term Caching
+Template resources and extracted shared assets are registered under a logical
+name, fingerprinted by content hash and served from /assets/ as immutable;
+the manifest maps each logical name to its current URL for link rewriting
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_URL = os.environ.get('ASSETS_URL', '/assets').rstrip('/')
+ASSET_MAX_AGE = int(os.environ.get('ASSET_MAX_AGE', 31536000))   # a fingerprinted URL never changes content
+
+# Repo files served as assets, by logical name
+TEMPLATE_FILES = ('enhanced_space_shooter_template.html',)
+
+DIGEST_LENGTH = 12
+_HASH_CHUNK = 64 * 1024
+_FINGERPRINTED = re.compile(r'^(?P<stem>.+)\.(?P<digest>[0-9a-f]{%d})(?P<ext>\.\w+)$' % DIGEST_LENGTH)
+_LINK = re.compile(r"""(?P<attr>\b(?:src|href)\s*=\s*)(?P<quote>["'])(?P<target>[^"'#?]+)(?P=quote)""", re.IGNORECASE)
+_LINK_PREFIXES = ('/static/', ASSETS_URL + '/', '/')
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:DIGEST_LENGTH]
+
+def fingerprint_name(name: str, digest: str) -> str:
+    """'dir/game.html' → 'dir/game.<digest>.html'"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest}{ext}"
+
+@dataclass(frozen=True)
+class StaticAsset:
+    name: str      # logical name, e.g. 'enhanced_space_shooter_template.html'
+    path: str      # file on disk
+    digest: str
+    size: int
+
+    @property
+    def fingerprinted(self) -> str:
+        return fingerprint_name(self.name, self.digest)
+
+    @property
+    def url(self) -> str:
+        return f"{ASSETS_URL}/{self.fingerprinted}"
+
+    @property
+    def mimetype(self) -> str:
+        return mimetypes.guess_type(self.name)[0] or 'application/octet-stream'
+
+class StaticAssetRegistry:
+    """
+    Every fingerprint ever registered stays servable, so pages cached with
+    an older asset URL keep working; the manifest only lists the newest
+    """
+
+    def __init__(self):
+        self._current: Dict[str, StaticAsset] = {}
+        self._by_fingerprint: Dict[str, StaticAsset] = {}
+        self._lock = threading.Lock()
+
+    def register_file(self, name: str, path: str, digest: Optional[str] = None) -> StaticAsset:
+        asset = StaticAsset(name, path, digest or file_digest(path), os.path.getsize(path))
+        with self._lock:
+            self._current[name] = asset
+            self._by_fingerprint[asset.fingerprinted] = asset
+        return asset
+
+    def register_fingerprinted_directory(self, directory: str, prefix: str = '') -> List[StaticAsset]:
+        """Pick up files already named <stem>.<digest>.<ext> (build output), oldest first"""
+        if not os.path.isdir(directory):
+            return []
+        found = []
+        for filename in os.listdir(directory):
+            match = _FINGERPRINTED.match(filename)
+            path = os.path.join(directory, filename)
+            if match is None or not os.path.isfile(path):
+                continue
+            if file_digest(path) != match.group('digest'):
+                print(f"Skipping static asset {filename}: content doesn't match its fingerprint")
+                continue
+            found.append((os.path.getmtime(path), prefix + match.group('stem') + match.group('ext'),
+                          path, match.group('digest')))
+        return [self.register_file(name, path, digest) for _, name, path, digest in sorted(found)]
+
+    def lookup(self, fingerprinted: str) -> Optional[StaticAsset]:
+        return self._by_fingerprint.get(fingerprinted)
+
+    def url(self, name: str) -> Optional[str]:
+        asset = self._current.get(name)
+        return asset.url if asset is not None else None
+
+    def manifest(self) -> Dict[str, str]:
+        """logical name → fingerprinted URL"""
+        with self._lock:
+            return {name: asset.url for name, asset in self._current.items()}
+
+    def rewrite_links(self, html: str) -> str:
+        """Point src/href attributes that name a registered asset at its fingerprinted URL"""
+        if not self._current:
+            return html
+
+        def replace(match):
+            target = match.group('target')
+            for prefix in _LINK_PREFIXES:
+                if target.startswith(prefix):
+                    target = target[len(prefix):]
+                    break
+            asset = self._current.get(target)
+            if asset is None:
+                return match.group(0)
+            return f"{match.group('attr')}{match.group('quote')}{asset.url}{match.group('quote')}"
+        return _LINK.sub(replace, html)
+
+static_assets = StaticAssetRegistry()
+
+def register_template_files(base_dir: str = BASE_DIR) -> List[StaticAsset]:
+    registered = []
+    for name in TEMPLATE_FILES:
+        path = os.path.join(base_dir, name)
+        if os.path.isfile(path):
+            registered.append(static_assets.register_file(name, path))
+        else:
+            print(f"Static asset {name} not found, not served")
+    return registered
+
+if __name__ == "__main__":
+    from shared_assets import STATIC_DIR, SHARED_DIR
+
+    register_template_files()
+    static_assets.register_fingerprinted_directory(os.path.join(STATIC_DIR, SHARED_DIR), f"{SHARED_DIR}/")
+
+    print("🔖 STATIC ASSET MANIFEST")
+    print("=" * 50)
+    for name, url in static_assets.manifest().items():
+        print(f"{name:>40} → {url}")
+    print(static_assets.rewrite_links('<iframe src="/static/enhanced_space_shooter_template.html"></iframe>'))
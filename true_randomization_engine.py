@@ -6,30 +6,123 @@ Ensures no two games are identical, even with the same prompt
 
 import random
 import hashlib
+import itertools
+import math
+import threading
 import time
-from typing import Dict, List, Tuple, Any
+import zlib
+from functools import lru_cache
+from collections import deque
+from typing import Dict, List, Tuple, Any, Optional
 from dataclasses import dataclass
+from frozen_structures import FrozenDict, freeze
 
-@dataclass
+_MASK64 = (1 << 64) - 1
+# Seeds are kept to 53 bits so they survive a round trip through JSON/JavaScript
+SEED_MASK = (1 << 53) - 1
+
+def splitmix64(value: int) -> int:
+    """SplitMix64 finalizer: fast, well-distributed 64-bit mixing"""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+def hash_text64(text: str) -> int:
+    """Non-cryptographic 64-bit text hash (two C-speed checksums, then mixed)"""
+    data = text.encode('utf-8')
+    return splitmix64(zlib.crc32(data) | (zlib.adler32(data) << 32))
+
+@lru_cache(maxsize=4096)
+def _prompt_hash(game_type: str, prompt: str) -> int:
+    return hash_text64(f"{game_type}\x00{prompt}")
+
+def derive_seed(game_type: str, prompt: str, time_bucket: int = 0, salt: int = 0) -> int:
+    """Mix prompt hash, game type, time bucket and salt into a replayable seed"""
+    bucket = (time_bucket * 0xD1B54A32D192ED03) & _MASK64
+    return splitmix64(_prompt_hash(game_type, prompt) ^ bucket ^ salt) & SEED_MASK
+
+@dataclass(frozen=True)
 class GameVariation:
-    """Represents a unique game variation"""
+    """
+    Represents a unique game variation. Immutable and hashable; ui_elements,
+    color_scheme and mechanics are shared by reference from the engine tables.
+    """
+    __slots__ = ('title', 'character', 'theme_modifier', 'ui_elements', 'color_scheme',
+                 'mechanics', 'difficulty', 'special_features', 'seed', 'index')
+    
     title: str
     character: str
     theme_modifier: str
-    ui_elements: Dict[str, str]
-    color_scheme: Dict[str, str]
-    mechanics: List[str]
+    ui_elements: FrozenDict
+    color_scheme: FrozenDict
+    mechanics: Tuple[str, ...]
     difficulty: str
-    special_features: List[str]
+    special_features: Tuple[str, ...]
+    seed: Optional[int]
+    index: int
+
+# Dimensions of the variation index, most significant digit first
+VARIATION_DIMENSIONS = ('titles', 'characters', 'themes', 'ui_variations', 'mechanics')
+
+class VariationSession:
+    """
+    Samples a game type's variation indices without replacement using an
+    affine permutation i -> (a*i + b) mod N: O(1) memory and time per draw,
+    and every index is produced exactly once before the session is exhausted.
+    """
+    
+    def __init__(self, game_type: str, count: int, seed: int):
+        rng = random.Random(seed)
+        self.game_type = game_type
+        self.count = count
+        self._offset = rng.randrange(count)
+        self._stride = rng.randrange(1, count) if count > 1 else 1
+        while math.gcd(self._stride, count) != 1:
+            self._stride = rng.randrange(1, count)
+        self._position = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def remaining(self) -> int:
+        return self.count - self._position
+    
+    def next_index(self) -> int:
+        """Next unused variation index; raises StopIteration when exhausted"""
+        with self._lock:
+            if self._position >= self.count:
+                raise StopIteration(f"All {self.count} '{self.game_type}' variations used")
+            position = self._position
+            self._position += 1
+        return (self._stride * position + self._offset) % self.count
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self) -> int:
+        return self.next_index()
 
 class TrueRandomizationEngine:
     """
     Advanced randomization engine that creates unique game variations
     """
     
-    def __init__(self):
+    # Re-draws allowed before accepting a recently used combination
+    MAX_NOVELTY_ATTEMPTS = 8
+    
+    def __init__(self, history_depth: int = 10):
         self.variation_cache = {}  # Prevent immediate repeats
-        self.generation_history = []  # Track generation patterns
+        self.history_depth = history_depth
+        self.generation_history = deque(maxlen=history_depth)  # Ring buffer of recent generations
+        
+        # game_type -> {combination index: uses in history}, for O(1) repeat checks
+        self._recent_combinations = {}
+        self._history_lock = threading.Lock()
+        
+        # Per-process salt plus a counter keeps same-bucket seeds distinct
+        # without touching the global RNG or hashing per call
+        self._seed_salt = random.Random().getrandbits(64)
+        self._seed_counter = itertools.count()
         
         # Game type variations
         self.game_variations = {
@@ -209,8 +302,25 @@ class TrueRandomizationEngine:
             'hard': {'name': 'Challenging', 'modifier': 1.3},
             'expert': {'name': 'Expert', 'modifier': 1.6}
         }
+        
+        # Tables are frozen once so variations can share their entries by reference
+        self.game_variations = freeze(self.game_variations)
+        self.color_schemes = freeze(self.color_schemes)
+        self.difficulty_levels = freeze(self.difficulty_levels)
+        
+        # Each game type's variation space as a mixed-radix number
+        self._variation_radices = {
+            game_type: tuple(len(tables[dimension]) for dimension in VARIATION_DIMENSIONS)
+            for game_type, tables in self.game_variations.items()
+        }
+        self._variation_counts = {}
+        for game_type, radices in self._variation_radices.items():
+            count = 1
+            for radix in radices:
+                count *= radix
+            self._variation_counts[game_type] = count
 
-    def generate_variation(self, game_type: str, prompt_analysis: Dict = None) -> GameVariation:
+    def generate_variation(self, game_type: str, prompt_analysis: Dict = None, seed: Optional[int] = None) -> GameVariation:
         """
         🔥 FIXED: Added missing generate_variation method
         This is the method that was being called but didn't exist
@@ -226,68 +336,143 @@ class TrueRandomizationEngine:
                 'complexity': 'medium'
             }
         
-        return self.generate_unique_variation(game_type, prompt_analysis)
+        return self.generate_unique_variation(game_type, prompt_analysis, seed)
 
-    def generate_unique_variation(self, game_type: str, prompt_analysis: Dict) -> GameVariation:
+    def generate_unique_variation(self, game_type: str, prompt_analysis: Dict, seed: Optional[int] = None) -> GameVariation:
         """
-        Generate a unique game variation based on game type and prompt analysis
+        Generate a unique game variation based on game type and prompt analysis.
+        Each call draws from its own random.Random, so the same seed always
+        reproduces the same variation and concurrent calls never interfere.
         """
-        # Create unique seed based on current time and prompt
-        seed = self._create_unique_seed(game_type, prompt_analysis['original_prompt'])
-        random.seed(seed)
-        
         # Get base variations for game type
         if game_type not in self.game_variations:
             game_type = 'darts'  # Fallback
         
-        variations = self.game_variations[game_type]
+        # Create unique seed based on current time and prompt, steering away from
+        # recently generated combinations; explicit seeds replay exactly
+        if seed is None:
+            seed = self._create_unique_seed(game_type, prompt_analysis['original_prompt'])
+            seed = self._find_novel_seed(game_type, seed)
+        rng = random.Random(seed)
+        
+        # One draw picks the whole combination from the enumerated space
+        index = rng.randrange(self.count_variations(game_type))
+        variation = self._build_variation(game_type, index, prompt_analysis, rng, seed)
+        
+        # Store in history to prevent immediate repeats
+        self._update_generation_history(game_type, variation, self._combination_key(game_type, index))
         
-        # Select random elements
-        title = random.choice(variations['titles'])
-        character = random.choice(variations['characters'])
-        theme = random.choice(variations['themes'])
-        ui_elements = random.choice(variations['ui_variations'])
-        mechanics = random.choice(variations['mechanics'])
+        return variation
+
+    def _build_variation(self, game_type: str, index: int, prompt_analysis: Dict,
+                         rng: random.Random, seed: Optional[int]) -> GameVariation:
+        """Turn a variation index plus prompt analysis into a GameVariation"""
+        variations = self.game_variations[game_type]
+        title_index, character_index, theme_index, ui_index, mechanics_index = self.decode_variation_index(game_type, index)
         
         # Apply prompt-based modifications
-        title = self._apply_prompt_modifiers(title, prompt_analysis)
-        character = self._apply_character_modifiers(character, prompt_analysis)
+        title = self._apply_prompt_modifiers(variations['titles'][title_index], prompt_analysis)
+        character = self._apply_character_modifiers(variations['characters'][character_index], prompt_analysis)
         
         # Select color scheme
         color_scheme = self._select_color_scheme(game_type, prompt_analysis)
         
         # Determine difficulty
-        difficulty = self._determine_difficulty(prompt_analysis)
+        difficulty = self._determine_difficulty(prompt_analysis, rng)
         
         # Add special features
-        special_features = self._generate_special_features(game_type, prompt_analysis)
+        special_features = self._generate_special_features(game_type, prompt_analysis, rng)
         
         # Create variation object
-        variation = GameVariation(
+        return GameVariation(
             title=title,
             character=character,
-            theme_modifier=theme,
-            ui_elements=ui_elements,
+            theme_modifier=variations['themes'][theme_index],
+            ui_elements=variations['ui_variations'][ui_index],
             color_scheme=color_scheme,
-            mechanics=mechanics,
+            mechanics=variations['mechanics'][mechanics_index],
             difficulty=difficulty,
-            special_features=special_features
+            special_features=special_features,
+            seed=seed,
+            index=index
         )
+
+    def get_variation_radices(self, game_type: str) -> Tuple[int, ...]:
+        """
+        Digit sizes of the mixed-radix variation index, most significant first:
+        (titles, characters, themes, ui_variations, mechanics)
+        """
+        return self._variation_radices[game_type]
+
+    def count_variations(self, game_type: str) -> int:
+        """Number of distinct base variations a game type can produce"""
+        return self._variation_counts[game_type]
+
+    def encode_variation_index(self, game_type: str, digits: Tuple[int, ...]) -> int:
+        """Pack per-dimension choices into a single variation index"""
+        index = 0
+        for digit, radix in zip(digits, self._variation_radices[game_type]):
+            if not 0 <= digit < radix:
+                raise ValueError(f"Digit {digit} out of range for radix {radix}")
+            index = index * radix + digit
+        return index
+
+    def decode_variation_index(self, game_type: str, index: int) -> Tuple[int, ...]:
+        """Unpack a variation index into per-dimension choices"""
+        if not 0 <= index < self._variation_counts[game_type]:
+            raise ValueError(f"Variation index {index} out of range for '{game_type}'")
+        digits = []
+        for radix in reversed(self._variation_radices[game_type]):
+            index, digit = divmod(index, radix)
+            digits.append(digit)
+        return tuple(reversed(digits))
+
+    def decode_variation(self, game_type: str, index: int, prompt_analysis: Dict = None,
+                         seed: Optional[int] = None) -> GameVariation:
+        """
+        Build the GameVariation for an index. Difficulty and special features come
+        from the seed (the index itself when no seed is given), so decoding is
+        deterministic. Decoding does not touch generation history.
+        """
+        if prompt_analysis is None:
+            prompt_analysis = {'original_prompt': f"Generate {game_type} game", 'complexity': 'medium'}
+        rng = random.Random(index if seed is None else seed)
+        return self._build_variation(game_type, index, prompt_analysis, rng, seed)
+
+    def create_variation_session(self, game_type: str, seed: Optional[int] = None) -> 'VariationSession':
+        """Sampler that yields every variation index of a game type exactly once"""
+        if seed is None:
+            seed = self._create_unique_seed(game_type, 'session')
+        return VariationSession(game_type, self.count_variations(game_type), seed)
+
+    def _combination_key(self, game_type: str, index: int) -> int:
+        """The (title, character, theme) part of an index, used for repeat checks"""
+        radices = self._variation_radices[game_type]
+        return index // (radices[3] * radices[4])
+
+    def _find_novel_seed(self, game_type: str, seed: int) -> int:
+        """
+        Re-derive the seed until its combination is absent from recent history.
+        Each check is a dict lookup, and with history far smaller than the
+        combination space a couple of attempts almost always suffice.
+        """
+        recent = self._recent_combinations.get(game_type)
+        if not recent:
+            return seed
         
-        # Store in history to prevent immediate repeats
-        self._update_generation_history(game_type, variation)
-        
-        return variation
+        count = self.count_variations(game_type)
+        for _ in range(self.MAX_NOVELTY_ATTEMPTS):
+            if self._combination_key(game_type, random.Random(seed).randrange(count)) not in recent:
+                return seed
+            seed = splitmix64(seed) & SEED_MASK
+        return seed
 
     def _create_unique_seed(self, game_type: str, prompt: str) -> int:
         """Create a unique seed that changes over time"""
         # Combine game type, prompt, and current time for uniqueness
         time_factor = int(time.time() / 10)  # Changes every 10 seconds
-        seed_string = f"{game_type}_{prompt}_{time_factor}_{random.randint(1, 1000)}"
-        
-        # Create hash and convert to integer
-        hash_object = hashlib.md5(seed_string.encode())
-        return int(hash_object.hexdigest()[:8], 16)
+        salt = (self._seed_salt + next(self._seed_counter)) & _MASK64
+        return derive_seed(game_type, prompt, time_factor, salt)
 
     def _apply_prompt_modifiers(self, title: str, analysis: Dict) -> str:
         """Apply prompt-specific modifiers to the title"""
@@ -317,7 +502,7 @@ class TrueRandomizationEngine:
         
         return character
 
-    def _select_color_scheme(self, game_type: str, analysis: Dict) -> Dict[str, str]:
+    def _select_color_scheme(self, game_type: str, analysis: Dict) -> FrozenDict:
         """Select appropriate color scheme based on game type and analysis"""
         environment = analysis.get('environment')
         
@@ -343,18 +528,18 @@ class TrueRandomizationEngine:
             scheme_name = defaults.get(game_type, 'classic')
             return self.color_schemes[scheme_name]
 
-    def _determine_difficulty(self, analysis: Dict) -> str:
+    def _determine_difficulty(self, analysis: Dict, rng: random.Random) -> str:
         """Determine difficulty based on prompt complexity"""
         complexity = analysis.get('complexity', 'medium')
         
         if complexity == 'simple':
-            return random.choice(['easy', 'medium'])
+            return rng.choice(['easy', 'medium'])
         elif complexity == 'complex':
-            return random.choice(['hard', 'expert'])
+            return rng.choice(['hard', 'expert'])
         else:
-            return random.choice(['easy', 'medium', 'hard'])
+            return rng.choice(['easy', 'medium', 'hard'])
 
-    def _generate_special_features(self, game_type: str, analysis: Dict) -> List[str]:
+    def _generate_special_features(self, game_type: str, analysis: Dict, rng: random.Random) -> Tuple[str, ...]:
         """Generate special features based on game type and analysis"""
         base_features = {
             'darts': ['Precision aiming', 'Combo scoring', 'Tournament mode'],
@@ -365,7 +550,7 @@ class TrueRandomizationEngine:
             'racing': ['Nitro boost', 'Drift mechanics', 'Track variety']
         }
         
-        features = base_features.get(game_type, ['Standard gameplay'])
+        features = list(base_features.get(game_type, ['Standard gameplay']))
         
         # Add complexity-based features
         if analysis.get('complexity') == 'complex':
@@ -376,20 +561,53 @@ class TrueRandomizationEngine:
         if environment:
             features.append(f'{environment.title()} environment')
         
-        return random.sample(features, min(3, len(features)))
+        return tuple(rng.sample(features, min(3, len(features))))
 
-    def _update_generation_history(self, game_type: str, variation: GameVariation):
+    def _update_generation_history(self, game_type: str, variation: GameVariation, combination: int):
         """Update generation history to prevent immediate repeats"""
-        self.generation_history.append({
+        entry = {
             'game_type': game_type,
             'title': variation.title,
             'character': variation.character,
+            'combination': combination,
             'timestamp': time.time()
-        })
+        }
         
-        # Keep only recent history (last 10 generations)
-        if len(self.generation_history) > 10:
-            self.generation_history = self.generation_history[-10:]
+        with self._history_lock:
+            # The ring buffer drops its oldest entry; release that entry's combination
+            if self.history_depth and len(self.generation_history) == self.history_depth:
+                evicted = self.generation_history[0]
+                counts = self._recent_combinations[evicted['game_type']]
+                counts[evicted['combination']] -= 1
+                if not counts[evicted['combination']]:
+                    del counts[evicted['combination']]
+            
+            if self.history_depth:
+                self.generation_history.append(entry)
+                counts = self._recent_combinations.setdefault(game_type, {})
+                counts[combination] = counts.get(combination, 0) + 1
+
+    def benchmark_seeding(self, iterations: int = 100000) -> Dict[str, float]:
+        """Compare the SplitMix seeding path against the previous MD5 path"""
+        prompt = 'Create an epic space battle with alien ships and laser weapons'
+        
+        start = time.perf_counter()
+        for i in range(iterations):
+            seed_string = f"space_{prompt}_{int(time.time() / 10)}_{i % 1000}"
+            int(hashlib.md5(seed_string.encode()).hexdigest()[:8], 16)
+        md5_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for _ in range(iterations):
+            self._create_unique_seed('space', prompt)
+        splitmix_seconds = time.perf_counter() - start
+        
+        return {
+            'iterations': iterations,
+            'md5_ns_per_seed': md5_seconds / iterations * 1e9,
+            'splitmix_ns_per_seed': splitmix_seconds / iterations * 1e9,
+            'speedup': md5_seconds / splitmix_seconds if splitmix_seconds else 0.0
+        }
 
     def get_variation_stats(self) -> Dict:
         """Get statistics about generated variations"""
@@ -397,7 +615,9 @@ class TrueRandomizationEngine:
             'total_generated': len(self.generation_history),
             'unique_titles': len(set(item['title'] for item in self.generation_history)),
             'game_types': list(set(item['game_type'] for item in self.generation_history)),
-            'recent_generations': self.generation_history[-5:]
+            'history_depth': self.history_depth,
+            'variation_space': dict(self._variation_counts),
+            'recent_generations': list(self.generation_history)[-5:]
         }
 
 # Example usage and testing
@@ -447,5 +667,20 @@ if __name__ == "__main__":
     print(f"Total Generated: {stats['total_generated']}")
     print(f"Unique Titles: {stats['unique_titles']}")
     print(f"Game Types: {stats['game_types']}")
+    print(f"Variation Space: {stats['variation_space']}")
+    
+    # Sampling without replacement covers the whole space with no repeats
+    session = randomizer.create_variation_session('darts')
+    indices = list(session)
+    print(f"🎯 Darts session: {len(indices)} draws, {len(set(indices))} unique")
+    
+    # Replay: the same seed always reproduces the same variation
+    replay_analysis = {'original_prompt': 'space battle', 'complexity': 'medium'}
+    first = randomizer.generate_variation('space', replay_analysis)
+    replayed = randomizer.generate_variation('space', replay_analysis, seed=first.seed)
+    print(f"\n🔁 Replay seed {first.seed}: {'identical' if first == replayed else 'DIFFERENT'}")
+    
+    bench = randomizer.benchmark_seeding()
+    print(f"⚡ Seeding: MD5 {bench['md5_ns_per_seed']:.0f} ns vs SplitMix {bench['splitmix_ns_per_seed']:.0f} ns ({bench['speedup']:.1f}x)")
     
     print("\n✅ FIXED: generate_variation method now exists and works correctly!")